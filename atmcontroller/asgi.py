@@ -2,6 +2,8 @@
 ASGI config for atmcontroller project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Terminal requests under ``/atm/`` are served by the async ATM controller (i.e.
+AsyncATMUseCase); everything else goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.1/howto/deployment/asgi/
@@ -13,4 +15,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "atmcontroller.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.asgi import ATMAsgiApplication  # noqa: E402 (needs configured django)
+
+application = ATMAsgiApplication(django_application)
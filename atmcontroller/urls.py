@@ -16,6 +16,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from core import views
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("atm/<str:operation>", views.terminal_api, name="terminal_api"),
+    path("metrics", views.metrics, name="metrics"),
 ]
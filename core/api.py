@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+from core.application.errors import InvalidRequestError
+from core.dto import ValidateCardRes, EndSessionRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+
+# Terminal-facing operations: operation name -> request fields. Each operation maps onto the ATMUseCase /
+# AsyncATMUseCase method of the same name, called with the request fields as keyword arguments.
+OPERATIONS = {
+    "validate_card": ("encrypted_card_info",),
+    "end_session": ("session_id",),
+    "auth": ("pin", "session_id"),
+    "get_balance": ("account_id", "session_id"),
+    "deposit": ("account_id", "session_id", "amount"),
+    "withdraw": ("account_id", "session_id", "amount"),
+}
+
+# operation name -> response type
+RESPONSES = {
+    "validate_card": ValidateCardRes,
+    "end_session": EndSessionRes,
+    "auth": AuthRes,
+    "get_balance": GetBalanceRes,
+    "deposit": DepositRes,
+    "withdraw": WithdrawRes,
+}
+
+
+def parse_request(operation: str, payload: Any) -> Dict[str, Any]:
+    fields = OPERATIONS.get(operation)
+    if fields is None:
+        raise InvalidRequestError(f"unknown operation: {operation}")
+    if not isinstance(payload, dict):
+        raise InvalidRequestError("request must be an object")
+
+    try:
+        kwargs = {f: payload[f] for f in fields}
+    except KeyError as e:
+        raise InvalidRequestError(f"missing field: {e.args[0]}")
+
+    for f, v in kwargs.items():
+        if f == "amount":
+            if type(v) is not int or v <= 0:
+                raise InvalidRequestError("amount must be a positive integer")
+        elif f == "encrypted_card_info":
+            if not isinstance(v, (str, bytes)):  # bytes: MessagePack encoded card data (see core/codec.py)
+                raise InvalidRequestError(f"{f} must be a string or bytes")
+        elif not isinstance(v, str):
+            raise InvalidRequestError(f"{f} must be a string")
+    return kwargs
@@ -0,0 +1,6 @@
+from typing import Any, Dict, Tuple, Type
+
+OPERATIONS: Dict[str, Tuple[str, ...]]
+RESPONSES: Dict[str, Type[Any]]
+
+def parse_request(operation: str, payload: Any) -> Dict[str, Any]: ...
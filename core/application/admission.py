@@ -0,0 +1,68 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Union
+
+from core.clock import Clock, SYSTEM
+
+
+# TokenBucketLimiter allows each key (a card number, a terminal) `burst` requests at once and `rate` requests per second
+# on average. A check is O(1): one dict access and some arithmetic under a lock, the bucket being refilled lazily from
+# the time elapsed since the key's last request (monotonic clock). At most `max_keys` buckets are kept, least recently
+# used first out: a key that is evicted comes back with a full bucket, which is what an idle key would have anyway
+# once `burst / rate` seconds have passed.
+class TokenBucketLimiter(object):
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000, clock: Clock = None) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock or SYSTEM
+        self._buckets: Dict[Hashable, List[float]] = OrderedDict()  # key -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def allow(self, key: Hashable) -> bool:
+        now = self.clock.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [float(self.burst), now]
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+# ConcurrencyLimiter caps how many calls run at once. It never queues: when all `limit` slots are taken, try_acquire
+# fails right away, so the caller can shed the request instead of parking a thread on a slow dependency. Since it never
+# blocks, it also caps coroutines on an event loop (acquire before the first await, release when done).
+class ConcurrencyLimiter(object):
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def try_acquire(self) -> bool:
+        return self._slots.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+# auth_limiters are the limits ATMUseCase.get_instance and AsyncATMUseCase.get_instance put on PIN attempts: per card,
+# 5 at once then 2 a minute; per terminal, 20 at once then 1 a second; and at most 64 attempts waiting on the bank
+def auth_limiters(clock: Clock = None) -> Dict[str, Union[TokenBucketLimiter, ConcurrencyLimiter]]:
+    return dict(
+        card_limiter=TokenBucketLimiter(rate=2 / 60, burst=5, clock=clock),
+        terminal_limiter=TokenBucketLimiter(rate=1, burst=20, clock=clock),
+        bank_limiter=ConcurrencyLimiter(64),
+    )
@@ -0,0 +1,29 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from typing import Dict, Hashable, List, Union
+
+from core.clock import Clock
+
+
+class TokenBucketLimiter(object):
+    rate: float
+    burst: int
+    max_keys: int
+    clock: Clock
+    _buckets: Dict[Hashable, List[float]]
+    _lock: threading.Lock
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000, clock: Clock = None) -> None: ...
+    def __len__(self) -> int: ...
+    def allow(self, key: Hashable) -> bool: ...
+
+
+class ConcurrencyLimiter(object):
+    limit: int
+    _slots: threading.BoundedSemaphore
+    def __init__(self, limit: int) -> None: ...
+    def try_acquire(self) -> bool: ...
+    def release(self) -> None: ...
+
+def auth_limiters(clock: Clock = None) -> Dict[str, Union[TokenBucketLimiter, ConcurrencyLimiter]]: ...
@@ -0,0 +1,190 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import logging
+from typing import Hashable, Optional, List
+
+from core.application.errors import CardValidationError
+from core.application.cash_bin import FakeCashBinUseCase
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter, auth_limiters
+from core.application.use_case import auth_refusal, cash_shortage_message, read_card_data
+from core.clock import Clock, SYSTEM
+from core.domain.entity import Session
+from core.dto import ValidateCardRes, EndSessionRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.repo.async_bank_repo import AsyncFakeBankRepository
+from core.repo.async_session_repo import AsyncInMemorySessionRepository
+from core.util import ChipDecryptor
+
+logger = logging.getLogger(__name__)
+
+
+# AsyncATMUseCase is the asyncio counterpart of ATMUseCase: same operations and responses, but bank and session calls
+# are awaited, so a single event loop can serve many terminals while the bank is slow.
+class AsyncATMUseCase(object):
+    _instance = None
+
+    @classmethod
+    def get_instance(cls):
+        if not cls._instance:
+            cls._instance = cls(**auth_limiters())
+        return cls._instance
+
+    def __init__(self, session_repo=None, bank_repo=None, cash_bin=None, prefetch_balances: bool = False,
+                 clock: Clock = None, card_limiter: TokenBucketLimiter = None,
+                 terminal_limiter: TokenBucketLimiter = None, bank_limiter: ConcurrencyLimiter = None):
+        self.session_repo = session_repo or AsyncInMemorySessionRepository()
+        self.clock = clock or SYSTEM
+        self.chip_decryptor = ChipDecryptor()
+        self.bank_repo = bank_repo or AsyncFakeBankRepository()
+        self.cash_bin = cash_bin or FakeCashBinUseCase()
+        self.bank_calls_saved = 0  # bank round trips avoided on rejection paths (and prefetched balance reads)
+        self.prefetch_balances = prefetch_balances
+        # admission control of PIN attempts, as in ATMUseCase (the bank cap never blocks: safe on the event loop)
+        self.card_limiter = card_limiter
+        self.terminal_limiter = terminal_limiter
+        self.bank_limiter = bank_limiter
+
+    async def validate_card(self, encrypted_card_info: str) -> ValidateCardRes:
+        try:
+            card_data = read_card_data(self.chip_decryptor, encrypted_card_info, today=self.clock.today())
+        except CardValidationError as e:
+            return ValidateCardRes(success=False, message=str(e))
+
+        session_id = await self.session_repo.create(card_data=card_data)
+
+        return ValidateCardRes(success=True, session_id=session_id, message="card is valid")
+
+    async def end_session(self, session_id: str) -> EndSessionRes:
+        if not await self.session_repo.delete(session_id=session_id):
+            return EndSessionRes(success=False, message="session is invalid")
+        return EndSessionRes(success=True, message="session ended")
+
+    # terminal_id identifies the terminal for rate limiting (see ATMUseCase.auth)
+    async def auth(self, pin: str, session_id: str, terminal_id: Optional[Hashable] = None) -> AuthRes:
+        session = await self.session_repo.get_if_valid(session_id=session_id)
+        if not session:
+            return AuthRes(success=False, message="session is invalid")
+
+        refusal = auth_refusal(self.card_limiter, self.terminal_limiter, session.card_data.card_number, terminal_id)
+        if refusal is not None:
+            self.bank_calls_saved += 1
+            return AuthRes(success=False, message=refusal)
+        if self.bank_limiter is None:
+            return await self._auth_at_bank(session, pin)
+        if not self.bank_limiter.try_acquire():
+            self.bank_calls_saved += 1
+            return AuthRes(success=False, message="bank is busy, try again later")
+        try:
+            return await self._auth_at_bank(session, pin)
+        finally:
+            self.bank_limiter.release()
+
+    async def _auth_at_bank(self, session: Session, pin: str) -> AuthRes:
+        auth_key = await self.bank_repo.get_auth_key(card_data=session.card_data, pin=pin)
+        if not auth_key:
+            return AuthRes(success=False, message="invalid pin and auth data")
+
+        session.auth_key = auth_key
+        if not await self.session_repo.save_if_valid(session=session):
+            return AuthRes(success=False, message="session is invalid")
+
+        res = await self.bank_repo.get_accounts(auth_key=auth_key)
+        if res.success and self.prefetch_balances:
+            await self._prefetch_balances(session, res.account_ids)
+        return AuthRes(success=res.success, message=res.message, account_ids=res.account_ids)
+
+    async def _prefetch_balances(self, session: Session, account_ids: List[str]) -> None:
+        results = await asyncio.gather(
+            *[self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key) for account_id in account_ids],
+            return_exceptions=True,
+        )
+        for res in results:
+            if isinstance(res, Exception):
+                logger.warning("balance prefetch failed: %r", res)
+                continue
+            if res.success and res.balance is not None:
+                session.balances[res.account_id] = res.balance
+        await self.session_repo.save(session=session)
+
+    async def get_balance(self, account_id: str, session_id: str) -> GetBalanceRes:
+        session = await self.session_repo.get_if_valid(session_id=session_id)
+        if not session or not session.auth_key:
+            return GetBalanceRes(success=False, account_id=account_id, message="session is invalid")
+
+        if self.prefetch_balances and account_id in session.balances:
+            self.bank_calls_saved += 1
+            return GetBalanceRes(
+                success=True, message="Retrieved account balance", account_id=account_id, balance=session.balances[account_id]
+            )
+
+        res = await self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)
+        await self._cache_balance(session, res)
+        return GetBalanceRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
+
+    async def deposit(self, account_id: str, session_id: str, amount: int) -> DepositRes:
+        session = await self.session_repo.get_if_valid(session_id=session_id)
+        if not session or not session.auth_key:
+            self.bank_calls_saved += 1
+            return DepositRes(success=False, account_id=account_id, message="session is invalid")
+
+        reservation = self.cash_bin.reserve_deposit(amount)
+        if reservation is None:
+            balance = await self._get_cached_balance(session, account_id)
+            return DepositRes(success=False, balance=balance, account_id=account_id, message="not enough capacity in ATM")
+
+        # released if the bank refuses, fails or the request is cancelled while waiting on it
+        try:
+            res = await self.bank_repo.deposit(account_id=account_id, auth_key=session.auth_key, amount=amount)
+        except BaseException:
+            self.cash_bin.release_deposit(reservation)
+            raise
+        if res.success:
+            self.cash_bin.commit_deposit(reservation)
+        else:
+            self.cash_bin.release_deposit(reservation)
+        await self._cache_balance(session, res)
+
+        return DepositRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
+
+    async def withdraw(self, account_id: str, session_id: str, amount: int) -> WithdrawRes:
+        session = await self.session_repo.get_if_valid(session_id=session_id)
+        if not session or not session.auth_key:
+            self.bank_calls_saved += 1
+            return WithdrawRes(success=False, account_id=account_id, message="session is invalid")
+
+        reservation = self.cash_bin.reserve(amount)
+        if reservation is None:
+            message = cash_shortage_message(self.cash_bin, amount)
+            balance = await self._get_cached_balance(session, account_id)
+            return WithdrawRes(success=False, balance=balance, account_id=account_id, message=message)
+
+        # released if the bank refuses, fails or the request is cancelled while waiting on it
+        try:
+            res = await self.bank_repo.withdraw(account_id=account_id, auth_key=session.auth_key, amount=amount)
+        except BaseException:
+            self.cash_bin.release(reservation)
+            raise
+        if res.success:
+            self.cash_bin.commit(reservation)
+        else:
+            self.cash_bin.release(reservation)
+        await self._cache_balance(session, res)
+
+        return WithdrawRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
+
+    async def _get_cached_balance(self, session: Session, account_id: str) -> Optional[int]:
+        balance = session.balances.get(account_id)
+        if balance is not None:
+            self.bank_calls_saved += 1
+            return balance
+
+        res = await self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)
+        await self._cache_balance(session, res)
+        return res.balance
+
+    async def _cache_balance(self, session: Session, res) -> None:
+        if res.balance is None or res.account_id is None:
+            return
+        session.balances[res.account_id] = res.balance
+        await self.session_repo.save(session=session)
@@ -0,0 +1,52 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Hashable, Optional, List, Union
+
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter
+from core.application.cash_bin import AbstactCashBinUseCase
+from core.clock import Clock
+from core.domain.entity import Session
+from core.dto import ValidateCardRes, EndSessionRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.dto import GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.async_bank_repo import AbstractAsyncBankRepository
+from core.repo.async_session_repo import AbstractAsyncSessionRepository
+from core.util import ChipDecryptor
+
+
+class AsyncATMUseCase(object):
+    _instance: Optional[AsyncATMUseCase]
+    chip_decryptor: ChipDecryptor
+    session_repo: AbstractAsyncSessionRepository
+    clock: Clock
+    bank_repo: AbstractAsyncBankRepository
+    cash_bin: AbstactCashBinUseCase
+    bank_calls_saved: int
+    prefetch_balances: bool
+    card_limiter: Optional[TokenBucketLimiter]
+    terminal_limiter: Optional[TokenBucketLimiter]
+    bank_limiter: Optional[ConcurrencyLimiter]
+
+    @classmethod
+    def get_instance(cls) -> AsyncATMUseCase: ...
+    def __init__(
+        self,
+        session_repo: AbstractAsyncSessionRepository = None,
+        bank_repo: AbstractAsyncBankRepository = None,
+        cash_bin: AbstactCashBinUseCase = None,
+        prefetch_balances: bool = False,
+        clock: Clock = None,
+        card_limiter: TokenBucketLimiter = None,
+        terminal_limiter: TokenBucketLimiter = None,
+        bank_limiter: ConcurrencyLimiter = None,
+    ) -> None: ...
+    async def validate_card(self, encrypted_card_info: str) -> ValidateCardRes: ...
+    async def end_session(self, session_id: str) -> EndSessionRes: ...
+    async def auth(self, pin: str, session_id: str, terminal_id: Optional[Hashable] = None) -> AuthRes: ...
+    async def _auth_at_bank(self, session: Session, pin: str) -> AuthRes: ...
+    async def _prefetch_balances(self, session: Session, account_ids: List[str]) -> None: ...
+    async def get_balance(self, account_id: str, session_id: str) -> GetBalanceRes: ...
+    async def deposit(self, account_id: str, session_id: str, amount: int) -> DepositRes: ...
+    async def withdraw(self, account_id: str, session_id: str, amount: int) -> WithdrawRes: ...
+    async def _get_cached_balance(self, session: Session, account_id: str) -> Optional[int]: ...
+    async def _cache_balance(self, session: Session, res: Union[GetBankBalanceRes, BankDepositRes, BankWithdrawRes]) -> None: ...
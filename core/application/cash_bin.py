@@ -0,0 +1,320 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+import math
+import threading
+from functools import reduce
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class AbstactCashBinUseCase(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def get_total(self) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_max_deposit(self) -> int:
+        raise NotImplementedError
+
+
+    @abc.abstractmethod
+    def add(self, amount: int) -> int:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remove(self, amount: int) -> int:
+        raise NotImplementedError
+
+    # can_dispense tells whether the notes in the bin can make up `amount`. A bin that only counts cash can dispense
+    # any amount it holds
+    def can_dispense(self, amount: int) -> bool:
+        return 0 < amount <= self.get_total()
+
+    # Withdrawals take cash in two phases, so that concurrent withdrawals cannot promise the same cash twice while the
+    # bank is deciding: reserve sets `amount` aside (no longer counted by get_total / can_dispense) and returns the
+    # reservation, or None if the bin cannot dispense it; commit pays the reserved cash out once the bank has debited
+    # the account, and release puts it back otherwise. Each is a few counter updates under the bin's lock, which is
+    # never held across the bank call.
+    @abc.abstractmethod
+    def reserve(self, amount: int) -> Optional['CashReservation']:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def commit(self, reservation: 'CashReservation') -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def release(self, reservation: 'CashReservation') -> None:
+        raise NotImplementedError
+
+    # Deposits take capacity the same way: reserve_deposit sets `amount` of the bin's deposit capacity aside (no longer
+    # counted by get_max_deposit) and returns the reservation, or None if it does not fit; commit_deposit stores the cash
+    # once the bank has credited the account, and release_deposit frees the capacity otherwise.
+    @abc.abstractmethod
+    def reserve_deposit(self, amount: int) -> Optional['CashReservation']:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def commit_deposit(self, reservation: 'CashReservation') -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def release_deposit(self, reservation: 'CashReservation') -> None:
+        raise NotImplementedError
+
+
+class CashReservation(object):
+    __slots__ = ("amount", "notes")
+
+    def __init__(self, amount: int, notes: Optional[Tuple[int, ...]] = None) -> None:
+        self.amount = amount
+        self.notes = notes  # note count per denomination, for bins that hold notes
+
+
+# FakeCashBinUseCase only counts cash: _total is the cash in the bin, _reserved the part of it promised to withdrawals
+# still waiting on the bank and _deposit_reserved the capacity held for deposits still waiting on the bank
+class FakeCashBinUseCase(AbstactCashBinUseCase):
+    def __init__(self, init_amount: int = 1000000) -> None:
+        self._total = init_amount
+        self._reserved = 0
+        self._capacity = init_amount * 2
+        self._deposit_reserved = 0
+        self._lock = threading.Lock()
+
+    def get_total(self) -> int:
+        return self._total - self._reserved
+
+    def get_max_deposit(self) -> int:
+        return self._capacity - self._total - self._deposit_reserved
+
+    def add(self, amount: int) -> int:
+        with self._lock:
+            self._total += amount
+            return self._total
+
+    def remove(self, amount: int) -> int:
+        with self._lock:
+            self._total -= amount
+            return self._total
+
+    def reserve(self, amount: int) -> Optional[CashReservation]:
+        with self._lock:
+            if amount <= 0 or amount > self._total - self._reserved:
+                return None
+            self._reserved += amount
+        return CashReservation(amount)
+
+    def commit(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._reserved -= reservation.amount
+            self._total -= reservation.amount
+
+    def release(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._reserved -= reservation.amount
+
+    def reserve_deposit(self, amount: int) -> Optional[CashReservation]:
+        with self._lock:
+            if amount <= 0 or amount > self._capacity - self._total - self._deposit_reserved:
+                return None
+            self._deposit_reserved += amount
+        return CashReservation(amount)
+
+    def commit_deposit(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._deposit_reserved -= reservation.amount
+            self._total += reservation.amount
+
+    def release_deposit(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._deposit_reserved -= reservation.amount
+
+
+# build_dispense_table answers, for every amount an ATM may dispense in one go (up to `max_notes` notes), which mix of
+# notes makes it up with the fewest notes, using at most caps[i] notes of denominations[i]. Amounts are indexed in units
+# of the denominations' greatest common divisor: table[amount // unit] is the note count per denomination (in
+# `denominations` order), or None when the amount cannot be dispensed. Bounded change-making, one denomination at a
+# time: O(len(table) * sum(caps)).
+def build_dispense_table(denominations: Sequence[int], caps: Sequence[int],
+                         max_notes: int) -> List[Optional[Tuple[int, ...]]]:
+    unit = reduce(math.gcd, denominations)
+    units = [d // unit for d in denominations]
+    size = max_notes * max(units) + 1
+    infinity = max_notes + 1
+    notes = [0] + [infinity] * (size - 1)
+    table: List[Optional[Tuple[int, ...]]] = [(0,) * len(units)] + [None] * (size - 1)
+    for i, (u, cap) in enumerate(zip(units, caps)):
+        prev_notes, prev_table = notes, table
+        notes, table = list(prev_notes), list(prev_table)
+        for a in range(u, size):
+            best, choice = notes[a], 0
+            for j in range(1, min(cap, a // u) + 1):
+                n = prev_notes[a - j * u] + j
+                if n < best:
+                    best, choice = n, j
+            if choice:
+                plan = prev_table[a - choice * u]
+                notes[a], table[a] = best, plan[:i] + (choice,) + plan[i + 1:]
+    return [plan if n <= max_notes else None for n, plan in zip(notes, table)]
+
+
+# CassetteCashBinUseCase models the cash an ATM can actually pay out: cassettes of notes, one denomination each
+# (`cassettes`: denomination -> note count), with at most `max_notes` notes per withdrawal. Whether an amount can be
+# dispensed, and with which notes, is a lookup in a table precomputed by build_dispense_table, so can_dispense and
+# get_plan are O(1) per request instead of a change-making search. The table only depends on min(count, max_notes) per
+# cassette: while every cassette holds at least max_notes notes, dispensing and refilling leave it as it is. When a
+# cassette runs low (or is refilled from low), a background thread builds a new table without holding the bin's lock and
+# swaps it in (copy-on-write), one build at a time for the latest counts, so reserve / release stay a few counter
+# updates. Until then the previous table is used, and a plan it gives is only accepted if the cassettes still hold its
+# notes; a reservation the previous table cannot serve waits for the new one. Deposits go to a separate deposit bin of
+# `deposit_capacity` and are not paid out again. A reservation takes its notes out of the cassette counts right away
+# (they are no longer available) and release puts them back.
+class CassetteCashBinUseCase(AbstactCashBinUseCase):
+    def __init__(self, cassettes: Dict[int, int], max_notes: int = 40, deposit_capacity: int = 1000000) -> None:
+        self.denominations = tuple(sorted(cassettes, reverse=True))
+        self.max_notes = max_notes
+        self.unit = reduce(math.gcd, self.denominations)
+        self._counts = [cassettes[d] for d in self.denominations]
+        self._total = sum(d * c for d, c in zip(self.denominations, self._counts))
+        self._deposit_capacity = deposit_capacity
+        self._deposited = 0
+        self._deposit_reserved = 0
+        self._lock = threading.Lock()
+        self._table_swapped = threading.Condition(self._lock)
+        self._caps = self._wanted_caps()
+        self._table = build_dispense_table(self.denominations, self._caps, max_notes)
+        self._builds_started = 0  # background table builds started
+        self._table_build = 0  # the build the current table comes from
+        self._rebuilding = False
+        self.rebuilds = 0  # table rebuilds since construction
+
+    def _wanted_caps(self) -> Tuple[int, ...]:
+        return tuple(min(c, self.max_notes) for c in self._counts)
+
+    # must be called with self._lock held, after every change to the note counts
+    def _refresh(self) -> None:
+        if not self._rebuilding and self._wanted_caps() != self._caps:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, name="cash-bin-table", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        with self._lock:
+            try:
+                while True:
+                    caps = self._wanted_caps()
+                    if caps == self._caps:
+                        break
+                    self._builds_started += 1
+                    build = self._builds_started
+                    self._lock.release()
+                    try:
+                        table = build_dispense_table(self.denominations, caps, self.max_notes)
+                    finally:
+                        self._lock.acquire()
+                    self._table, self._caps, self._table_build = table, caps, build
+                    self.rebuilds += 1
+                    self._table_swapped.notify_all()
+            finally:
+                self._rebuilding = False
+                self._table_swapped.notify_all()
+
+    # wait_for_table blocks until the table matches the note counts, or for at most `timeout` seconds
+    def wait_for_table(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            return self._table_swapped.wait_for(lambda: not self._rebuilding, timeout)
+
+    def _lookup(self, amount: int) -> Optional[Tuple[int, ...]]:
+        table = self._table
+        if amount <= 0 or amount % self.unit:
+            return None
+        i = amount // self.unit
+        plan = table[i] if i < len(table) else None
+        # the table may lag the counts by a rebuild: only a plan the cassettes still hold will do
+        if plan is None or any(n > c for n, c in zip(plan, self._counts)):
+            return None
+        return plan
+
+    def get_total(self) -> int:
+        return self._total
+
+    def get_max_deposit(self) -> int:
+        return self._deposit_capacity - self._deposited - self._deposit_reserved
+
+    def get_counts(self) -> Dict[int, int]:
+        return dict(zip(self.denominations, self._counts))
+
+    def can_dispense(self, amount: int) -> bool:
+        return self._lookup(amount) is not None
+
+    # get_plan returns the notes (denomination -> count) that make up `amount`, or None if it cannot be dispensed
+    def get_plan(self, amount: int) -> Optional[Dict[int, int]]:
+        plan = self._lookup(amount)
+        if plan is None:
+            return None
+        return {d: n for d, n in zip(self.denominations, plan) if n}
+
+    def add(self, amount: int) -> int:
+        with self._lock:
+            self._deposited += amount
+            return self._total
+
+    def remove(self, amount: int) -> int:
+        if self.reserve(amount) is None:
+            raise ValueError(f"cannot dispense {amount} with the notes in the ATM")
+        return self._total
+
+    def reserve(self, amount: int) -> Optional[CashReservation]:
+        with self._lock:
+            plan = self._lookup(amount)
+            if plan is None and self._rebuilding:
+                # the table may be stale: wait (the lock is released meanwhile) for one built from these counts or later
+                build = self._builds_started
+                self._table_swapped.wait_for(lambda: self._table_build > build or not self._rebuilding)
+                plan = self._lookup(amount)
+            if plan is None:
+                return None
+            self._take(plan, -1)
+        return CashReservation(amount, plan)
+
+    # the notes of a committed reservation were already taken out of the cassettes by reserve
+    def commit(self, reservation: CashReservation) -> None:
+        pass
+
+    def release(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._take(reservation.notes, 1)
+
+    def reserve_deposit(self, amount: int) -> Optional[CashReservation]:
+        with self._lock:
+            if amount <= 0 or amount > self._deposit_capacity - self._deposited - self._deposit_reserved:
+                return None
+            self._deposit_reserved += amount
+        return CashReservation(amount)
+
+    def commit_deposit(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._deposit_reserved -= reservation.amount
+            self._deposited += reservation.amount
+
+    def release_deposit(self, reservation: CashReservation) -> None:
+        with self._lock:
+            self._deposit_reserved -= reservation.amount
+
+    # must be called with self._lock held
+    def _take(self, notes: Tuple[int, ...], sign: int) -> None:
+        for i, n in enumerate(notes):
+            self._counts[i] += sign * n
+            self._total += sign * n * self.denominations[i]
+        self._refresh()
+
+    # load refills a cassette with `count` notes of `denomination`
+    def load(self, denomination: int, count: int) -> int:
+        with self._lock:
+            i = self.denominations.index(denomination)
+            self._counts[i] += count
+            self._total += denomination * count
+            self._refresh()
+            return self._total
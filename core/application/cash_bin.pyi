@@ -0,0 +1,101 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class AbstactCashBinUseCase(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def get_total(self) -> int: ...
+    @abc.abstractmethod
+    def get_max_deposit(self) -> int: ...
+    @abc.abstractmethod
+    def add(self, amount: int) -> int: ...
+    @abc.abstractmethod
+    def remove(self, amount: int) -> int: ...
+    def can_dispense(self, amount: int) -> bool: ...
+    @abc.abstractmethod
+    def reserve(self, amount: int) -> Optional[CashReservation]: ...
+    @abc.abstractmethod
+    def commit(self, reservation: CashReservation) -> None: ...
+    @abc.abstractmethod
+    def release(self, reservation: CashReservation) -> None: ...
+    @abc.abstractmethod
+    def reserve_deposit(self, amount: int) -> Optional[CashReservation]: ...
+    @abc.abstractmethod
+    def commit_deposit(self, reservation: CashReservation) -> None: ...
+    @abc.abstractmethod
+    def release_deposit(self, reservation: CashReservation) -> None: ...
+
+
+class CashReservation(object):
+    amount: int
+    notes: Optional[Tuple[int, ...]]
+    def __init__(self, amount: int, notes: Optional[Tuple[int, ...]] = None) -> None: ...
+
+
+class FakeCashBinUseCase(AbstactCashBinUseCase):
+    _total: int
+    _reserved: int
+    _capacity: int
+    _deposit_reserved: int
+    _lock: threading.Lock
+    def __init__(self, init_amount: int = 1000000) -> None: ...
+    def get_total(self) -> int: ...
+    def get_max_deposit(self) -> int: ...
+    def add(self, amount: int) -> int: ...
+    def remove(self, amount: int) -> int: ...
+    def reserve(self, amount: int) -> Optional[CashReservation]: ...
+    def commit(self, reservation: CashReservation) -> None: ...
+    def release(self, reservation: CashReservation) -> None: ...
+    def reserve_deposit(self, amount: int) -> Optional[CashReservation]: ...
+    def commit_deposit(self, reservation: CashReservation) -> None: ...
+    def release_deposit(self, reservation: CashReservation) -> None: ...
+
+
+def build_dispense_table(denominations: Sequence[int], caps: Sequence[int],
+                         max_notes: int) -> List[Optional[Tuple[int, ...]]]: ...
+
+
+class CassetteCashBinUseCase(AbstactCashBinUseCase):
+    denominations: Tuple[int, ...]
+    max_notes: int
+    unit: int
+    rebuilds: int
+    _counts: List[int]
+    _total: int
+    _deposit_capacity: int
+    _deposited: int
+    _deposit_reserved: int
+    _lock: threading.Lock
+    _table_swapped: threading.Condition
+    _caps: Tuple[int, ...]
+    _table: List[Optional[Tuple[int, ...]]]
+    _builds_started: int
+    _table_build: int
+    _rebuilding: bool
+    def __init__(self, cassettes: Dict[int, int], max_notes: int = 40, deposit_capacity: int = 1000000) -> None: ...
+    def _wanted_caps(self) -> Tuple[int, ...]: ...
+    def _refresh(self) -> None: ...
+    def _rebuild(self) -> None: ...
+    def wait_for_table(self, timeout: Optional[float] = None) -> bool: ...
+    def _lookup(self, amount: int) -> Optional[Tuple[int, ...]]: ...
+    def get_total(self) -> int: ...
+    def get_max_deposit(self) -> int: ...
+    def get_counts(self) -> Dict[int, int]: ...
+    def can_dispense(self, amount: int) -> bool: ...
+    def get_plan(self, amount: int) -> Optional[Dict[int, int]]: ...
+    def add(self, amount: int) -> int: ...
+    def remove(self, amount: int) -> int: ...
+    def reserve(self, amount: int) -> Optional[CashReservation]: ...
+    def commit(self, reservation: CashReservation) -> None: ...
+    def release(self, reservation: CashReservation) -> None: ...
+    def reserve_deposit(self, amount: int) -> Optional[CashReservation]: ...
+    def commit_deposit(self, reservation: CashReservation) -> None: ...
+    def release_deposit(self, reservation: CashReservation) -> None: ...
+    def _take(self, notes: Tuple[int, ...], sign: int) -> None: ...
+    def load(self, denomination: int, count: int) -> int: ...
@@ -4,3 +4,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 class CardValidationError(Exception):
     pass
+
+
+class InvalidRequestError(Exception):
+    pass
+
+
+class IdempotencyKeyReusedError(Exception):
+    pass
@@ -0,0 +1,83 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from core.application.errors import IdempotencyKeyReusedError
+from core.clock import Clock, SYSTEM
+
+
+class _Entry(object):
+    __slots__ = ("fingerprint", "future", "expires_at")
+
+    def __init__(self, fingerprint: Hashable) -> None:
+        self.fingerprint = fingerprint
+        self.future = Future()
+        self.expires_at = float("inf")  # in flight: never expires nor is purged by a sweep
+
+
+# IdempotencyCache remembers the result of each keyed request, so that a retried request (same key) gets the first
+# attempt's result back instead of running again. Entries live `ttl` seconds (monotonic clock) after the request
+# completes and at most `max_entries` are kept, least recently used first out.
+# - a lookup is one dict access under a lock; expired entries are purged lazily, from the LRU end, on every new key
+# - a duplicate that arrives while the first request is still running waits for it (coalesced) instead of running
+# - a request that raises is not remembered: its waiters get the exception and the next retry runs again
+# - `fingerprint` identifies the request behind a key; a key reused for a different request raises
+#   IdempotencyKeyReusedError instead of returning the wrong result
+class IdempotencyCache(object):
+    def __init__(self, max_entries: int = 100000, ttl: float = 600, clock: Clock = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock or SYSTEM
+        self.replays = 0  # requests answered from the cache, including coalesced ones
+        self._entries: Dict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def run(self, key: Hashable, fingerprint: Hashable, fn: Callable[[], Any]) -> Any:
+        now = self.clock.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            replay = entry is not None
+            if replay:
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyKeyReusedError(f"idempotency key was already used for another request: {key}")
+                self._entries.move_to_end(key)
+                self.replays += 1
+            else:
+                self._purge(now)
+                entry = self._entries[key] = _Entry(fingerprint)
+
+        if replay:
+            return entry.future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            entry.future.set_exception(e)
+            raise
+        entry.expires_at = self.clock.monotonic() + self.ttl
+        entry.future.set_result(result)
+        return result
+
+    # _purge drops expired entries from the least recently used end, and the least recently used ones beyond
+    # max_entries (a request still in flight keeps running and its waiters still get its result). Must be called with
+    # self._lock held
+    def _purge(self, now: float) -> None:
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if len(entries) < self.max_entries and entry.expires_at > now:
+                break
+            del entries[key]
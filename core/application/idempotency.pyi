@@ -0,0 +1,27 @@
+# -*- coding:utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from core.clock import Clock
+
+
+class _Entry(object):
+    fingerprint: Hashable
+    future: Future
+    expires_at: float
+    def __init__(self, fingerprint: Hashable) -> None: ...
+
+class IdempotencyCache(object):
+    max_entries: int
+    ttl: float
+    clock: Clock
+    replays: int
+    _entries: Dict[Hashable, _Entry]
+    _lock: threading.Lock
+    def __init__(self, max_entries: int = 100000, ttl: float = 600, clock: Clock = None) -> None: ...
+    def __len__(self) -> int: ...
+    def run(self, key: Hashable, fingerprint: Hashable, fn: Callable[[], Any]) -> Any: ...
+    def _purge(self, now: float) -> None: ...
@@ -1,54 +1,133 @@
 # -*- coding:utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import abc
-import datetime
 import logging
-from typing import Optional
-
-from core.application.errors import CardValidationError
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Hashable, Optional, List, Tuple, Union
+
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter, auth_limiters
+from core.application.cash_bin import AbstactCashBinUseCase, FakeCashBinUseCase  # noqa: F401 (re-exported)
+from core.application.errors import CardValidationError, IdempotencyKeyReusedError, InvalidRequestError
+from core.application.idempotency import IdempotencyCache
+from core.clock import Clock, CoarseClock, SYSTEM
 from core.domain.entity import CardData, Session
-from core.dto import ValidateCardRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.dto import ValidateCardRes, EndSessionRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.metrics import instrument
 from core.repo.bank_repo import FakeBankRepository
+from core.repo.metered_bank_repo import MeteredBankRepository
+from core.repo.redis_session_repo import RedisSessionRepository
 from core.repo.session_repo import InMemorySessionRepository
+from core.repo.sqlite_session_repo import SqliteSessionRepository
 from core.util import ChipDecryptor
 
 logger = logging.getLogger(__name__)
 
 
+# check_card_data runs the basic card validation shared by ATMUseCase and AsyncATMUseCase. `today` is the local date as
+# "YYYYMMDD" (see Clock.today)
+def check_card_data(card_data: CardData, today: str) -> None:
+    for field in CardData.__slots__:
+        if not isinstance(getattr(card_data, field), str):
+            raise CardValidationError(f"card data is malformed: {field} must be a string")
+
+    if len(card_data.card_number) != 16:
+        raise CardValidationError("card number must be 16 digits")
+
+    if card_data.expiration_date <= today:
+        raise CardValidationError(f"card is expired: {card_data.expiration_date}")
+
+    if len(card_data.card_verification_code) != 3:
+        raise CardValidationError("card verification code must be 3 digits")
+
+
+# read_card_data decrypts the card data sent by the terminal and checks it (shared by ATMUseCase and AsyncATMUseCase).
+# Card data that cannot be decrypted, or does not hold the expected fields, is rejected like any other invalid card
+# instead of failing the request
+def read_card_data(chip_decryptor: ChipDecryptor, encrypted_card_info: Union[str, bytes], today: str) -> CardData:
+    try:
+        card_data = chip_decryptor.decrypt(encrypted_card_info)
+    except (ValueError, KeyError, TypeError) as e:
+        raise CardValidationError("card data is malformed") from e
+    check_card_data(card_data, today=today)
+    return card_data
+
+
+# auth_refusal tells why a PIN attempt for `card_number` from `terminal_id` is refused by the rate limits (shared by
+# ATMUseCase and AsyncATMUseCase), or returns None if it may go on to the bank. Without a terminal id only the card is
+# limited
+def auth_refusal(card_limiter: Optional[TokenBucketLimiter], terminal_limiter: Optional[TokenBucketLimiter],
+                 card_number: str, terminal_id: Optional[Hashable]) -> Optional[str]:
+    if terminal_id is not None and terminal_limiter is not None and not terminal_limiter.allow(terminal_id):
+        return "too many attempts from this terminal, try again later"
+    if card_limiter is not None and not card_limiter.allow(card_number):
+        return "too many PIN attempts for this card, try again later"
+    return None
+
+
+# cash_shortage_message tells why the cash bin could not reserve `amount` for a withdrawal (shared by ATMUseCase and
+# AsyncATMUseCase)
+def cash_shortage_message(cash_bin: AbstactCashBinUseCase, amount: int) -> str:
+    if amount > cash_bin.get_total():
+        return "not enough cash in ATM"
+    return "amount cannot be dispensed with the notes in ATM"
+
+
 class ATMUseCase(object):
     _instance = None
 
+    # get_instance keeps sessions in process memory, unless ATM_REDIS_URL names a Redis server or ATM_SESSION_DB a SQLite
+    # file shared by all worker processes (required when running more than one worker). The instance and its repos
+    # share one CoarseClock: reading the time costs an attribute load instead of a syscall per call. PIN attempts are
+    # limited to 5 at once then 2 a minute per card, and 20 at once then 1 a second per terminal, with at most 64 of
+    # them at the bank at a time.
     @classmethod
     def get_instance(cls):
         if not cls._instance:
-            cls._instance = cls()
+            clock = CoarseClock()
+            redis_url = os.environ.get("ATM_REDIS_URL")
+            session_db = os.environ.get("ATM_SESSION_DB")
+            if redis_url:
+                session_repo = RedisSessionRepository(url=redis_url, clock=clock)
+            elif session_db:
+                session_repo = SqliteSessionRepository(session_db, clock=clock)
+            else:
+                session_repo = InMemorySessionRepository(clock=clock)
+            cls._instance = cls(session_repo=session_repo, clock=clock, **auth_limiters(clock=clock))
         return cls._instance
 
-    def __init__(self, session_repo=InMemorySessionRepository()):
+    def __init__(self, session_repo=InMemorySessionRepository(), bank_repo=None, prefetch_balances: bool = False,
+                 prefetch_workers: int = 8, clock: Clock = None, idempotency_max_entries: int = 100000,
+                 idempotency_ttl: float = 600, card_limiter: TokenBucketLimiter = None,
+                 terminal_limiter: TokenBucketLimiter = None, bank_limiter: ConcurrencyLimiter = None,
+                 cash_bin: AbstactCashBinUseCase = None):
         self.session_repo = session_repo
+        self.clock = clock or SYSTEM
         self.chip_decryptor = ChipDecryptor()
-        self.bank_repo = FakeBankRepository()  # can substitute with real bank repo (e.g. by environment - test, prod)
-        self.cash_bin = FakeCashBinUseCase()
+        # can substitute with real bank repo (e.g. HttpBankRepository, by environment - test, prod). Every bank call is
+        # metered (see core.metrics)
+        self.bank_repo = MeteredBankRepository(bank_repo or FakeBankRepository(clock=self.clock))
+        self.cash_bin = cash_bin or FakeCashBinUseCase()  # e.g. CassetteCashBinUseCase for a real note mix
+        self.bank_calls_saved = 0  # bank round trips avoided on rejection paths (and prefetched balance reads)
+        # results of deposits / withdrawals sent with an idempotency key, replayed to terminals retrying them
+        self.idempotency = IdempotencyCache(max_entries=idempotency_max_entries, ttl=idempotency_ttl, clock=self.clock)
+        # admission control of PIN attempts (auth), all optional: rate limits per card number and per terminal, and a
+        # cap on the attempts waiting on the bank at once, past which auth is refused instead of tying up a thread
+        self.card_limiter = card_limiter
+        self.terminal_limiter = terminal_limiter
+        self.bank_limiter = bank_limiter
+        # opt-in: fetch every account balance concurrently during auth and serve get_balance from the session
+        self.prefetch_balances = prefetch_balances
+        self._prefetch_executor = ThreadPoolExecutor(
+            max_workers=prefetch_workers, thread_name_prefix="balance-prefetch"
+        ) if prefetch_balances else None
 
     # validate_card handles the "Insert Card" operation. It marks the beginning of the interaction and creates a
     # session for the user.
+    @instrument("atm")
     def validate_card(self, encrypted_card_info: str) -> ValidateCardRes:
-        card_data: CardData = self.chip_decryptor.decrypt(encrypted_card_info)
-
         try:
-            # basic card validation
-            if len(card_data.card_number) != 16:
-                raise CardValidationError("card number must be 16 digits")
-
-            now = datetime.datetime.now()
-            if card_data.expiration_date <= now.strftime("%Y%m%d"):
-                print(now.strftime("%Y%m%d"))
-                print(card_data.expiration_date)
-                raise CardValidationError(f"card is expired: {card_data.expiration_date}")
-
-            if len(card_data.card_verification_code) != 3:
-                raise CardValidationError("card verification code must be 3 digits")
+            card_data = read_card_data(self.chip_decryptor, encrypted_card_info, today=self.clock.today())
         except CardValidationError as e:
             return ValidateCardRes(success=False, message=str(e))
 
@@ -57,105 +136,241 @@ class ATMUseCase(object):
 
         return ValidateCardRes(success=True, session_id=session_id, message="card is valid")
 
+    # end_session handles the "Eject Card" operation. It ends the interaction and frees the session right away instead of
+    # leaving it around until it expires
+    @instrument("atm")
+    def end_session(self, session_id: str) -> EndSessionRes:
+        if not self.session_repo.delete(session_id=session_id):
+            return EndSessionRes(success=False, message="session is invalid")
+        return EndSessionRes(success=True, message="session ended")
+
+    # run_script runs a terminal's "transaction script" (e.g. auth -> get_balance -> withdraw -> end_session) under a
+    # single session lookup and validation, instead of one request and session load per operation. Steps are
+    # (operation, kwargs) pairs, kwargs being the operation's arguments without session_id. Steps run in order and the
+    # script stops at the first step that fails; the results of the steps that ran are returned, the last one being the
+    # failure (if any).
+    @instrument("atm")
+    def run_script(self, session_id: str, steps: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        for operation, _ in steps:
+            if operation not in self.SCRIPT_STEPS:
+                raise InvalidRequestError(f"unknown script operation: {operation}")
+
+        session = self.session_repo.get_if_valid(session_id=session_id)
+        results = []
+        for operation, kwargs in steps:
+            res_type, step = self.SCRIPT_STEPS[operation]
+            if session is None:
+                extra = {"account_id": kwargs["account_id"]} if "account_id" in kwargs else {}
+                res = res_type(success=False, message="session is invalid", **extra)
+            else:
+                res = step(self, session, **kwargs)
+                if operation == "end_session" and res.success:
+                    session = None
+            results.append(res)
+            if not res.success:
+                break
+        return results
+
     # auth is responsible for authentication of "PIN Number" and account. In case of successful authentication with
     # the bank, it updates the session with auth_key AND returns account ids associated with the card for user's use
-    def auth(self, pin: str, session_id: str) -> AuthRes:
+    # the session is checked first, so requests for unknown sessions do not use up the card's or terminal's attempts.
+    # terminal_id identifies the terminal for rate limiting (as sent by the terminal, not its network address, which
+    # terminals behind a proxy or concentrator share); without one only the card is limited
+    @instrument("atm")
+    def auth(self, pin: str, session_id: str, terminal_id: Optional[str] = None) -> AuthRes:
         session = self.session_repo.get_if_valid(session_id=session_id)
         if not session:
             return AuthRes(success=False, message="session is invalid")
+        return self._auth(session, pin, terminal_id)
+
+    # _auth, _get_balance, _deposit, _withdraw and _end_session run an operation on a session that was already loaded
+    # and validated, either by the public method of the same name or once for a whole script (run_script)
+    def _auth(self, session: Session, pin: str, terminal_id: Optional[str] = None) -> AuthRes:
+        refusal = auth_refusal(self.card_limiter, self.terminal_limiter, session.card_data.card_number, terminal_id)
+        if refusal is not None:
+            self.bank_calls_saved += 1
+            return AuthRes(success=False, message=refusal)
+        if self.bank_limiter is None:
+            return self._auth_at_bank(session, pin)
+        if not self.bank_limiter.try_acquire():
+            self.bank_calls_saved += 1
+            return AuthRes(success=False, message="bank is busy, try again later")
+        try:
+            return self._auth_at_bank(session, pin)
+        finally:
+            self.bank_limiter.release()
 
+    def _auth_at_bank(self, session: Session, pin: str) -> AuthRes:
         auth_key = self.bank_repo.get_auth_key(card_data=session.card_data, pin=pin)
         if not auth_key:
             return AuthRes(success=False, message="invalid pin and auth data")
 
-        # update session with auth_key info
+        # update session with auth_key info, unless it expired or ended while the bank was checking the PIN
         session.auth_key = auth_key
-        self.session_repo.save(session=session)
+        if not self.session_repo.save_if_valid(session=session):
+            return AuthRes(success=False, message="session is invalid")
 
         res = self.bank_repo.get_accounts(auth_key=auth_key)
+        if res.success and self.prefetch_balances:
+            self._prefetch_balances(session, res.account_ids)
         return AuthRes(success=res.success, message=res.message, account_ids=res.account_ids)
 
+    # _prefetch_balances fans the balance lookups of all accounts out to the prefetch pool, so the customer pays for
+    # one bank round trip instead of one per account. A failed lookup is simply not cached.
+    def _prefetch_balances(self, session: Session, account_ids: List[str]) -> None:
+        futures = [
+            self._prefetch_executor.submit(self.bank_repo.get_balance, account_id=account_id, auth_key=session.auth_key)
+            for account_id in account_ids
+        ]
+        for future in futures:
+            try:
+                res = future.result()
+            except Exception:
+                logger.warning("balance prefetch failed", exc_info=True)
+                continue
+            if res.success and res.balance is not None:
+                session.balances[res.account_id] = res.balance
+        self.session_repo.save(session=session)
+
     # get_balance handles the "Select Account" and "See Balance" operation
+    @instrument("atm")
     def get_balance(self, account_id: str, session_id: str) -> GetBalanceRes:
         session = self.session_repo.get_if_valid(session_id=session_id)
-        if not session or not session.auth_key:
+        if not session:
             return GetBalanceRes(success=False, account_id=account_id, message="session is invalid")
+        return self._get_balance(session, account_id)
 
-        res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)
-        return GetBalanceRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
+    def _get_balance(self, session: Session, account_id: str) -> GetBalanceRes:
+        if not session.auth_key:
+            return GetBalanceRes(success=False, account_id=account_id, message="session is invalid")
 
-    def deposit(self, account_id: str, session_id: str, amount: int) -> DepositRes:
-        session = self.session_repo.get_if_valid(session_id=session_id)
-        if not session or not session.auth_key:  # TODO: move session validation to middleware (decorator pattern)
-            res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key if session else "")
-            return DepositRes(success=False, balance=res.balance, account_id=account_id, message="session is invalid")
+        if self.prefetch_balances and account_id in session.balances:
+            self.bank_calls_saved += 1
+            return GetBalanceRes(
+                success=True, message="Retrieved account balance", account_id=account_id, balance=session.balances[account_id]
+            )
 
-        if amount > self.cash_bin.get_max_deposit():
-            res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)  # TODO: reduce redundancy
-            return DepositRes(success=False, balance=res.balance, account_id=account_id, message="not enough capacity in ATM")
+        res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)
+        self._cache_balance(session, res)
+        return GetBalanceRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
 
-        res = self.bank_repo.deposit(account_id=account_id, auth_key=session.auth_key, amount=amount)
+    # deposit and withdraw take an optional idempotency key, chosen by the terminal per transaction and sent again when
+    # it retries (e.g. after a timeout): the transaction runs once per (session, key) and retries get its result back
+    # without reaching the bank or the cash bin, including retries that arrive while it is still running
+    @instrument("atm")
+    def deposit(self, account_id: str, session_id: str, amount: int, idempotency_key: Optional[str] = None) -> DepositRes:
+        def run() -> DepositRes:
+            session = self.session_repo.get_if_valid(session_id=session_id)
+            if not session:  # TODO: move session validation to middleware (decorator pattern)
+                self.bank_calls_saved += 1  # without a valid session the bank would reject the balance lookup anyway
+                return DepositRes(success=False, account_id=account_id, message="session is invalid")
+            return self._deposit(session, account_id, amount)
+
+        if idempotency_key is None:
+            return run()
+        try:
+            return self.idempotency.run((session_id, idempotency_key), ("deposit", account_id, amount), run)
+        except IdempotencyKeyReusedError:
+            return DepositRes(success=False, account_id=account_id, message="idempotency key was used for another request")
+
+    def _deposit(self, session: Session, account_id: str, amount: int) -> DepositRes:
+        if not session.auth_key:
+            self.bank_calls_saved += 1
+            return DepositRes(success=False, account_id=account_id, message="session is invalid")
+
+        # like withdrawals, the bin's capacity is set aside before the bank is asked, so concurrent deposits cannot
+        # overfill it, then taken if the bank credits the account and freed otherwise
+        reservation = self.cash_bin.reserve_deposit(amount)
+        if reservation is None:
+            balance = self._get_cached_balance(session, account_id)
+            return DepositRes(success=False, balance=balance, account_id=account_id, message="not enough capacity in ATM")
 
+        try:
+            res = self.bank_repo.deposit(account_id=account_id, auth_key=session.auth_key, amount=amount)
+        except BaseException:
+            self.cash_bin.release_deposit(reservation)
+            raise
         if res.success:
-            self.cash_bin.add(amount=amount)
+            self.cash_bin.commit_deposit(reservation)
+        else:
+            self.cash_bin.release_deposit(reservation)
+        self._cache_balance(session, res)
 
         return DepositRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
 
-    def withdraw(self, account_id: str, session_id: str, amount: int) -> WithdrawRes:
-        session = self.session_repo.get_if_valid(session_id=session_id)
-        if not session or not session.auth_key:
-            res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key if session else "")
-            return WithdrawRes(success=False, balance=res.balance, account_id=account_id, message="session is invalid")
-
-        if amount > self.cash_bin.get_total():
-            res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)  # todo: reduce redundancy
-            return WithdrawRes(success=False, balance=res.balance, account_id=account_id, message="not enough cash in ATM")
+    @instrument("atm")
+    def withdraw(self, account_id: str, session_id: str, amount: int,
+                 idempotency_key: Optional[str] = None) -> WithdrawRes:
+        def run() -> WithdrawRes:
+            session = self.session_repo.get_if_valid(session_id=session_id)
+            if not session:
+                self.bank_calls_saved += 1
+                return WithdrawRes(success=False, account_id=account_id, message="session is invalid")
+            return self._withdraw(session, account_id, amount)
+
+        if idempotency_key is None:
+            return run()
+        try:
+            return self.idempotency.run((session_id, idempotency_key), ("withdraw", account_id, amount), run)
+        except IdempotencyKeyReusedError:
+            return WithdrawRes(success=False, account_id=account_id, message="idempotency key was used for another request")
+
+    def _withdraw(self, session: Session, account_id: str, amount: int) -> WithdrawRes:
+        if not session.auth_key:
+            self.bank_calls_saved += 1
+            return WithdrawRes(success=False, account_id=account_id, message="session is invalid")
+
+        # the cash is set aside before the bank is asked, so concurrent withdrawals cannot be promised the same notes,
+        # then paid out if the bank debits the account and put back otherwise (including when the bank call fails)
+        reservation = self.cash_bin.reserve(amount)
+        if reservation is None:
+            message = cash_shortage_message(self.cash_bin, amount)
+            balance = self._get_cached_balance(session, account_id)
+            return WithdrawRes(success=False, balance=balance, account_id=account_id, message=message)
 
-        res = self.bank_repo.withdraw(account_id=account_id, auth_key=session.auth_key, amount=amount)
+        try:
+            res = self.bank_repo.withdraw(account_id=account_id, auth_key=session.auth_key, amount=amount)
+        except BaseException:
+            self.cash_bin.release(reservation)
+            raise
         if res.success:
-            self.cash_bin.remove(amount=amount)
+            self.cash_bin.commit(reservation)
+        else:
+            self.cash_bin.release(reservation)
+        self._cache_balance(session, res)
 
         return WithdrawRes(success=res.success, message=res.message, account_id=res.account_id, balance=res.balance)
 
+    def _end_session(self, session: Session) -> EndSessionRes:
+        if not self.session_repo.delete(session_id=session.session_id):
+            return EndSessionRes(success=False, message="session is invalid")
+        return EndSessionRes(success=True, message="session ended")
 
+    # _get_cached_balance answers rejected requests with the balance last seen in this session, and only asks the bank
+    # when the session has not seen the account yet
+    def _get_cached_balance(self, session: Session, account_id: str) -> Optional[int]:
+        balance = session.balances.get(account_id)
+        if balance is not None:
+            self.bank_calls_saved += 1
+            return balance
 
-# TODO: move to different file
-class AbstactCashBinUseCase(object):
-    __metaclass__ = abc.ABCMeta
-
-    @abc.abstractmethod
-    def get_total(self) -> int:
-        raise NotImplementedError
-
-    @abc.abstractmethod
-    def get_max_deposit(self) -> int:
-        raise NotImplementedError
-
-
-    @abc.abstractmethod
-    def add(self, amount: int) -> int:
-        raise NotImplementedError
-
-    @abc.abstractmethod
-    def remove(self, amount: int) -> int:
-        raise NotImplementedError
-
-
-class FakeCashBinUseCase(AbstactCashBinUseCase):
-    def __init__(self, init_amount: int = 1000000) -> None:
-        self._total = init_amount
-        self._capacity = init_amount * 2
-
-    def get_total(self) -> int:
-        return self._total
-
-    def get_max_deposit(self) -> int:
-        return self._capacity - self._total
-
-    def add(self, amount: int) -> int:
-        self._total += amount
-        return self._total
+        res = self.bank_repo.get_balance(account_id=account_id, auth_key=session.auth_key)
+        self._cache_balance(session, res)
+        return res.balance
+
+    # _cache_balance writes through every balance the bank reports, so the cache is never older than the session's own
+    # last deposit / withdrawal
+    def _cache_balance(self, session: Session, res) -> None:
+        if res.balance is None or res.account_id is None:
+            return
+        session.balances[res.account_id] = res.balance
+        self.session_repo.save(session=session)
 
-    def remove(self, amount: int) -> int:
-        self._total -= amount
-        return self._total
+    # operations a script (run_script) can run: operation -> (response type, step on the loaded session)
+    SCRIPT_STEPS = {
+        "auth": (AuthRes, _auth),
+        "get_balance": (GetBalanceRes, _get_balance),
+        "deposit": (DepositRes, _deposit),
+        "withdraw": (WithdrawRes, _withdraw),
+        "end_session": (EndSessionRes, _end_session),
+    }
@@ -1,52 +1,75 @@
 # -*- coding:utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import abc
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Hashable, Optional, Dict, List, Tuple, Union
 
-from core.domain.entity import Session
-from core.dto import ValidateCardRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter
+from core.application.cash_bin import AbstactCashBinUseCase, FakeCashBinUseCase
+from core.application.idempotency import IdempotencyCache
+from core.clock import Clock
+from core.domain.entity import CardData, Session
+from core.dto import ValidateCardRes, EndSessionRes, AuthRes, GetBalanceRes, DepositRes, WithdrawRes
+from core.dto import GetBankBalanceRes, BankDepositRes, BankWithdrawRes
 from core.repo.bank_repo import AbstractBankRepository
+from core.repo.metered_bank_repo import MeteredBankRepository
 from core.repo.session_repo import AbstractSessionRepository
 from core.util import ChipDecryptor
 
 
+def check_card_data(card_data: CardData, today: str) -> None: ...
+def read_card_data(chip_decryptor: ChipDecryptor, encrypted_card_info: Union[str, bytes], today: str) -> CardData: ...
+def auth_refusal(card_limiter: Optional[TokenBucketLimiter], terminal_limiter: Optional[TokenBucketLimiter],
+                 card_number: str, terminal_id: Optional[Hashable]) -> Optional[str]: ...
+def cash_shortage_message(cash_bin: AbstactCashBinUseCase, amount: int) -> str: ...
+
+
 class ATMUseCase(object):
     _instance: Optional[ATMUseCase]
     chip_decryptor: ChipDecryptor
     session_repo: AbstractSessionRepository
-    bank_repo: AbstractBankRepository
+    clock: Clock
+    bank_repo: MeteredBankRepository
     cash_bin: AbstactCashBinUseCase
+    bank_calls_saved: int
+    idempotency: IdempotencyCache
+    card_limiter: Optional[TokenBucketLimiter]
+    terminal_limiter: Optional[TokenBucketLimiter]
+    bank_limiter: Optional[ConcurrencyLimiter]
+    prefetch_balances: bool
+    _prefetch_executor: Optional[ThreadPoolExecutor]
+    SCRIPT_STEPS: Dict[str, Tuple[type, Any]]
     # builder: Builder
 
     @classmethod
     def get_instance(cls) -> ATMUseCase: ...
-    def __init__(self) -> None: ...
+    def __init__(
+        self,
+        session_repo: AbstractSessionRepository = ...,
+        bank_repo: AbstractBankRepository = None,
+        prefetch_balances: bool = False,
+        prefetch_workers: int = 8,
+        clock: Clock = None,
+        idempotency_max_entries: int = 100000,
+        idempotency_ttl: float = 600,
+        card_limiter: TokenBucketLimiter = None,
+        terminal_limiter: TokenBucketLimiter = None,
+        bank_limiter: ConcurrencyLimiter = None,
+        cash_bin: AbstactCashBinUseCase = None,
+    ) -> None: ...
     def validate_card(self, encrypted_card_info: str) -> ValidateCardRes: ...
-    def auth(self, pin: str, session_id: str) -> AuthRes: ...
+    def end_session(self, session_id: str) -> EndSessionRes: ...
+    def run_script(self, session_id: str, steps: List[Tuple[str, Dict[str, Any]]]) -> List[Any]: ...
+    def auth(self, pin: str, session_id: str, terminal_id: Optional[str] = None) -> AuthRes: ...
+    def _auth(self, session: Session, pin: str, terminal_id: Optional[str] = None) -> AuthRes: ...
+    def _auth_at_bank(self, session: Session, pin: str) -> AuthRes: ...
+    def _prefetch_balances(self, session: Session, account_ids: List[str]) -> None: ...
     def get_balance(self, account_id: str, session_id: str) -> GetBalanceRes: ...
-    def deposit(self, account_id: str, session_id: str, amount: int) -> DepositRes: ...
-    def withdraw(self, account_id: str, session_id: str, amount: int) -> WithdrawRes: ...
-
-
-# TODO: move to different file
-class AbstactCashBinUseCase(object):
-    __metaclass__ = abc.ABCMeta
-
-    @abc.abstractmethod
-    def get_total(self) -> int: ...
-    @abc.abstractmethod
-    def get_max_deposit(self) -> int: ...
-    @abc.abstractmethod
-    def add(self, amount: int) -> int: ...
-    @abc.abstractmethod
-    def remove(self, amount: int) -> int: ...
-
-class FakeCashBinUseCase(AbstactCashBinUseCase):
-    _total: int
-    _capacity: int
-    def __init__(self, init_amount: int = 1000000) -> None: ...
-    def get_total(self) -> int: ...
-    def get_max_deposit(self) -> int: ...
-    def add(self, amount: int) -> int: ...
-    def remove(self, amount: int) -> int: ...
\ No newline at end of file
+    def _get_balance(self, session: Session, account_id: str) -> GetBalanceRes: ...
+    def deposit(self, account_id: str, session_id: str, amount: int, idempotency_key: Optional[str] = None) -> DepositRes: ...
+    def _deposit(self, session: Session, account_id: str, amount: int) -> DepositRes: ...
+    def withdraw(self, account_id: str, session_id: str, amount: int, idempotency_key: Optional[str] = None) -> WithdrawRes: ...
+    def _withdraw(self, session: Session, account_id: str, amount: int) -> WithdrawRes: ...
+    def _end_session(self, session: Session) -> EndSessionRes: ...
+    def _get_cached_balance(self, session: Session, account_id: str) -> Optional[int]: ...
+    def _cache_balance(self, session: Session, res: Union[GetBankBalanceRes, BankDepositRes, BankWithdrawRes]) -> None: ...
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+# WAL lets readers proceed concurrently with a writer, and synchronous=NORMAL is durable enough in WAL mode while
+# saving an fsync per commit
+def enable_sqlite_wal(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
 
 
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        connection_created.connect(enable_sqlite_wal, dispatch_uid="core.enable_sqlite_wal")
@@ -0,0 +1,67 @@
+from core.api import OPERATIONS, parse_request
+from core.application.async_use_case import AsyncATMUseCase
+from core.application.errors import InvalidRequestError
+from core.codec import JSON, get_codec
+
+
+# ATMAsgiApplication serves terminal requests (POST <prefix><operation> with a JSON or MessagePack body, see
+# core/codec.py) straight from the event loop with AsyncATMUseCase. Every other request is passed on to the wrapped
+# (Django) ASGI application.
+class ATMAsgiApplication(object):
+    def __init__(self, fallback_app, use_case: AsyncATMUseCase = None, prefix: str = "/atm/"):
+        self.fallback_app = fallback_app
+        self.use_case = use_case
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            return await self.fallback_app(scope, receive, send)
+
+        operation = scope["path"][len(self.prefix):].strip("/")
+        content_type = self._header(scope, b"content-type")
+        codec = get_codec(content_type) or get_codec(JSON)
+        if operation not in OPERATIONS:
+            return await self._send(send, 404, codec.encode_error(f"unknown operation: {operation}"), codec.content_type)
+        if scope["method"] != "POST":
+            return await self._send(send, 405, codec.encode_error("method not allowed"), codec.content_type)
+        if get_codec(content_type) is None:
+            return await self._send(
+                send, 415, codec.encode_error(f"unsupported content type: {content_type}"), codec.content_type
+            )
+
+        body = await self._read_body(receive)
+        try:
+            kwargs = parse_request(operation, codec.decode_request(operation, body))
+        except InvalidRequestError as e:
+            return await self._send(send, 400, codec.encode_error(str(e)), codec.content_type)
+
+        if operation == "auth":  # PIN attempts are rate limited per terminal, as identified by the terminal itself
+            kwargs["terminal_id"] = self._header(scope, b"x-terminal-id") or None
+        use_case = self.use_case or AsyncATMUseCase.get_instance()
+        res = await getattr(use_case, operation)(**kwargs)
+        return await self._send(send, 200, codec.encode_response(res), codec.content_type)
+
+    @staticmethod
+    def _header(scope, header: bytes) -> str:
+        for name, value in scope.get("headers", ()):
+            if name == header:
+                return value.decode("latin-1")
+        return ""
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                return body
+
+    @staticmethod
+    async def _send(send, status: int, body: bytes, content_type: str) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,18 @@
+from typing import Any, Dict
+
+from core.application.async_use_case import AsyncATMUseCase
+
+
+class ATMAsgiApplication(object):
+    fallback_app: Any
+    use_case: AsyncATMUseCase
+    prefix: str
+
+    def __init__(self, fallback_app: Any, use_case: AsyncATMUseCase = None, prefix: str = "/atm/") -> None: ...
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None: ...
+    @staticmethod
+    def _header(scope: Dict[str, Any], header: bytes) -> str: ...
+    @staticmethod
+    async def _read_body(receive: Any) -> bytes: ...
+    @staticmethod
+    async def _send(send: Any, status: int, body: bytes, content_type: str) -> None: ...
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Micro-benchmark for FakeBankRepository account lookups. Lookup cost should stay flat as the number of accounts
+# linked to a card grows.
+#
+#     $ python -m core.benchmarks.bench_bank_repo
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import timeit
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+
+ACCOUNTS_PER_CARD = [1, 10, 100, 1000, 10000]
+NUMBER = 20000
+
+
+def _setup(n_accounts: int):
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    repo = FakeBankRepository()
+    repo.auth_store[card_data.card_number] = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    for i in range(n_accounts):
+        repo.add_account(Account(account_id=f"acc-{i}", card_number=card_data.card_number, balance=1000))
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    return repo, auth_key
+
+
+def main() -> None:
+    print(f"{'accounts/card':>14} {'get_balance (ns)':>18} {'deposit (ns)':>14} {'withdraw (ns)':>15}")
+    for n in ACCOUNTS_PER_CARD:
+        repo, auth_key = _setup(n)
+        last = f"acc-{n - 1}"  # worst case for a linear scan
+        results = []
+        for stmt in [
+            lambda: repo.get_balance(auth_key=auth_key, account_id=last),
+            lambda: repo.deposit(auth_key=auth_key, account_id=last, amount=1),
+            lambda: repo.withdraw(auth_key=auth_key, account_id=last, amount=1),
+        ]:
+            best = min(timeit.repeat(stmt, number=NUMBER, repeat=5))
+            results.append(best / NUMBER * 1e9)
+        print(f"{n:>14} {results[0]:>18.0f} {results[1]:>14.0f} {results[2]:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# "Can the ATM dispense this amount?" for a few cassette configurations: a lookup in CassetteCashBinUseCase's
+# precomputed table vs a change-making search per request (reproduced below), what a table rebuild costs (paid only
+# when a cassette runs low or is refilled from low, in the background), and a reservation (reserve + release), which
+# does not wait for rebuilds.
+#
+#     $ python -m core.benchmarks.bench_cash_bin
+#     $ python -m core.benchmarks.bench_cash_bin --n 2000
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import math
+import random
+import time
+from functools import reduce
+from typing import Optional, Sequence
+
+from core.application.cash_bin import CassetteCashBinUseCase, build_dispense_table
+from core.benchmarks.harness import measure, print_results
+
+CONFIGS = [
+    ("EUR 4 cassettes", {100: 1000, 50: 2000, 20: 2500, 10: 2500}, 40),
+    ("USD 3 cassettes", {100: 1500, 20: 2500, 5: 1000}, 40),
+    ("KRW 4 cassettes", {50000: 2000, 10000: 2000, 5000: 1000, 1000: 2000}, 50),
+    ("EUR running low", {100: 4, 50: 3, 20: 7, 10: 1}, 40),
+]
+
+
+# _search answers one request with a bounded change-making search over the amount (fewest notes, at most max_notes), in
+# units of the denominations' greatest common divisor, as a bin without a precomputed table would have to
+def _search(amount: int, denominations: Sequence[int], counts: Sequence[int], max_notes: int) -> Optional[int]:
+    unit = reduce(math.gcd, denominations)
+    if amount % unit:
+        return None
+    amount //= unit
+    infinity = max_notes + 1
+    notes = [0] + [infinity] * amount
+    for d, count in zip(denominations, counts):
+        d //= unit
+        prev = notes
+        notes = list(prev)
+        for a in range(d, amount + 1):
+            for j in range(1, min(count, a // d, max_notes) + 1):
+                n = prev[a - j * d] + j
+                if n < notes[a]:
+                    notes[a] = n
+    return None if notes[amount] > max_notes else notes[amount]
+
+
+def _reserve_release(cash_bin: CassetteCashBinUseCase, amount: int) -> None:
+    reservation = cash_bin.reserve(amount)
+    if reservation is not None:
+        cash_bin.release(reservation)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cash bin dispensability benchmark")
+    parser.add_argument("--n", type=int, default=200, help="requests per configuration for the per-request search")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for name, cassettes, max_notes in CONFIGS:
+        cash_bin = CassetteCashBinUseCase(cassettes, max_notes=max_notes)
+        denominations = cash_bin.denominations
+        counts = [cassettes[d] for d in denominations]
+        # withdrawal amounts in steps of the smallest denomination, up to the largest that fits in max_notes notes
+        step, top = min(denominations), max_notes * max(denominations)
+        amounts = [rng.randrange(step, top + 1, step) for _ in range(args.n)]
+        feasible = sum(cash_bin.can_dispense(a) for a in amounts)
+
+        caps = [min(c, max_notes) for c in counts]
+        start = time.perf_counter()
+        build_dispense_table(denominations, caps, max_notes)
+        rebuild_ms = (time.perf_counter() - start) * 1e3
+
+        print(f"{name}: {dict(zip(denominations, counts))}, max {max_notes} notes, table of {len(cash_bin._table)} "
+              f"amounts rebuilt in {rebuild_ms:.1f} ms, {feasible}/{args.n} requested amounts dispensable")
+        lookups = amounts * (100000 // args.n)
+        dispensable = [a for a in lookups if cash_bin.can_dispense(a)]
+        print_results([
+            measure("can_dispense (table)", lambda i: cash_bin.can_dispense(lookups[i]), len(lookups)),
+            measure("get_plan (table)", lambda i: cash_bin.get_plan(lookups[i]), len(lookups)),
+            measure("reserve + release", lambda i: _reserve_release(cash_bin, dispensable[i]), len(dispensable)),
+            measure("search per request", lambda i: _search(amounts[i], denominations, counts, max_notes), args.n),
+        ])
+        cash_bin.wait_for_table()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Cost of reading the time: SystemClock (a syscall, plus strftime for today) vs CoarseClock (cached by a ticker
+# thread), per read and through ATMUseCase.validate_card, which checks the card's expiration date against today.
+#
+#     $ python -m core.benchmarks.bench_clock
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+
+from core.benchmarks.harness import measure, print_results
+from core.application.use_case import ATMUseCase
+from core.clock import SystemClock, CoarseClock
+from core.domain.entity import CardData
+from core.repo.session_repo import InMemorySessionRepository
+
+N = 200000
+
+
+def main() -> None:
+    encrypted_card_info = json.dumps(CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    ).to_dict())
+
+    results = []
+    for name, clock in [("system", SystemClock()), ("coarse", CoarseClock())]:
+        uc = ATMUseCase(session_repo=InMemorySessionRepository(max_sessions=1000, clock=clock), clock=clock)
+        results += [
+            measure(f"monotonic ({name})", lambda i: clock.monotonic(), N, warmup=1000),
+            measure(f"today ({name})", lambda i: clock.today(), N, warmup=1000),
+            measure(f"validate_card ({name})", lambda i: uc.validate_card(encrypted_card_info), N // 10, warmup=1000),
+        ]
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
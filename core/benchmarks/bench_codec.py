@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Compares the JSON and MessagePack terminal encodings (core/codec.py): bytes on the wire per request / response, and
+# the server-side cost of decoding a request (including the card data in validate_card) and encoding its response.
+#
+#     $ python -m core.benchmarks.bench_codec
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import uuid
+
+from core.api import parse_request
+from core.benchmarks.harness import measure, print_results
+from core.codec import JsonCodec, MsgpackCodec, pack_card_data
+from core.domain.entity import CardData
+from core.dto import ValidateCardRes, AuthRes, GetBalanceRes, WithdrawRes
+from core.util import ChipDecryptor
+
+N = 50000
+
+
+def main() -> None:
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="101"
+    )
+    session_id = str(uuid.uuid4())
+    # (operation, JSON request, MessagePack request, response)
+    traffic = [
+        ("validate_card", dict(encrypted_card_info=json.dumps(card_data.to_dict())),
+         dict(encrypted_card_info=pack_card_data(card_data)),
+         ValidateCardRes(success=True, session_id=session_id, message="card is valid")),
+        ("auth", dict(pin="0000", session_id=session_id), None,
+         AuthRes(success=True, message="Retrieved accounts", account_ids=["1234567890123456-0", "1234567890123456-1"])),
+        ("get_balance", dict(account_id="1234567890123456-0", session_id=session_id), None,
+         GetBalanceRes(success=True, balance=123456, account_id="1234567890123456-0", message="Retrieved account balance")),
+        ("withdraw", dict(account_id="1234567890123456-0", session_id=session_id, amount=200), None,
+         WithdrawRes(success=True, balance=123256, account_id="1234567890123456-0", message="Withdraw successful")),
+    ]
+    decryptor = ChipDecryptor()
+    codecs = [("json", JsonCodec()), ("msgpack", MsgpackCodec())]
+
+    print(f"{'operation':<14} {'codec':<8} {'request (B)':>12} {'response (B)':>13}")
+    results = []
+    for operation, json_request, msgpack_request, res in traffic:
+        for name, codec in codecs:
+            kwargs = msgpack_request if name == "msgpack" and msgpack_request else json_request
+            body = codec.encode_request(operation, kwargs)
+            print(f"{operation:<14} {name:<8} {len(body):>12} {len(codec.encode_response(res)):>13}")
+
+            def handle(i: int, operation=operation, codec=codec, body=body, res=res) -> bytes:
+                request = parse_request(operation, codec.decode_request(operation, body))
+                if operation == "validate_card":
+                    decryptor.decrypt(request["encrypted_card_info"])
+                return codec.encode_response(res)
+
+            results.append(measure(f"{operation} ({name})", handle, N, warmup=N // 10))
+    print()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
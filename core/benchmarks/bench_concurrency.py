@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Reports FakeBankRepository deposit/withdraw throughput from 1 to N threads. Each thread works on its own accounts,
+# so with per-account lock striping threads never wait on each other's locks (the GIL still caps pure-python scaling).
+#
+#     $ python -m core.benchmarks.bench_concurrency
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+
+THREADS = [1, 2, 4, 8, 16]
+OPS_PER_THREAD = 20000
+ACCOUNTS_PER_THREAD = 8
+
+
+def _run(n_threads: int) -> float:
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    repo = FakeBankRepository()
+    repo.auth_store[card_data.card_number] = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    for i in range(n_threads * ACCOUNTS_PER_THREAD):
+        repo.add_account(Account(account_id=f"acc-{i}", card_number=card_data.card_number, balance=1000))
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    def worker(t: int) -> None:
+        account_ids = [f"acc-{t * ACCOUNTS_PER_THREAD + i}" for i in range(ACCOUNTS_PER_THREAD)]
+        for i in range(OPS_PER_THREAD // 2):
+            account_id = account_ids[i % ACCOUNTS_PER_THREAD]
+            repo.deposit(auth_key=auth_key, account_id=account_id, amount=10)
+            repo.withdraw(auth_key=auth_key, account_id=account_id, amount=10)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return n_threads * OPS_PER_THREAD / (time.perf_counter() - start)
+
+
+def main() -> None:
+    print(f"{'threads':>8} {'ops/sec':>12} {'scaling':>8}")
+    base = None
+    for n_threads in THREADS:
+        ops = _run(n_threads)
+        base = base or ops
+        print(f"{n_threads:>8} {ops:>12.0f} {ops / base:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
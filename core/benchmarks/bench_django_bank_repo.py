@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# Compares ops/sec of the sqlite-backed DjangoBankRepository (WAL mode) against the in-memory FakeBankRepository.
+# Runs against a throw-away database file, never against db.sqlite3.
+#
+#     $ python -m core.benchmarks.bench_django_bank_repo
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import tempfile
+import time
+
+N_OPS = 2000
+N_ACCOUNTS = 1000
+
+
+def _setup_django(db_path: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "atmcontroller.settings")
+    from django.conf import settings
+    settings.DATABASES["default"]["NAME"] = db_path
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", "core", verbosity=0)
+
+
+def _ops_per_sec(fn, n: int = N_OPS) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - start)
+
+
+def _run(name: str, repo, card_data) -> None:
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    results = [
+        _ops_per_sec(lambda i: repo.get_balance(auth_key=auth_key, account_id=f"acc-{i % N_ACCOUNTS}")),
+        _ops_per_sec(lambda i: repo.deposit(auth_key=auth_key, account_id=f"acc-{i % N_ACCOUNTS}", amount=10)),
+        _ops_per_sec(lambda i: repo.withdraw(auth_key=auth_key, account_id=f"acc-{i % N_ACCOUNTS}", amount=10)),
+    ]
+    print(f"{name:>22} {results[0]:>14.0f} {results[1]:>14.0f} {results[2]:>14.0f}")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_django(os.path.join(tmp, "bench.sqlite3"))
+
+        from core.domain.entity import CardData
+        from core.repo.bank_repo import FakeBankRepository, Account
+        from core.repo.django_bank_repo import DjangoBankRepository
+
+        card_data = CardData(
+            card_number="1234567890123456",
+            name="John Doe",
+            expiration_date="20300101",
+            card_verification_code="123",
+            service_code="123"
+        )
+        secret = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+
+        fake_repo = FakeBankRepository()
+        fake_repo.auth_store[card_data.card_number] = secret
+        django_repo = DjangoBankRepository()
+        django_repo.set_credential(card_data.card_number, secret)
+        for i in range(N_ACCOUNTS):
+            fake_repo.add_account(Account(account_id=f"acc-{i}", card_number=card_data.card_number, balance=1000))
+            django_repo.add_account(account_id=f"acc-{i}", card_number=card_data.card_number, balance=1000)
+
+        print(f"{'repository (ops/sec)':>22} {'get_balance':>14} {'deposit':>14} {'withdraw':>14}")
+        _run("FakeBankRepository", fake_repo, card_data)
+        _run("DjangoBankRepository", django_repo, card_data)
+
+
+if __name__ == "__main__":
+    main()
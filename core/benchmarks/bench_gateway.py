@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Requests/sec through the TerminalGateway as the number of persistent connections grows. The gateway runs in its own
+# process (AsyncATMUseCase on the in-memory fakes); this process drives a fixed fleet of terminals spread over the
+# connections, each terminal doing insert card -> PIN -> balance -> withdraw -> eject, back to back.
+#
+#     $ python -m core.benchmarks.bench_gateway
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import multiprocessing
+import time
+
+from core.codec import pack_card_data
+from core.domain.entity import CardData
+
+CONNECTIONS = [1, 10, 100, 1000]
+TERMINALS = 1000
+JOURNEYS_PER_TERMINAL = 5
+BANK_LATENCY = 0.001
+
+
+def _card_data(i: int) -> CardData:
+    return CardData(
+        card_number=f"{i:016d}",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _serve(conn) -> None:
+    from core.application.async_use_case import AsyncATMUseCase
+    from core.application.use_case import FakeCashBinUseCase
+    from core.gateway import TerminalGateway
+    from core.repo.async_bank_repo import AsyncFakeBankRepository
+    from core.repo.bank_repo import FakeBankRepository, Account
+
+    bank_repo = FakeBankRepository()
+    for i in range(TERMINALS):
+        card = _card_data(i)
+        bank_repo.auth_store[card.card_number] = f"0000#{card.card_verification_code}#{card.expiration_date}"
+        bank_repo.add_account(Account(account_id=f"{card.card_number}-0", card_number=card.card_number, balance=10**12))
+
+    async def serve() -> None:
+        use_case = AsyncATMUseCase(
+            bank_repo=AsyncFakeBankRepository(bank_repo=bank_repo, latency=BANK_LATENCY),
+            cash_bin=FakeCashBinUseCase(init_amount=10**12),
+        )
+        gateway = TerminalGateway(use_case=use_case, max_in_flight=1024)
+        conn.send(await gateway.start())
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)  # until the benchmark is done
+        await gateway.stop()
+
+    asyncio.run(serve())
+
+
+async def _run(address, n_connections: int) -> float:
+    from core.gateway import GatewayClient
+
+    clients = []
+    for _ in range(n_connections):
+        client = GatewayClient()
+        await client.connect(*address)
+        clients.append(client)
+
+    async def terminal(i: int) -> None:
+        client = clients[i % n_connections]
+        card = pack_card_data(_card_data(i))
+        account_id = f"{i:016d}-0"
+        for _ in range(JOURNEYS_PER_TERMINAL):
+            session_id = (await client.request(i, "validate_card", encrypted_card_info=card)).session_id
+            assert (await client.request(i, "auth", pin="0000", session_id=session_id)).success
+            await client.request(i, "get_balance", account_id=account_id, session_id=session_id)
+            assert (await client.request(i, "withdraw", account_id=account_id, session_id=session_id, amount=10)).success
+            await client.request(i, "end_session", session_id=session_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[terminal(i) for i in range(TERMINALS)])
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+    return TERMINALS * JOURNEYS_PER_TERMINAL * 5 / elapsed
+
+
+def main() -> None:
+    parent, child = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(child,), daemon=True)
+    server.start()
+    address = tuple(parent.recv())
+    try:
+        print(f"{TERMINALS} terminals, bank latency {BANK_LATENCY * 1e3:.0f}ms")
+        print(f"{'connections':>12} {'requests/sec':>13}")
+        for n_connections in CONNECTIONS:
+            print(f"{n_connections:>12} {asyncio.run(_run(address, n_connections)):>13.0f}")
+    finally:
+        parent.send(None)
+        server.join(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
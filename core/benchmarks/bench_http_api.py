@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Per-request cost of the terminal JSON API (core/views.py) through Django's WSGI handler: with TerminalApiMiddleware
+# answering /atm/ right after SecurityMiddleware (settings.MIDDLEWARE as shipped) vs the default middleware stack
+# (session, CSRF, auth, messages, ...) routing to the same view through the URLconf.
+#
+#     $ python -m core.benchmarks.bench_http_api
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import io
+import json
+import os
+
+N = 5000
+
+
+def _environ(path: str, body: bytes) -> dict:
+    return {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": path,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": "http",
+        "wsgi.errors": io.StringIO(),
+    }
+
+
+def main() -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "atmcontroller.settings")
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+
+    from core.application.use_case import ATMUseCase
+    from core.benchmarks.harness import measure, print_results
+    from core.domain.entity import CardData
+    from core.repo.bank_repo import FakeBankRepository, Account
+    from core.repo.session_repo import InMemorySessionRepository
+
+    settings.ALLOWED_HOSTS = ["localhost"]
+    card = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store[card.card_number] = "0000#123#20991231"
+    bank_repo.add_account(Account(account_id="101010", card_number=card.card_number, balance=10**9))
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo)
+    ATMUseCase._instance = uc
+    session_id = uc.validate_card(json.dumps(card.to_dict())).session_id
+    assert uc.auth(pin="0000", session_id=session_id).success
+    body = json.dumps({"account_id": "101010", "session_id": session_id}).encode()
+
+    lean_middleware = list(settings.MIDDLEWARE)
+    default_middleware = [m for m in lean_middleware if m != "core.middleware.TerminalApiMiddleware"]
+    results = []
+    for name, middleware in [("default middleware", default_middleware), ("TerminalApiMiddleware", lean_middleware)]:
+        settings.MIDDLEWARE = middleware
+        handler = WSGIHandler()
+        statuses = []
+
+        def request(i: int) -> None:
+            b"".join(handler(_environ("/atm/get_balance", body), lambda status, headers: statuses.append(status)))
+
+        request(0)
+        assert statuses[0].startswith("200"), statuses[0]
+        results.append(measure(f"get_balance ({name})", request, N, warmup=N // 10))
+    settings.MIDDLEWARE = lean_middleware
+    print_results(results)
+
+    default, lean = results
+    saved_us = (1 / default.ops_per_sec - 1 / lean.ops_per_sec) * 1e6
+    print(f"TerminalApiMiddleware saves {saved_us:.1f} us per request ({lean.ops_per_sec / default.ops_per_sec - 1:+.1%} req/sec)")
+
+
+if __name__ == "__main__":
+    main()
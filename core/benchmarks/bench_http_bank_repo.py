@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# p50/p99 latency and throughput of HttpBankRepository.get_balance against the local stand-in bank (BankHttpServer),
+# with pooled keep-alive connections versus a new connection per call.
+#
+#     $ python -m core.benchmarks.bench_http_bank_repo
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+import time
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.bank_server import BankHttpServer
+from core.repo.http_bank_repo import HttpBankRepository
+
+THREADS = [1, 8]
+CALLS = 2000
+
+
+def _percentile(sorted_values, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _run(base_url: str, card_data: CardData, n_threads: int, reuse_connections: bool):
+    repo = HttpBankRepository(base_url, pool_size=n_threads, reuse_connections=reuse_connections)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    latencies = [[] for _ in range(n_threads)]
+
+    def worker(t: int) -> None:
+        for _ in range(CALLS // n_threads):
+            start = time.perf_counter()
+            repo.get_balance(auth_key=auth_key, account_id="101010")
+            latencies[t].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    repo.close()
+
+    all_latencies = sorted(v for values in latencies for v in values)
+    return len(all_latencies) / elapsed, _percentile(all_latencies, 0.5), _percentile(all_latencies, 0.99)
+
+
+def main() -> None:
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store[card_data.card_number] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number=card_data.card_number, balance=100))
+    server = BankHttpServer(bank_repo=bank_repo)
+    base_url = server.start()
+
+    try:
+        print(f"{'threads':>7} {'connections':>12} {'calls/sec':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'opened':>7}")
+        for n_threads in THREADS:
+            for reuse_connections in [True, False]:
+                opened = server.connections
+                throughput, p50, p99 = _run(base_url, card_data, n_threads, reuse_connections)
+                print(f"{n_threads:>7} {'pooled' if reuse_connections else 'per call':>12} {throughput:>10.0f} "
+                      f"{p50 * 1e3:>9.2f} {p99 * 1e3:>9.2f} {server.connections - opened:>7}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Memory of the domain entities: bytes held by N live sessions (Session + its CardData + balances) and N bank accounts,
+# with the previous __dict__-based classes (reproduced below) vs the current __slots__ ones, and the cost of creating a
+# session / checking its expiry with the previous wall clock (datetime) vs the monotonic clock.
+#
+#     $ python -m core.benchmarks.bench_memory            # 1M sessions / accounts
+#     $ python -m core.benchmarks.bench_memory --n 100000
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable
+
+from core.benchmarks.harness import measure, print_results
+from core.domain.entity import CardData, Session
+from core.repo.bank_repo import Account
+
+TIMED = 100000
+
+
+# _DictCardData / _DictSession / _DictAccount are the entities as they were before __slots__ and monotonic expiry
+class _DictCardData(object):
+    def __init__(self, card_number, name, expiration_date, service_code, card_verification_code):
+        self.card_number = card_number
+        self.name = name
+        self.expiration_date = expiration_date
+        self.service_code = service_code
+        self.card_verification_code = card_verification_code
+
+
+class _DictSession(object):
+    def __init__(self, session_id, card_data, ttl, auth_key=None, balances=None, expiry=None):
+        self.session_id = session_id
+        self.card_data = card_data
+        self.auth_key = auth_key
+        self.expiry = expiry if expiry is not None else int((datetime.now() + timedelta(minutes=ttl)).timestamp())
+        self.balances = balances if balances is not None else {}
+
+    def is_valid(self):
+        return self.expiry > int(datetime.now().timestamp())
+
+
+class _DictAccount(object):
+    def __init__(self, account_id, card_number, balance):
+        self.account_id = account_id
+        self.card_number = card_number
+        self.balance = balance
+
+
+# _bytes_per_object returns the bytes allocated per object by make(i), for i in range(n), kept alive together. Field
+# values (strings, ints) are shared by both variants and created up front, so only the objects themselves are counted.
+def _bytes_per_object(make: Callable[[int], object], n: int) -> float:
+    gc.collect()
+    objects = [None] * n  # preallocated: the list itself is not counted either
+    tracemalloc.start()
+    for i in range(n):
+        objects[i] = make(i)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return used / n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Domain entity memory benchmark")
+    parser.add_argument("--n", type=int, default=1000000)
+    args = parser.parse_args()
+    n = args.n
+
+    session_ids = [f"{i:036d}" for i in range(n)]
+    card = ("1234567890123456", "John Doe", "20991231", "123", "123")
+    balance = 10**9
+
+    print(f"{'entity':<10} {'layout':<10} {'bytes/object':>12} {f'MiB per {n}':>14}")
+    rows = [
+        ("session", "__dict__", lambda i: _DictSession(session_ids[i], _DictCardData(*card), ttl=5)),
+        ("session", "__slots__", lambda i: Session(session_ids[i], CardData(*card), ttl=5)),
+        ("account", "__dict__", lambda i: _DictAccount(session_ids[i], card[0], balance)),
+        ("account", "__slots__", lambda i: Account(session_ids[i], card[0], balance)),
+    ]
+    for entity, layout, make in rows:
+        per_object = _bytes_per_object(make, n)
+        print(f"{entity:<10} {layout:<10} {per_object:>12.0f} {per_object * n / 2**20:>14.1f}")
+    print()
+
+    card_data, dict_card_data = CardData(*card), _DictCardData(*card)
+    session, dict_session = Session("1", card_data, ttl=5), _DictSession("1", dict_card_data, ttl=5)
+    print_results([
+        measure("create (datetime)", lambda i: _DictSession(session_ids[i % n], dict_card_data, ttl=5), TIMED),
+        measure("create (monotonic)", lambda i: Session(session_ids[i % n], card_data, ttl=5), TIMED),
+        measure("is_valid (datetime)", lambda i: dict_session.is_valid(), TIMED),
+        measure("is_valid (monotonic)", lambda i: session.is_valid(), TIMED),
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Measures the cost of the core.metrics instrumentation: raw histogram / counter updates, an instrumented no-op, and
+# ATMUseCase.get_balance with metrics (use case + bank call metered) against the same call with the decorators bypassed.
+#
+#     $ python -m core.benchmarks.bench_metrics
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+
+from core.application.use_case import ATMUseCase
+from core.benchmarks.harness import measure, print_results
+from core.domain.entity import CardData
+from core.dto import GetBalanceRes
+from core.metrics import Histogram, Counter, MetricsRegistry, instrument
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.session_repo import InMemorySessionRepository
+
+N = 200000
+
+
+def _noop(i: int) -> GetBalanceRes:
+    return GetBalanceRes(success=True, message="Retrieved account balance")
+
+
+def main() -> None:
+    histogram, counter = Histogram(), Counter()
+    instrumented_noop = instrument("bench", registry=MetricsRegistry())(_noop)
+
+    card = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store[card.card_number] = "0000#123#20991231"
+    bank_repo.add_account(Account(account_id="101010", card_number=card.card_number, balance=10**9))
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo)
+    session_id = uc.validate_card(json.dumps(card.to_dict())).session_id
+    assert uc.auth(pin="0000", session_id=session_id).success
+    bare_uc = ATMUseCase(session_repo=uc.session_repo, bank_repo=bank_repo)
+    bare_uc.bank_repo = bank_repo  # skip the MeteredBankRepository wrapper
+    bare_get_balance = ATMUseCase.get_balance.__wrapped__
+
+    results = [
+        measure("histogram.record", histogram.record, N),
+        measure("counter.inc", lambda i: counter.inc(), N),
+        measure("noop", _noop, N),
+        measure("noop (instrumented)", instrumented_noop, N),
+        measure("get_balance", lambda i: bare_get_balance(bare_uc, "101010", session_id), N, warmup=N // 10),
+        measure("get_balance (instrumented)", lambda i: uc.get_balance("101010", session_id), N, warmup=N // 10),
+    ]
+    print_results(results)
+
+    by_name = {r.name: r for r in results}
+    for name in ["noop", "get_balance"]:
+        bare, metered = by_name[name], by_name[f"{name} (instrumented)"]
+        overhead_ns = (1 / metered.ops_per_sec - 1 / bare.ops_per_sec) * 1e9
+        print(f"{name}: +{overhead_ns:.0f} ns per call ({metered.ops_per_sec / bare.ops_per_sec - 1:+.1%} ops/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# FakeBankRepository.get_auth_key throughput with Argon2id-hashed credentials, by credential verifier pool (threads or
+# processes, 1..N workers), under `--concurrency` request threads. Then the same auths from one event loop
+# (get_auth_key_async), and how long the loop stalls when the hash is verified on the loop instead of in the pool.
+#
+#     $ python -m core.benchmarks.bench_pin_verify                        # m=19 MiB, t=2 (OWASP minimum for argon2id)
+#     $ python -m core.benchmarks.bench_pin_verify --memory-cost 65536 --time-cost 3 --auths 32   # argon2-cffi default
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import List, Tuple
+
+from argon2 import PasswordHasher
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository
+from core.repo.credentials import CredentialStore, CredentialVerifier, verify_credential
+
+POOLS = [("threads", 1), ("threads", 2), ("threads", 4), ("threads", 8), ("processes", 1), ("processes", 2),
+         ("processes", 4)]
+
+
+def _repo(hasher: PasswordHasher, verifier: CredentialVerifier) -> Tuple[FakeBankRepository, CardData]:
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    repo = FakeBankRepository(credential_store=CredentialStore(hasher=hasher, verifier=verifier))
+    repo.auth_store[card_data.card_number] = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    return repo, card_data
+
+
+# _threads runs `auths` get_auth_key calls from `concurrency` request threads and returns (auths/sec, p99 ms)
+def _threads(repo: FakeBankRepository, card_data: CardData, auths: int, concurrency: int) -> Tuple[float, float]:
+    latencies: List[float] = []
+    remaining = iter(range(auths))
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            t = time.perf_counter()
+            assert repo.get_auth_key(card_data=card_data, pin="0000")
+            latencies.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return auths / elapsed, latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3
+
+
+# _event_loop runs `auths` concurrent auths on one event loop and returns (auths/sec, longest loop stall in ms), the
+# stall being measured by a coroutine that wakes up every millisecond. on_loop verifies inline, as a blocking call would
+def _event_loop(repo: FakeBankRepository, card_data: CardData, auths: int, on_loop: bool) -> Tuple[float, float]:
+    secret = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    credential_hash = repo.auth_store.get_hash(card_data.card_number)
+
+    async def auth() -> None:
+        if on_loop:
+            assert verify_credential(credential_hash, secret)
+        else:
+            assert await repo.get_auth_key_async(card_data=card_data, pin="0000")
+        await asyncio.sleep(0)
+
+    async def main() -> Tuple[float, float]:
+        stall, done = 0.0, False
+
+        async def ticker() -> None:
+            nonlocal stall
+            last = time.perf_counter()
+            while not done:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stall = max(stall, now - last - 0.001)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        await asyncio.gather(*(auth() for _ in range(auths)))
+        elapsed = time.perf_counter() - start
+        done = True
+        await task
+        return auths / elapsed, stall * 1e3
+
+    return asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Argon2 PIN verification benchmark")
+    parser.add_argument("--memory-cost", type=int, default=19456, help="KiB")
+    parser.add_argument("--time-cost", type=int, default=2)
+    parser.add_argument("--parallelism", type=int, default=1)
+    parser.add_argument("--auths", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16, help="request threads")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(time_cost=args.time_cost, memory_cost=args.memory_cost, parallelism=args.parallelism)
+    print(f"argon2id m={args.memory_cost} KiB t={args.time_cost} p={args.parallelism}, {os.cpu_count()} CPUs, "
+          f"{args.auths} auths from {args.concurrency} threads")
+    print(f"{'pool':<10} {'workers':>8} {'auths/sec':>10} {'p99 (ms)':>10}")
+    for kind, workers in POOLS:
+        verifier = CredentialVerifier(workers=workers, processes=kind == "processes")
+        try:
+            repo, card_data = _repo(hasher, verifier)
+            repo.get_auth_key(card_data=card_data, pin="0000")  # start the pool's workers
+            auths_per_sec, p99 = _threads(repo, card_data, args.auths, args.concurrency)
+        finally:
+            verifier.shutdown()
+        print(f"{kind:<10} {workers:>8} {auths_per_sec:>10.1f} {p99:>10.1f}")
+    print()
+
+    print(f"{'event loop':<24} {'auths/sec':>10} {'max stall (ms)':>15}")
+    verifier = CredentialVerifier()
+    try:
+        repo, card_data = _repo(hasher, verifier)
+        for name, on_loop in (("verify on the loop", True), ("get_auth_key_async", False)):
+            auths_per_sec, stall = _event_loop(repo, card_data, args.auths, on_loop)
+            print(f"{name:<24} {auths_per_sec:>10.1f} {stall:>15.1f}")
+    finally:
+        verifier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
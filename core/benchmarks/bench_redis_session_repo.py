@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Redis session repository over a real socket (against the in-process RespServer, or a Redis server given with
+# --url): per-operation cost, and the Redis round trips of ATMUseCase.auth with the session and auth-key stores in Redis.
+#
+#     $ python -m core.benchmarks.bench_redis_session_repo
+#     $ python -m core.benchmarks.bench_redis_session_repo --url redis://127.0.0.1:6379/15
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import json
+
+from core.benchmarks.harness import measure, print_results
+from core.application.use_case import ATMUseCase
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.redis_session_repo import RedisSessionRepository, RedisAuthKeyStore
+from core.repo.resp_server import RespServer
+
+N = 5000
+
+
+def _card_data() -> CardData:
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Redis session repository benchmark")
+    parser.add_argument("--url", help="Redis server to use (flushed!); defaults to an in-process RespServer")
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = RespServer()
+        url = server.start()
+
+    repo = RedisSessionRepository(url=url)
+    repo.client.flushdb()
+    card_data = _card_data()
+    session_ids = [repo.create(card_data=card_data) for _ in range(N)]
+    sessions = [repo.get(session_id=session_id) for session_id in session_ids]
+
+    bank_repo = FakeBankRepository(auth_key_store=RedisAuthKeyStore(url=url))
+    bank_repo.auth_store[card_data.card_number] = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    bank_repo.add_account(Account(account_id="101010", card_number=card_data.card_number, balance=100))
+    uc = ATMUseCase(session_repo=repo, bank_repo=bank_repo)
+    auth_sessions = [uc.validate_card(json.dumps(card_data.to_dict())).session_id for _ in range(N)]
+
+    print_results([
+        measure("create", lambda i: repo.create(card_data=card_data), N),
+        measure("get_if_valid", lambda i: repo.get_if_valid(session_id=session_ids[i]), N),
+        measure("save_if_valid", lambda i: repo.save_if_valid(session=sessions[i]), N),
+        measure("delete", lambda i: repo.delete(session_id=session_ids[i]), N),
+        measure("ATMUseCase.auth", lambda i: uc.auth(pin="0000", session_id=auth_sessions[i]), N),
+    ])
+    if server is not None:
+        print(f"\n{server.commands} commands over {server.connections} connections")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
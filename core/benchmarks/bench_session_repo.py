@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Session repository throughput: the per-process InMemorySessionRepository vs the host-wide SqliteSessionRepository
+# (WAL), single process, then SqliteSessionRepository shared by 1..N worker processes running create -> get_if_valid
+# -> save -> get_if_valid -> delete session lifecycles. Runs against a throw-away database file.
+#
+#     $ python -m core.benchmarks.bench_session_repo
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import multiprocessing
+import os
+import tempfile
+import time
+
+from core.benchmarks.harness import measure, print_results
+from core.domain.entity import CardData
+from core.repo.session_repo import InMemorySessionRepository
+from core.repo.sqlite_session_repo import SqliteSessionRepository
+
+N = 20000
+PROCESSES = [1, 2, 4, 8]
+LIFECYCLES_PER_PROCESS = 2000
+
+
+def _card_data() -> CardData:
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _single_process(name: str, repo) -> list:
+    card_data = _card_data()
+    session_ids = [repo.create(card_data=card_data) for _ in range(N)]
+    sessions = [repo.get(session_id=session_id) for session_id in session_ids]
+    return [
+        measure(f"create ({name})", lambda i: repo.create(card_data=card_data), N),
+        measure(f"get_if_valid ({name})", lambda i: repo.get_if_valid(session_id=session_ids[i]), N),
+        measure(f"save ({name})", lambda i: repo.save(session=sessions[i]), N),
+        measure(f"delete ({name})", lambda i: repo.delete(session_id=session_ids[i]), N),
+    ]
+
+
+def _lifecycles(path: str, n: int) -> None:
+    repo = SqliteSessionRepository(path)
+    card_data = _card_data()
+    for _ in range(n):
+        session_id = repo.create(card_data=card_data)
+        session = repo.get_if_valid(session_id=session_id)
+        session.auth_key = "key"
+        repo.save(session=session)
+        repo.get_if_valid(session_id=session_id)
+        repo.delete(session_id=session_id)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        results = _single_process("in-memory", InMemorySessionRepository())
+        results += _single_process("sqlite", SqliteSessionRepository(path))
+        print_results(results)
+        print()
+
+        print(f"{'processes':>10} {'session ops/sec':>16}")
+        ctx = multiprocessing.get_context("fork")
+        for n_processes in PROCESSES:
+            processes = [ctx.Process(target=_lifecycles, args=(path, LIFECYCLES_PER_PROCESS)) for _ in range(n_processes)]
+            start = time.perf_counter()
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            ops = n_processes * LIFECYCLES_PER_PROCESS * 5 / (time.perf_counter() - start)
+            print(f"{n_processes:>10} {ops:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
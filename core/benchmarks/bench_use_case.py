@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Benchmark suite for the ATMUseCase hot paths (validate_card, auth, get_balance, deposit, withdraw) against
+# FakeBankRepository / InMemorySessionRepository loaded with a realistic number of cards, accounts and live sessions,
+# and of a customer journey run as separate calls vs one script (run_script), with in-memory and SQLite sessions.
+#
+#     $ python -m core.benchmarks.bench_use_case --output bench.json                 # record results
+#     $ python -m core.benchmarks.bench_use_case --baseline bench.json --threshold 0.2  # fail (exit 1) on regression
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import List
+
+from core.application.cash_bin import FakeCashBinUseCase
+from core.application.use_case import ATMUseCase
+from core.benchmarks.harness import BenchResult, measure, print_results, save_results, load_results, find_regressions
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.session_repo import InMemorySessionRepository
+from core.repo.sqlite_session_repo import SqliteSessionRepository
+
+N_CARDS = 10000
+ACCOUNTS_PER_CARD = 5
+N_SESSIONS = 10000
+
+
+def _card_data(i: int) -> CardData:
+    return CardData(
+        card_number=f"{i:016d}",
+        name="John Doe",
+        expiration_date="20991231",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+# _ok fails the run on a rejected call, so that no benchmark ends up timing a rejection path (e.g. an empty cash bin)
+def _ok(res):
+    assert res.success, res.message
+    return res
+
+
+def run(n: int, tmp: str) -> List[BenchResult]:
+    bank_repo = FakeBankRepository()
+    cards = [_card_data(i) for i in range(N_CARDS)]
+    for card in cards:
+        bank_repo.auth_store[card.card_number] = f"0000#{card.card_verification_code}#{card.expiration_date}"
+        for j in range(ACCOUNTS_PER_CARD):
+            bank_repo.add_account(Account(account_id=f"{card.card_number}-{j}", card_number=card.card_number, balance=10**9))
+    # cash bins large enough for every timed deposit and withdrawal
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo,
+                    cash_bin=FakeCashBinUseCase(init_amount=10**12))
+    sqlite_uc = ATMUseCase(session_repo=SqliteSessionRepository(os.path.join(tmp, "sessions.db")), bank_repo=bank_repo,
+                           cash_bin=FakeCashBinUseCase(init_amount=10**12))
+    encrypted_cards = [json.dumps(card.to_dict()) for card in cards]
+
+    # live, authenticated sessions for the account operations
+    session_ids = []
+    for i in range(N_SESSIONS):
+        session_id = uc.validate_card(encrypted_cards[i % N_CARDS]).session_id
+        uc.auth(pin="0000", session_id=session_id)
+        session_ids.append(session_id)
+    fresh_session_ids = [uc.validate_card(encrypted_cards[i % N_CARDS]).session_id for i in range(n)]
+
+    def account_id(i: int) -> str:
+        return f"{(i % N_SESSIONS) % N_CARDS:016d}-{i % ACCOUNTS_PER_CARD}"
+
+    return [
+        measure("validate_card", lambda i: _ok(uc.validate_card(encrypted_cards[i % N_CARDS])), n),
+        measure("auth", lambda i: _ok(uc.auth(pin="0000", session_id=fresh_session_ids[i])), n),
+        measure("get_balance", lambda i: _ok(uc.get_balance(account_id(i), session_ids[i % N_SESSIONS])), n,
+                warmup=n // 10),
+        measure("deposit", lambda i: _ok(uc.deposit(account_id(i), session_ids[i % N_SESSIONS], 100)), n, warmup=n // 10),
+        measure("withdraw", lambda i: _ok(uc.withdraw(account_id(i), session_ids[i % N_SESSIONS], 100)), n,
+                warmup=n // 10),
+    ] + _journeys(uc, encrypted_cards, n, "memory") + _journeys(sqlite_uc, encrypted_cards, n, "sqlite")
+
+
+# _journeys times auth -> get_balance -> withdraw on fresh sessions, as three calls (three session loads) and as one
+# run_script (one session load)
+def _journeys(uc: ATMUseCase, encrypted_cards: List[str], n: int, name: str) -> List[BenchResult]:
+    session_ids = [uc.validate_card(encrypted_cards[i % N_CARDS]).session_id for i in range(2 * n)]
+
+    def calls(i: int) -> None:
+        account_id = f"{i % N_CARDS:016d}-0"
+        _ok(uc.auth(pin="0000", session_id=session_ids[i]))
+        _ok(uc.get_balance(account_id, session_ids[i]))
+        _ok(uc.withdraw(account_id, session_ids[i], 100))
+
+    def script(i: int) -> None:
+        account_id = f"{(n + i) % N_CARDS:016d}-0"
+        results = uc.run_script(session_ids[n + i], [
+            ("auth", dict(pin="0000")),
+            ("get_balance", dict(account_id=account_id)),
+            ("withdraw", dict(account_id=account_id, amount=100)),
+        ])
+        _ok(results[-1])  # a script stops at its first failed step
+
+    return [measure(f"journey ({name}, calls)", calls, n), measure(f"journey ({name}, script)", script, n)]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="ATMUseCase benchmark suite")
+    parser.add_argument("-n", type=int, default=20000, help="timed calls per benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression vs. baseline (0.2 == 20%%)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.n, tmp)
+    print_results(results)
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        regressions = find_regressions(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Small benchmark harness: per-call latency sampling, ops/sec and percentiles, JSON results and regression checks
+# against a stored baseline.
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int
+    ops_per_sec: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    max_us: float
+
+
+def _percentile(sorted_values: List[int], p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))] / 1e3
+
+
+# measure calls fn(i) for i in range(n) after `warmup` untimed calls; fn receives the iteration so callers can rotate
+# through their data set
+def measure(name: str, fn: Callable[[int], object], n: int, warmup: int = 0) -> BenchResult:
+    for i in range(warmup):
+        fn(i)
+
+    clock = time.perf_counter_ns
+    latencies = [0] * n
+    start = clock()
+    for i in range(n):
+        t = clock()
+        fn(i)
+        latencies[i] = clock() - t
+    elapsed = clock() - start
+
+    latencies.sort()
+    return BenchResult(
+        name=name,
+        ops=n,
+        ops_per_sec=n / (elapsed / 1e9),
+        p50_us=_percentile(latencies, 0.50),
+        p90_us=_percentile(latencies, 0.90),
+        p99_us=_percentile(latencies, 0.99),
+        max_us=latencies[-1] / 1e3,
+    )
+
+
+def print_results(results: List[BenchResult]) -> None:
+    print(f"{'benchmark':<24} {'ops/sec':>12} {'p50 (us)':>10} {'p90 (us)':>10} {'p99 (us)':>10} {'max (us)':>10}")
+    for r in results:
+        print(f"{r.name:<24} {r.ops_per_sec:>12.0f} {r.p50_us:>10.1f} {r.p90_us:>10.1f} {r.p99_us:>10.1f} {r.max_us:>10.1f}")
+
+
+def save_results(results: List[BenchResult], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({r.name: asdict(r) for r in results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, BenchResult]:
+    with open(path) as f:
+        return {name: BenchResult(**r) for name, r in json.load(f).items()}
+
+
+# find_regressions reports every benchmark whose throughput dropped, or whose median latency grew, by more than
+# `threshold` (a fraction, e.g. 0.2 == 20%) relative to the baseline. Benchmarks missing from the baseline are skipped.
+# Tail percentiles are reported but not checked: on shared machines they are too noisy to gate on.
+def find_regressions(results: List[BenchResult], baseline: Dict[str, BenchResult], threshold: float) -> List[str]:
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if base is None:
+            continue
+        if r.ops_per_sec < base.ops_per_sec * (1 - threshold):
+            regressions.append(f"{r.name}: ops/sec {r.ops_per_sec:.0f} < baseline {base.ops_per_sec:.0f}")
+        if r.p50_us > base.p50_us * (1 + threshold):
+            regressions.append(f"{r.name}: p50 {r.p50_us:.1f}us > baseline {base.p50_us:.1f}us")
+    return regressions
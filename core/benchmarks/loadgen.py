@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# End-to-end load generator: N concurrent simulated customers run the full ATM journey
+#
+#     insert card (validate_card) -> PIN (auth) -> balance (get_balance) -> withdraw | deposit -> eject (end_session)
+#
+# in-process against ATMUseCase (thread driver) or AsyncATMUseCase (asyncio driver), and reports throughput, error
+# rates and per-step latency histograms for each concurrency level.
+#
+#     $ python -m core.benchmarks.loadgen --driver thread --concurrency 1,8,32 --journeys 200 --bank-latency 0.002
+#     $ python -m core.benchmarks.loadgen --driver asyncio --concurrency 1,100,1000 --journeys 2000 --think-time 0.01
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from core.application.async_use_case import AsyncATMUseCase
+from core.application.use_case import ATMUseCase, FakeCashBinUseCase
+from core.domain.entity import CardData
+from core.repo.async_bank_repo import AsyncFakeBankRepository
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.session_repo import InMemorySessionRepository
+from core.repo.async_session_repo import AsyncInMemorySessionRepository
+
+STEPS = ["validate_card", "auth", "get_balance", "withdraw", "deposit", "end_session"]
+
+
+@dataclass
+class LoadConfig:
+    concurrency: int = 8
+    journeys: int = 200  # total customer journeys per run
+    think_time: float = 0.0  # mean think time between steps (exponentially distributed), in seconds
+    withdraw_ratio: float = 0.7  # share of journeys that withdraw; the rest deposit
+    balance_checks: int = 1  # get_balance calls per journey
+    bank_latency: float = 0.0  # simulated bank round trip, in seconds
+    n_cards: int = 1000
+    seed: int = 0
+
+
+@dataclass
+class LoadReport:
+    concurrency: int
+    elapsed: float
+    journeys: int
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    @property
+    def journeys_per_sec(self) -> float:
+        return self.journeys / self.elapsed
+
+    @property
+    def ops_per_sec(self) -> float:
+        return sum(len(v) for v in self.latencies.values()) / self.elapsed
+
+    def error_rate(self, step: str) -> float:
+        n = len(self.latencies.get(step, []))
+        return self.errors.get(step, 0) / n if n else 0.0
+
+    def percentile(self, step: str, p: float) -> float:
+        values = sorted(self.latencies.get(step, []))
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    # histogram buckets latencies by powers of two of microseconds: {upper bound in us: count}
+    def histogram(self, step: str) -> Dict[int, int]:
+        buckets = defaultdict(int)
+        for v in self.latencies.get(step, []):
+            bound = 1
+            while bound < v * 1e6:
+                bound *= 2
+            buckets[bound] += 1
+        return dict(sorted(buckets.items()))
+
+
+# _SlowBankRepository adds a blocking round trip to every FakeBankRepository call (the thread driver's bank)
+class _SlowBankRepository(FakeBankRepository):
+    def __init__(self, latency: float):
+        super().__init__()
+        self.latency = latency
+
+    def get_auth_key(self, card_data, pin):
+        time.sleep(self.latency)
+        return super().get_auth_key(card_data=card_data, pin=pin)
+
+    def get_accounts(self, auth_key):
+        time.sleep(self.latency)
+        return super().get_accounts(auth_key=auth_key)
+
+    def get_balance(self, auth_key, account_id):
+        time.sleep(self.latency)
+        return super().get_balance(auth_key=auth_key, account_id=account_id)
+
+    def deposit(self, auth_key, account_id, amount):
+        time.sleep(self.latency)
+        return super().deposit(auth_key=auth_key, account_id=account_id, amount=amount)
+
+    def withdraw(self, auth_key, account_id, amount):
+        time.sleep(self.latency)
+        return super().withdraw(auth_key=auth_key, account_id=account_id, amount=amount)
+
+
+def _load_bank(bank_repo: FakeBankRepository, config: LoadConfig) -> List[str]:
+    encrypted_cards = []
+    for i in range(config.n_cards):
+        card = CardData(
+            card_number=f"{i:016d}",
+            name="Load Test",
+            expiration_date="20991231",
+            card_verification_code="123",
+            service_code="101"
+        )
+        bank_repo.auth_store[card.card_number] = f"0000#{card.card_verification_code}#{card.expiration_date}"
+        bank_repo.add_account(Account(account_id=f"{card.card_number}-0", card_number=card.card_number, balance=10**12))
+        encrypted_cards.append(json.dumps(card.to_dict()))
+    return encrypted_cards
+
+
+# _Journey is one customer's ordered list of (step, kwargs); session_id is filled in after validate_card
+def _journey(rnd: random.Random, encrypted_cards: List[str], config: LoadConfig):
+    card_index = rnd.randrange(len(encrypted_cards))
+    account_id = f"{card_index:016d}-0"
+    steps = [("validate_card", dict(encrypted_card_info=encrypted_cards[card_index])), ("auth", dict(pin="0000"))]
+    steps += [("get_balance", dict(account_id=account_id))] * config.balance_checks
+    if rnd.random() < config.withdraw_ratio:
+        steps.append(("withdraw", dict(account_id=account_id, amount=rnd.randint(1, 10) * 10)))
+    else:
+        steps.append(("deposit", dict(account_id=account_id, amount=rnd.randint(1, 10) * 10)))
+    steps.append(("end_session", dict()))
+    return steps
+
+
+def _think(rnd: random.Random, config: LoadConfig) -> float:
+    return rnd.expovariate(1 / config.think_time) if config.think_time else 0.0
+
+
+def run_threads(config: LoadConfig) -> LoadReport:
+    bank_repo = _SlowBankRepository(config.bank_latency) if config.bank_latency else FakeBankRepository()
+    encrypted_cards = _load_bank(bank_repo, config)
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo)
+    uc.cash_bin = FakeCashBinUseCase(init_amount=10**12)
+    report = LoadReport(concurrency=config.concurrency, elapsed=0.0, journeys=config.journeys)
+    lock = threading.Lock()
+    remaining = [config.journeys]
+
+    def customer(c: int) -> None:
+        rnd = random.Random(config.seed * 100003 + c)
+        latencies, errors = defaultdict(list), defaultdict(int)
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    break
+                remaining[0] -= 1
+            session_id = None
+            for step, kwargs in _journey(rnd, encrypted_cards, config):
+                if step != "validate_card":
+                    kwargs = dict(kwargs, session_id=session_id)
+                start = time.perf_counter()
+                res = getattr(uc, step)(**kwargs)
+                latencies[step].append(time.perf_counter() - start)
+                if not res.success:
+                    errors[step] += 1
+                    break
+                if step == "validate_card":
+                    session_id = res.session_id
+                time.sleep(_think(rnd, config))
+        with lock:
+            for step, values in latencies.items():
+                report.latencies[step].extend(values)
+            for step, n in errors.items():
+                report.errors[step] += n
+
+    threads = [threading.Thread(target=customer, args=(c,)) for c in range(config.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def run_asyncio(config: LoadConfig) -> LoadReport:
+    bank_repo = FakeBankRepository()
+    encrypted_cards = _load_bank(bank_repo, config)
+    report = LoadReport(concurrency=config.concurrency, elapsed=0.0, journeys=config.journeys)
+
+    async def main() -> None:
+        uc = AsyncATMUseCase(
+            session_repo=AsyncInMemorySessionRepository(InMemorySessionRepository()),
+            bank_repo=AsyncFakeBankRepository(bank_repo=bank_repo, latency=config.bank_latency),
+            cash_bin=FakeCashBinUseCase(init_amount=10**12),
+        )
+        remaining = [config.journeys]
+
+        async def customer(c: int) -> None:
+            rnd = random.Random(config.seed * 100003 + c)
+            while remaining[0] > 0:
+                remaining[0] -= 1  # no await in between: safe on a single event loop
+                session_id = None
+                for step, kwargs in _journey(rnd, encrypted_cards, config):
+                    if step != "validate_card":
+                        kwargs = dict(kwargs, session_id=session_id)
+                    start = time.perf_counter()
+                    res = await getattr(uc, step)(**kwargs)
+                    report.latencies[step].append(time.perf_counter() - start)
+                    if not res.success:
+                        report.errors[step] += 1
+                        break
+                    if step == "validate_card":
+                        session_id = res.session_id
+                    think = _think(rnd, config)
+                    if think:
+                        await asyncio.sleep(think)
+
+        await asyncio.gather(*[customer(c) for c in range(config.concurrency)])
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+DRIVERS = {"thread": run_threads, "asyncio": run_asyncio}
+
+
+def print_report(report: LoadReport, show_histograms: bool = False) -> None:
+    print(f"concurrency={report.concurrency} journeys={report.journeys} elapsed={report.elapsed:.2f}s "
+          f"journeys/sec={report.journeys_per_sec:.1f} ops/sec={report.ops_per_sec:.1f}")
+    print(f"  {'step':<14} {'calls':>7} {'errors':>7} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9}")
+    for step in STEPS:
+        if step not in report.latencies:
+            continue
+        print(f"  {step:<14} {len(report.latencies[step]):>7} {report.error_rate(step):>6.1%} "
+              f"{report.percentile(step, 0.5) * 1e3:>9.3f} {report.percentile(step, 0.9) * 1e3:>9.3f} "
+              f"{report.percentile(step, 0.99) * 1e3:>9.3f}")
+        if show_histograms:
+            for bound, count in report.histogram(step).items():
+                print(f"    <= {bound:>8} us {count:>7}")
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="ATM customer journey load generator")
+    parser.add_argument("--driver", choices=sorted(DRIVERS), default="thread")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--journeys", type=int, default=LoadConfig.journeys)
+    parser.add_argument("--think-time", type=float, default=LoadConfig.think_time)
+    parser.add_argument("--withdraw-ratio", type=float, default=LoadConfig.withdraw_ratio)
+    parser.add_argument("--balance-checks", type=int, default=LoadConfig.balance_checks)
+    parser.add_argument("--bank-latency", type=float, default=LoadConfig.bank_latency)
+    parser.add_argument("--histograms", action="store_true", help="print per-step latency histograms")
+    args = parser.parse_args(argv)
+
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        config = LoadConfig(
+            concurrency=concurrency,
+            journeys=args.journeys,
+            think_time=args.think_time,
+            withdraw_ratio=args.withdraw_ratio,
+            balance_checks=args.balance_checks,
+            bank_latency=args.bank_latency,
+        )
+        print_report(DRIVERS[args.driver](config), show_histograms=args.histograms)
+
+
+if __name__ == "__main__":
+    main()
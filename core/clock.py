@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Clocks shared by the entities, repositories and use cases, so that time is read in one place:
+#
+#     SystemClock  reads the OS clocks on every call
+#     CoarseClock  serves values cached by a ticker thread (refreshed every `resolution` seconds): a read is an
+#                  attribute load, and today's date string is formatted once a day
+#     ManualClock  only moves when a test advances it
+#
+# monotonic() orders events and measures lifetimes (session expiry), time() is the wall clock (epoch seconds) for values
+# shared with other processes / hosts, and today() is the local date as "YYYYMMDD" (card expiration dates).
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+import os
+import threading
+import time as _time
+import weakref
+from datetime import date, datetime, timedelta
+
+
+class Clock(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def monotonic(self) -> float:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def time(self) -> float:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def today(self) -> str:
+        raise NotImplementedError
+
+
+class SystemClock(Clock):
+    def monotonic(self) -> float:
+        return _time.monotonic()
+
+    def time(self) -> float:
+        return _time.time()
+
+    def today(self) -> str:
+        return _time.strftime("%Y%m%d")
+
+
+SYSTEM = SystemClock()
+
+
+# CoarseClock trades resolution for cost: values are at most `resolution` seconds old, which is plenty for session and
+# auth key lifetimes measured in minutes and for a date. The ticker is a daemon thread started on first use (and again
+# in a forked child, e.g. a gunicorn worker, where threads do not survive the fork).
+class CoarseClock(Clock):
+    def __init__(self, resolution: float = 0.005):
+        self.resolution = resolution
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._next_day = 0.0  # wall clock time of the next local midnight
+        self._today = ""
+        self._tick()
+        _COARSE_CLOCKS.add(self)
+
+    def _tick(self) -> None:
+        self._monotonic = _time.monotonic()
+        self._time = now = _time.time()
+        if now >= self._next_day:
+            today = date.fromtimestamp(now)
+            self._today = today.strftime("%Y%m%d")
+            self._next_day = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.resolution):
+            self._tick()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._tick()
+            self._thread = threading.Thread(target=self._run, name="coarse-clock", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def monotonic(self) -> float:
+        if self._thread is None:
+            self.start()
+        return self._monotonic
+
+    def time(self) -> float:
+        if self._thread is None:
+            self.start()
+        return self._time
+
+    def today(self) -> str:
+        if self._thread is None:
+            self.start()
+        return self._today
+
+
+_COARSE_CLOCKS = weakref.WeakSet()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: [clock._after_fork() for clock in list(_COARSE_CLOCKS)])
+
+
+# ManualClock starts at the given wall clock time (and monotonic 0) and only moves with advance(), so TTL tests run
+# instantly and date checks do not depend on the day the tests run
+class ManualClock(Clock):
+    def __init__(self, time: float = 0.0, monotonic: float = 0.0):
+        self._time = time
+        self._monotonic = monotonic
+
+    @classmethod
+    def at(cls, day: str) -> 'ManualClock':
+        return cls(time=datetime.strptime(day, "%Y%m%d").timestamp())
+
+    def advance(self, seconds: float) -> None:
+        self._time += seconds
+        self._monotonic += seconds
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def time(self) -> float:
+        return self._time
+
+    def today(self) -> str:
+        return datetime.fromtimestamp(self._time).strftime("%Y%m%d")
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+import threading
+import weakref
+from typing import Optional
+
+
+class Clock(object):
+    __metaclass__ = abc.ABCMeta
+    @abc.abstractmethod
+    def monotonic(self) -> float: ...
+    @abc.abstractmethod
+    def time(self) -> float: ...
+    @abc.abstractmethod
+    def today(self) -> str: ...
+
+class SystemClock(Clock):
+    def monotonic(self) -> float: ...
+    def time(self) -> float: ...
+    def today(self) -> str: ...
+
+SYSTEM: SystemClock
+
+class CoarseClock(Clock):
+    resolution: float
+    _lock: threading.Lock
+    _thread: Optional[threading.Thread]
+    _stop: threading.Event
+    _next_day: float
+    _today: str
+    _monotonic: float
+    _time: float
+
+    def __init__(self, resolution: float = 0.005) -> None: ...
+    def _tick(self) -> None: ...
+    def _run(self) -> None: ...
+    def start(self) -> None: ...
+    def stop(self) -> None: ...
+    def _after_fork(self) -> None: ...
+    def monotonic(self) -> float: ...
+    def time(self) -> float: ...
+    def today(self) -> str: ...
+
+_COARSE_CLOCKS: weakref.WeakSet[CoarseClock]
+
+class ManualClock(Clock):
+    _time: float
+    _monotonic: float
+
+    def __init__(self, time: float = 0.0, monotonic: float = 0.0) -> None: ...
+    @classmethod
+    def at(cls, day: str) -> ManualClock: ...
+    def advance(self, seconds: float) -> None: ...
+    def monotonic(self) -> float: ...
+    def time(self) -> float: ...
+    def today(self) -> str: ...
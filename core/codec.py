@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Wire encodings of the terminal API, selected by the request's Content-Type:
+# - application/json: requests are objects of the operation's fields, responses are objects of the DTO's fields
+# - application/msgpack: requests are arrays of the operation's fields in core.api.OPERATIONS order (objects are
+#   accepted too), responses are arrays of the DTO's fields in dataclass field order (core.api.RESPONSES gives the type
+#   per operation), e.g. GetBalanceRes -> [success, balance, account_id, message]. The card data in validate_card may be
+#   sent as MessagePack bytes of [card_number, name, expiration_date, service_code, card_verification_code].
+# Error responses (4xx) are always objects: {"success": false, "message": ...}.
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+from typing import Any, Dict, List, Optional
+
+import msgpack
+
+from core.api import OPERATIONS, RESPONSES
+from core.application.errors import InvalidRequestError
+from core.domain.entity import CardData
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+
+class JsonCodec(object):
+    content_type = JSON
+
+    def decode_request(self, operation: str, body: bytes) -> Any:
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise InvalidRequestError(f"invalid JSON: {e}")
+
+    def encode_request(self, operation: str, kwargs: Dict[str, Any]) -> bytes:
+        return json.dumps(kwargs).encode()
+
+    def encode_response(self, res) -> bytes:
+        return json.dumps(res.__dict__).encode()
+
+    def decode_response(self, operation: str, body: bytes):
+        return RESPONSES[operation](**json.loads(body))
+
+    def encode_error(self, message: str) -> bytes:
+        return json.dumps(dict(success=False, message=message)).encode()
+
+
+class MsgpackCodec(object):
+    content_type = MSGPACK
+
+    def decode_request(self, operation: str, body: bytes) -> Any:
+        try:
+            payload = msgpack.unpackb(body)
+        except (ValueError, msgpack.UnpackException) as e:
+            raise InvalidRequestError(f"invalid MessagePack: {e}")
+        return self.request_from_array(operation, payload)
+
+    # request_from_array maps a schema-ordered request array onto the operation's field names (objects pass through)
+    @staticmethod
+    def request_from_array(operation: str, payload: Any) -> Any:
+        if isinstance(payload, list):
+            fields = OPERATIONS.get(operation, ())
+            if len(payload) != len(fields):
+                raise InvalidRequestError(f"request must have {len(fields)} fields: {', '.join(fields)}")
+            return dict(zip(fields, payload))
+        return payload
+
+    def encode_request(self, operation: str, kwargs: Dict[str, Any]) -> bytes:
+        return msgpack.packb([kwargs[f] for f in OPERATIONS[operation]])
+
+    def encode_response(self, res) -> bytes:
+        return msgpack.packb(self.response_to_array(res))
+
+    # dataclass instances keep their fields in declaration order, so __dict__ is already the schema-ordered array
+    @staticmethod
+    def response_to_array(res) -> List[Any]:
+        return list(res.__dict__.values())
+
+    def decode_response(self, operation: str, body: bytes):
+        return RESPONSES[operation](*msgpack.unpackb(body))
+
+    def encode_error(self, message: str) -> bytes:
+        return msgpack.packb(dict(success=False, message=message))
+
+
+CODECS = {
+    JSON: JsonCodec(),
+    MSGPACK: MsgpackCodec(),
+    "application/x-msgpack": MsgpackCodec(),
+}
+
+
+# get_codec returns the codec for a Content-Type header value (JSON when there is none), or None when unsupported
+def get_codec(content_type: Optional[str]):
+    if not content_type:
+        return CODECS[JSON]
+    return CODECS.get(content_type.split(";", 1)[0].strip().lower())
+
+
+def pack_card_data(card_data: CardData) -> bytes:
+    return msgpack.packb([
+        card_data.card_number,
+        card_data.name,
+        card_data.expiration_date,
+        card_data.service_code,
+        card_data.card_verification_code,
+    ])
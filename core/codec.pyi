@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Any, Dict, List, Optional, Union
+
+from core.domain.entity import CardData
+
+JSON: str
+MSGPACK: str
+
+
+class JsonCodec(object):
+    content_type: str
+
+    def decode_request(self, operation: str, body: bytes) -> Any: ...
+    def encode_request(self, operation: str, kwargs: Dict[str, Any]) -> bytes: ...
+    def encode_response(self, res: Any) -> bytes: ...
+    def decode_response(self, operation: str, body: bytes) -> Any: ...
+    def encode_error(self, message: str) -> bytes: ...
+
+
+class MsgpackCodec(object):
+    content_type: str
+
+    def decode_request(self, operation: str, body: bytes) -> Any: ...
+    @staticmethod
+    def request_from_array(operation: str, payload: Any) -> Any: ...
+    def encode_request(self, operation: str, kwargs: Dict[str, Any]) -> bytes: ...
+    def encode_response(self, res: Any) -> bytes: ...
+    @staticmethod
+    def response_to_array(res: Any) -> List[Any]: ...
+    def decode_response(self, operation: str, body: bytes) -> Any: ...
+    def encode_error(self, message: str) -> bytes: ...
+
+
+CODECS: Dict[str, Union[JsonCodec, MsgpackCodec]]
+
+def get_codec(content_type: Optional[str]) -> Optional[Union[JsonCodec, MsgpackCodec]]: ...
+def pack_card_data(card_data: CardData) -> bytes: ...
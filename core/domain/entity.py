@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from datetime import datetime, timedelta
 from typing import Dict, Any
 
+from core.clock import SYSTEM
 
+
+# Entities are kept by the million (live sessions, bank accounts), so they use __slots__: no per-instance __dict__.
 class CardData(object):
+    __slots__ = ("card_number", "name", "expiration_date", "service_code", "card_verification_code")
+
     card_number: str
     name: str
     expiration_date: str
@@ -39,12 +43,23 @@ class CardData(object):
         )
 
 
+# Session.expiry is an integer number of seconds on the monotonic clock: computing and checking it is one clock read
+# and an int comparison, and it cannot jump with the wall clock. The clock is read by the caller (`now`, see
+# core.clock) or defaults to the system clock. Stores shared across processes / hosts pass their own expiry (wall clock
+# seconds, see SqliteSessionRepository) and check it themselves instead of calling is_valid.
 class Session(object):
-    def __init__(self, session_id: str, card_data: CardData, ttl: int, auth_key: str = None) -> None:
+    __slots__ = ("session_id", "card_data", "auth_key", "expiry", "balances")
+
+    def __init__(self, session_id: str, card_data: CardData, ttl: int, auth_key: str = None,
+                 balances: Dict[str, int] = None, expiry: int = None, now: float = None) -> None:
         self.session_id = session_id
         self.card_data = card_data
         self.auth_key = auth_key
-        self.expiry = int((datetime.now() + timedelta(minutes=ttl)).timestamp())
+        # expiry is given when an existing session is loaded back from a store
+        if expiry is None:
+            expiry = int(now if now is not None else SYSTEM.monotonic()) + ttl * 60
+        self.expiry = expiry
+        self.balances = balances if balances is not None else {}  # account_id -> last balance seen in this session
 
     def to_dict(self) -> Dict[str, Any]:
         return dict(
@@ -52,15 +67,19 @@ class Session(object):
             card_data=self.card_data.to_dict(),
             auth_key=self.auth_key,
             expiry=self.expiry,
+            balances=self.balances,
         )
 
-    def is_valid(self) -> bool:
-        return self.expiry > int(datetime.now().timestamp())
+    def is_valid(self, now: float = None) -> bool:
+        return self.expiry > (now if now is not None else SYSTEM.monotonic())
 
-    # @classmethod
-    # def from_dict(cls, session_dict: Dict[str, Any]) -> 'Session':
-    #     return cls(
-    #         session_id=session_dict['session_id'],
-    #         session_data=session_dict['session_data'],
-    #     )
-    #
+    @classmethod
+    def from_dict(cls, session_dict: Dict[str, Any]) -> 'Session':
+        return cls(
+            session_id=session_dict['session_id'],
+            card_data=CardData.from_dict(session_dict['card_data']),
+            ttl=0,
+            auth_key=session_dict['auth_key'],
+            balances=session_dict['balances'],
+            expiry=session_dict['expiry'],
+        )
@@ -22,9 +22,13 @@ class Session(object):
     card_data: CardData
     auth_key: str
     expiry: int
+    balances: Dict[str, int]
 
-    def __init__(self, session_id: str, card_data: CardData, ttl: int, auth_key: str = None) -> None:
+    def __init__(self, session_id: str, card_data: CardData, ttl: int, auth_key: str = None,
+                 balances: Dict[str, int] = None, expiry: int = None, now: float = None) -> None:
         ...
 
+    @classmethod
+    def from_dict(cls, session_dict: Dict[str, Any]) -> Session: ...
     def to_dict(self) -> Dict[str, Any]: ...
-    def is_valid(self) -> bool: ...
+    def is_valid(self, now: float = None) -> bool: ...
@@ -9,6 +9,12 @@ class ValidateCardRes:
     session_id: str = None
 
 
+@dataclass
+class EndSessionRes:
+    success: bool
+    message: str = None
+
+
 @dataclass
 class AuthRes:
     success: bool
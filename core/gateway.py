@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# TerminalGateway: a long-lived asyncio TCP endpoint for ATM terminals. Many terminals share one persistent connection
+# (e.g. one per branch concentrator) and pipeline their requests over it; responses come back as soon as they are ready,
+# tagged with the request id.
+#
+#     frame    := length (4 bytes, big endian) + MessagePack body
+#     request  := [request_id, terminal_id, operation, fields]  fields: array in core.api.OPERATIONS order (or a map)
+#     response := [request_id, status, body]                    status 200: body is the response DTO as an array
+#                                                               (see core/codec.py), otherwise an error message
+#
+#     $ python -m core.gateway --port 9000
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import argparse
+import asyncio
+import struct
+from typing import Any, Dict, Optional, Set, Tuple
+
+import logging
+
+import msgpack
+
+from core.api import OPERATIONS, RESPONSES, parse_request
+from core.application.async_use_case import AsyncATMUseCase
+from core.application.errors import InvalidRequestError
+from core.codec import MsgpackCodec
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+
+def _frame(body: bytes) -> bytes:
+    return _HEADER.pack(len(body)) + body
+
+
+# TerminalGateway serves the terminal operations of AsyncATMUseCase over persistent connections.
+# - pipelining: a connection keeps reading while earlier requests are still running; requests of the same terminal
+#   still run one after the other, in the order they were sent
+# - backpressure: at most `max_in_flight` requests per connection are pending; past that the gateway stops reading the
+#   socket, so a terminal flooding requests is slowed down by TCP flow control instead of growing the gateway's memory
+# - idle timeout: a connection without requests for `idle_timeout` seconds is closed
+# - frames larger than `max_frame_size` close the connection (a broken or hostile peer)
+class TerminalGateway(object):
+    def __init__(
+        self,
+        use_case: AsyncATMUseCase = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_in_flight: int = 64,
+        idle_timeout: float = 300.0,
+        max_frame_size: int = 64 * 1024,
+    ):
+        self.use_case = use_case
+        self.host = host
+        self.port = port
+        self.max_in_flight = max_in_flight
+        self.idle_timeout = idle_timeout
+        self.max_frame_size = max_frame_size
+        self.connections = 0  # open connections
+        self.total_connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()  # one per open connection
+
+    async def start(self) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, backlog=1024)
+        return self._server.sockets[0].getsockname()[:2]
+
+    # stop closes the listening socket and every open connection, and waits for their in-flight requests
+    async def stop(self) -> None:
+        self._server.close()
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.total_connections += 1
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tails: Dict[Any, asyncio.Task] = {}  # terminal_id -> its last request
+        tasks: Set[asyncio.Task] = set()
+
+        try:
+            while True:
+                try:
+                    header = await asyncio.wait_for(reader.readexactly(_HEADER.size), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if tasks:
+                        continue
+                    logger.info("closing idle terminal connection")
+                    break
+                (length,) = _HEADER.unpack(header)
+                if length > self.max_frame_size:
+                    logger.warning("closing terminal connection: %d byte frame", length)
+                    break
+                body = await reader.readexactly(length)
+
+                try:
+                    request_id, terminal_id, operation, fields = msgpack.unpackb(body)
+                    hash(terminal_id)
+                except (ValueError, TypeError, msgpack.UnpackException):
+                    logger.warning("closing terminal connection: malformed frame")
+                    break
+
+                await in_flight.acquire()
+                self.requests += 1
+                task = asyncio.create_task(
+                    self._handle(writer, tails.get(terminal_id), request_id, terminal_id, operation, fields)
+                )
+                tails[terminal_id] = task
+                tasks.add(task)
+                task.add_done_callback(lambda t, terminal_id=terminal_id: self._done(t, terminal_id, tails, tasks, in_flight))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # terminal went away
+        except asyncio.CancelledError:
+            pass  # gateway is stopping
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+            self._handlers.discard(handler)
+            self.connections -= 1
+
+    @staticmethod
+    def _done(task: asyncio.Task, terminal_id, tails: Dict[Any, asyncio.Task], tasks: Set[asyncio.Task],
+              in_flight: asyncio.Semaphore) -> None:
+        tasks.discard(task)
+        if tails.get(terminal_id) is task:
+            del tails[terminal_id]
+        in_flight.release()
+
+    async def _handle(self, writer: asyncio.StreamWriter, previous: Optional[asyncio.Task], request_id, terminal_id,
+                      operation, fields) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        # every request gets a response, or the terminal waits for it until it gives up on the connection
+        try:
+            status, body = await self._dispatch(terminal_id, operation, fields)
+        except Exception:
+            logger.exception("request %r failed", request_id)
+            status, body = 500, "internal error"
+        try:
+            writer.write(_frame(msgpack.packb([request_id, status, body])))
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # PIN attempts are rate limited per terminal_id of the frame: every terminal behind a connection has its own budget
+    async def _dispatch(self, terminal_id, operation, fields) -> Tuple[int, Any]:
+        if not isinstance(operation, str):
+            return 400, "operation must be a string"
+        if operation not in OPERATIONS:
+            return 404, f"unknown operation: {operation}"
+        try:
+            kwargs = parse_request(operation, MsgpackCodec.request_from_array(operation, fields))
+        except InvalidRequestError as e:
+            return 400, str(e)
+        if operation == "auth":
+            kwargs["terminal_id"] = terminal_id
+
+        use_case = self.use_case or AsyncATMUseCase.get_instance()
+        try:
+            res = await getattr(use_case, operation)(**kwargs)
+        except Exception:
+            logger.exception("%s failed", operation)
+            return 500, "internal error"
+        return 200, MsgpackCodec.response_to_array(res)
+
+
+# GatewayClient is a fake terminal concentrator for tests and benchmarks: it pipelines the requests of any number of
+# terminals over one connection to a TerminalGateway
+class GatewayClient(object):
+    def __init__(self):
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+
+    async def connect(self, host: str, port: int) -> None:
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    async def close(self) -> None:
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await asyncio.gather(self._reader_task, return_exceptions=True)
+
+    @property
+    def closed(self) -> bool:
+        return self._reader_task is None or self._reader_task.done()
+
+    # call sends one raw request and returns (status, body)
+    async def call(self, terminal_id, operation: str, fields) -> Tuple[int, Any]:
+        request_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(_frame(msgpack.packb([request_id, terminal_id, operation, fields])))
+        await self._writer.drain()
+        return await future
+
+    # request runs an ATM operation for `terminal_id` and returns its response DTO
+    async def request(self, terminal_id, operation: str, **kwargs):
+        status, body = await self.call(terminal_id, operation, [kwargs[f] for f in OPERATIONS[operation]])
+        if status != 200:
+            return RESPONSES[operation](success=False, message=body)
+        return RESPONSES[operation](*body)
+
+    async def _read_responses(self) -> None:
+        try:
+            while True:
+                (length,) = _HEADER.unpack(await self._reader.readexactly(_HEADER.size))
+                request_id, status, body = msgpack.unpackb(await self._reader.readexactly(length))
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    future.set_result((status, body))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("gateway connection closed"))
+            self._pending.clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ATM terminal gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        gateway = TerminalGateway(
+            host=args.host, port=args.port, max_in_flight=args.max_in_flight, idle_timeout=args.idle_timeout
+        )
+        host, port = await gateway.start()
+        logger.info("terminal gateway listening on %s:%d", host, port)
+        await asyncio.Event().wait()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
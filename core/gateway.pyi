@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import struct
+from typing import Any, Dict, Optional, Set, Tuple
+
+from core.application.async_use_case import AsyncATMUseCase
+
+_HEADER: struct.Struct
+
+def _frame(body: bytes) -> bytes: ...
+
+
+class TerminalGateway(object):
+    use_case: Optional[AsyncATMUseCase]
+    host: str
+    port: int
+    max_in_flight: int
+    idle_timeout: float
+    max_frame_size: int
+    connections: int
+    total_connections: int
+    requests: int
+    _server: Optional[asyncio.AbstractServer]
+    _handlers: Set[asyncio.Task]
+
+    def __init__(
+        self,
+        use_case: AsyncATMUseCase = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_in_flight: int = 64,
+        idle_timeout: float = 300.0,
+        max_frame_size: int = 64 * 1024,
+    ) -> None: ...
+    async def start(self) -> Tuple[str, int]: ...
+    async def stop(self) -> None: ...
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None: ...
+    @staticmethod
+    def _done(task: asyncio.Task, terminal_id: Any, tails: Dict[Any, asyncio.Task], tasks: Set[asyncio.Task],
+              in_flight: asyncio.Semaphore) -> None: ...
+    async def _handle(self, writer: asyncio.StreamWriter, previous: Optional[asyncio.Task], request_id: Any,
+                      terminal_id: Any, operation: Any, fields: Any) -> None: ...
+    async def _dispatch(self, terminal_id: Any, operation: Any, fields: Any) -> Tuple[int, Any]: ...
+
+
+class GatewayClient(object):
+    _reader: Optional[asyncio.StreamReader]
+    _writer: Optional[asyncio.StreamWriter]
+    _reader_task: Optional[asyncio.Task]
+    _pending: Dict[int, asyncio.Future]
+    _next_id: int
+
+    def __init__(self) -> None: ...
+    async def connect(self, host: str, port: int) -> None: ...
+    async def close(self) -> None: ...
+    @property
+    def closed(self) -> bool: ...
+    async def call(self, terminal_id: Any, operation: str, fields: Any) -> Tuple[int, Any]: ...
+    async def request(self, terminal_id: Any, operation: str, **kwargs: Any) -> Any: ...
+    async def _read_responses(self) -> None: ...
+
+def main() -> None: ...
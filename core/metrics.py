@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# In-process metrics: per-operation latency histograms and outcome counters, rendered in the Prometheus text format
+# (see core/views.py for the /metrics endpoint).
+#
+# Recording never takes a lock: every thread writes into its own shard (a plain list reached through a
+# threading.local) and shards are only merged when the metrics are scraped. The shard of a thread that has finished is
+# folded into a single retired total, so memory and scrape cost follow the number of live threads, not of all the
+# threads that ever recorded.
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import functools
+import itertools
+import threading
+import weakref
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _ShardOwner(object):
+    __slots__ = ("__weakref__",)
+
+
+# _Shards hands every thread its own list of `width` counters. The list is kept in a threading.local next to an owner
+# object that nothing else references: when the thread finishes, its thread-local values are dropped, the owner is
+# collected and a weakref.finalize callback adds the shard into `retired` and forgets it.
+class _Shards(object):
+    def __init__(self, width: int):
+        self.width = width
+        self.local = threading.local()
+        self.live: Dict[int, List[int]] = {}
+        self.retired = [0] * width
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self) -> List[int]:
+        shard = [0] * self.width
+        owner = _ShardOwner()
+        key = next(self._ids)
+        with self._lock:
+            self.live[key] = shard
+        weakref.finalize(owner, self._retire, key)
+        self.local.owner = owner
+        self.local.shard = shard
+        return shard
+
+    def _retire(self, key: int) -> None:
+        with self._lock:
+            shard = self.live.pop(key)
+            for i, n in enumerate(shard):
+                self.retired[i] += n
+
+    # merged sums the live shards and the retired total
+    def merged(self) -> List[int]:
+        with self._lock:
+            merged = list(self.retired)
+            shards = list(self.live.values())
+        for shard in shards:
+            for i, n in enumerate(list(shard)):
+                merged[i] += n
+        return merged
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+
+# Histogram keeps HDR-style log-linear buckets of integer microseconds: values below 2 * SUB_BUCKETS have a bucket of
+# their own, above that every power of two is split into SUB_BUCKETS equal buckets (<= 1 / SUB_BUCKETS relative error).
+# Memory is fixed: MAX_VALUE_BITS bits of range need ~ MAX_VALUE_BITS * SUB_BUCKETS counters per thread.
+class Histogram(object):
+    SUB_BUCKET_BITS = 3
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_VALUE_BITS = 36  # ~19 hours in microseconds; larger values are clamped into the last bucket
+    MAX_VALUE = (1 << MAX_VALUE_BITS) - 1
+
+    def __init__(self):
+        self.n_buckets = self.bucket_index(self.MAX_VALUE) + 1
+        self._shards = _Shards(self.n_buckets + 1)  # bucket counts, then the sum of all values
+        self._local = self._shards.local
+
+    @classmethod
+    def bucket_index(cls, value: int) -> int:
+        if value < 2 * cls.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return shift * cls.SUB_BUCKETS + (value >> shift)
+
+    # bucket_upper_bound is the largest value that falls into bucket `index`
+    @classmethod
+    def bucket_upper_bound(cls, index: int) -> int:
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return ((index - shift * cls.SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.add()
+        # bucket_index, inlined with the constants of the default layout: this is the hot path
+        if value < 16:
+            if value < 0:
+                value = 0
+            shard[value] += 1
+        else:
+            if value > 68719476735:  # MAX_VALUE
+                value = 68719476735
+            shift = value.bit_length() - 4
+            shard[(shift << 3) + (value >> shift)] += 1
+        shard[-1] += value
+
+    # snapshot merges all shards into (bucket counts, sum)
+    def snapshot(self) -> Tuple[List[int], int]:
+        merged = self._shards.merged()
+        return merged[:-1], merged[-1]
+
+    @property
+    def count(self) -> int:
+        return sum(self.snapshot()[0])
+
+    # percentile returns the upper bound of the bucket holding the p-th value (0 < p <= 1), in microseconds
+    def percentile(self, p: float) -> int:
+        counts, _ = self.snapshot()
+        rank = max(1, int(round(sum(counts) * p)))
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return self.bucket_upper_bound(i)
+        return 0
+
+
+# Counter is a monotonically increasing count, sharded per thread like Histogram
+class Counter(object):
+    def __init__(self):
+        self._shards = _Shards(1)
+        self._local = self._shards.local
+
+    def inc(self, n: int = 1) -> None:
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._shards.add()
+        shard[0] += n
+
+    @property
+    def value(self) -> int:
+        return self._shards.merged()[0]
+
+
+# MetricsRegistry owns every metric series by (name, labels). Series are created once and cached by the caller, so the
+# registry lock is never on the recording path. The number of series per metric name is capped: label values past
+# `max_series` (e.g. unexpected error messages) are folded into a single "other" series.
+class MetricsRegistry(object):
+    OVERFLOW = "other"
+
+    def __init__(self, max_series: int = 256):
+        self.max_series = max_series
+        self._help: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._series: Dict[str, Dict[Labels, object]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, factory: Callable, name: str, help: str, labels: Dict[str, str]):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(name)
+        if series is not None and key in series:
+            return series[key]
+        with self._lock:
+            self._help.setdefault(name, (kind, help))
+            series = self._series.setdefault(name, {})
+            if key not in series and len(series) >= self.max_series:
+                key = tuple((k, self.OVERFLOW) for k, _ in key)
+            if key not in series:
+                series[key] = factory()
+            return series[key]
+
+    def histogram(self, name: str, help: str, **labels: str) -> Histogram:
+        return self._get("histogram", Histogram, name, help, labels)
+
+    def counter(self, name: str, help: str, **labels: str) -> Counter:
+        return self._get("counter", Counter, name, help, labels)
+
+    # render writes every metric in the Prometheus text exposition format (version 0.0.4). Histograms are exposed in
+    # seconds with one `le` bucket per power of two microseconds, which keeps the series set stable across scrapes.
+    def render(self) -> str:
+        with self._lock:
+            metrics = [(name, self._help[name], dict(series)) for name, series in sorted(self._series.items())]
+
+        lines = []
+        for name, (kind, help), series in metrics:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in sorted(series.items()):
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(key)} {metric.value}")
+                    continue
+                counts, total = metric.snapshot()
+                cumulative, i = 0, 0
+                for bits in range(Histogram.MAX_VALUE_BITS + 1):
+                    bound = 1 << bits
+                    while i < len(counts) and Histogram.bucket_upper_bound(i) <= bound:
+                        cumulative += counts[i]
+                        i += 1
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', repr(bound / 1e6)),))} {cumulative}")
+                cumulative += sum(counts[i:])
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total / 1e6}")
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+REGISTRY = MetricsRegistry()
+
+LATENCY = "atm_operation_latency_seconds"
+OUTCOMES = "atm_operation_total"
+
+
+# _reason turns a response message into the `reason` label. Messages are cut at the first ":" so that details such as
+# the expiration date in "card is expired: 20200101" do not create a series per value.
+def _reason(message: Optional[str]) -> str:
+    return (message or "").split(":", 1)[0]
+
+
+# instrument records the latency of every call to the decorated method and counts its outcomes, labelled by
+# `component`, the method name, `success` and `reason`. Responses are DTOs with `success` / `message`, except for
+# get_auth_key which returns the auth key or None.
+def instrument(component: str, registry: Optional[MetricsRegistry] = None) -> Callable:
+    registry = registry or REGISTRY
+
+    def decorator(fn: Callable) -> Callable:
+        operation = fn.__name__
+        record = registry.histogram(LATENCY, "Latency of ATM operations", component=component, operation=operation).record
+        outcomes: Dict[Tuple[bool, Optional[str]], Counter] = {}  # (success, raw message) -> counter
+
+        def outcome_counter(success: bool, message: Optional[str]) -> Counter:
+            counter = registry.counter(
+                OUTCOMES, "ATM operations by outcome", component=component, operation=operation,
+                success="true" if success else "false", reason=_reason(message),
+            )
+            if len(outcomes) < registry.max_series:
+                outcomes[(success, message)] = counter
+            return counter
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                res = fn(*args, **kwargs)
+            except Exception:
+                record((perf_counter_ns() - start) // 1000)
+                outcome_counter(False, "exception").inc()
+                raise
+            record((perf_counter_ns() - start) // 1000)
+            try:
+                key = (res.success, res.message)
+            except AttributeError:
+                key = (res is not None, None)
+            counter = outcomes.get(key)
+            if counter is None:
+                counter = outcome_counter(*key)
+            counter.inc()
+            return res
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _ShardOwner(object): ...
+
+
+class _Shards(object):
+    width: int
+    local: threading.local
+    live: Dict[int, List[int]]
+    retired: List[int]
+    _ids: Iterator[int]
+    _lock: threading.Lock
+
+    def __init__(self, width: int) -> None: ...
+    def add(self) -> List[int]: ...
+    def _retire(self, key: int) -> None: ...
+    def merged(self) -> List[int]: ...
+    def __len__(self) -> int: ...
+
+
+class Histogram(object):
+    SUB_BUCKET_BITS: int
+    SUB_BUCKETS: int
+    MAX_VALUE_BITS: int
+    MAX_VALUE: int
+    n_buckets: int
+    _shards: _Shards
+    _local: threading.local
+
+    def __init__(self) -> None: ...
+    @classmethod
+    def bucket_index(cls, value: int) -> int: ...
+    @classmethod
+    def bucket_upper_bound(cls, index: int) -> int: ...
+    def record(self, value: int) -> None: ...
+    def snapshot(self) -> Tuple[List[int], int]: ...
+    @property
+    def count(self) -> int: ...
+    def percentile(self, p: float) -> int: ...
+
+
+class Counter(object):
+    _shards: _Shards
+    _local: threading.local
+
+    def __init__(self) -> None: ...
+    def inc(self, n: int = 1) -> None: ...
+    @property
+    def value(self) -> int: ...
+
+
+class MetricsRegistry(object):
+    OVERFLOW: str
+    max_series: int
+    _help: Dict[str, Tuple[str, str]]
+    _series: Dict[str, Dict[Labels, Any]]
+    _lock: threading.Lock
+
+    def __init__(self, max_series: int = 256) -> None: ...
+    def _get(self, kind: str, factory: Callable, name: str, help: str, labels: Dict[str, str]) -> Any: ...
+    def histogram(self, name: str, help: str, **labels: str) -> Histogram: ...
+    def counter(self, name: str, help: str, **labels: str) -> Counter: ...
+    def render(self) -> str: ...
+
+def _format_labels(labels: Labels) -> str: ...
+
+REGISTRY: MetricsRegistry
+LATENCY: str
+OUTCOMES: str
+
+def _reason(message: Optional[str]) -> str: ...
+def instrument(component: str, registry: Optional[MetricsRegistry] = None) -> Callable[[Callable], Callable]: ...
@@ -0,0 +1,16 @@
+from core import views
+
+
+# TerminalApiMiddleware answers terminal requests (/atm/<operation>) itself and returns before the rest of
+# settings.MIDDLEWARE runs, so terminal traffic does not pay for the session, CSRF, auth and messages middleware that
+# only browser (admin) traffic needs. Place it right after SecurityMiddleware.
+class TerminalApiMiddleware(object):
+    prefix = "/atm/"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.prefix):
+            return self.get_response(request)
+        return views.terminal_api(request, request.path_info[len(self.prefix):].strip("/"))
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.10 on 2026-10-17 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankAccount',
+            fields=[
+                ('account_id', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('card_number', models.CharField(max_length=32)),
+                ('balance', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BankAuthKey',
+            fields=[
+                ('auth_key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('card_number', models.CharField(max_length=32)),
+                ('expiration', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BankCredential',
+            fields=[
+                ('card_number', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('secret', models.CharField(max_length=255)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bankaccount',
+            index=models.Index(fields=['card_number', 'account_id'], name='core_account_card_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bankaccount',
+            constraint=models.CheckConstraint(check=models.Q(('balance__gte', 0)), name='core_account_balance_gte_0'),
+        ),
+    ]
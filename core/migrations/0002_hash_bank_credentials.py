@@ -0,0 +1,25 @@
+from argon2 import PasswordHasher
+from django.db import migrations
+
+
+# BankCredential.secret used to hold the plain "pin#cvc#expiration_date" credential: replace every such row by its
+# Argon2id hash (RFC 9106 parameters). Rows that already hold a hash are left as they are. Hashing cannot be undone, so
+# the reverse migration keeps the hashes.
+def hash_plain_credentials(apps, schema_editor):
+    BankCredential = apps.get_model("core", "BankCredential")
+    hasher = PasswordHasher()
+    credentials = BankCredential.objects.using(schema_editor.connection.alias)
+    for credential in credentials.exclude(secret__startswith="$argon2").iterator():
+        credential.secret = hasher.hash(credential.secret)
+        credential.save(update_fields=["secret"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_plain_credentials, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,28 @@
 from django.db import models
 
-# Create your models here.
+
+# Bank-side tables backing DjangoBankRepository (core/repo/django_bank_repo.py)
+
+
+class BankCredential(models.Model):
+    card_number = models.CharField(max_length=32, primary_key=True)
+    # Argon2id hash of the "pin#cvc#expiration_date" credential, never the credential itself (see
+    # DjangoBankRepository.set_credential; rows stored in plain text before that were hashed by migration 0002)
+    secret = models.CharField(max_length=255)
+
+
+class BankAuthKey(models.Model):
+    auth_key = models.CharField(max_length=64, primary_key=True)
+    card_number = models.CharField(max_length=32)
+    expiration = models.BigIntegerField(db_index=True)  # epoch seconds, indexed for expiry sweeps
+
+
+class BankAccount(models.Model):
+    account_id = models.CharField(max_length=64, primary_key=True)
+    card_number = models.CharField(max_length=32)
+    balance = models.BigIntegerField(default=0)
+
+    class Meta:
+        # covers both hot queries: list accounts of a card and (card_number, account_id) point lookups/updates
+        indexes = [models.Index(fields=["card_number", "account_id"], name="core_account_card_idx")]
+        constraints = [models.CheckConstraint(check=models.Q(balance__gte=0), name="core_account_balance_gte_0")]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+import asyncio
+from typing import Optional
+
+import logging
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import FakeBankRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractAsyncBankRepository(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    async def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_accounts(self, auth_key: str) -> GetAccountsRes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
+        raise NotImplementedError
+
+
+# AsyncFakeBankRepository serves the same in-memory data as FakeBankRepository from the event loop. `latency` simulates
+# the bank round trip with asyncio.sleep, so slow bank calls only suspend the awaiting coroutine, never a thread.
+class AsyncFakeBankRepository(AbstractAsyncBankRepository):
+    def __init__(self, bank_repo: FakeBankRepository = None, latency: float = 0.0):
+        self.bank_repo = bank_repo or FakeBankRepository()
+        self.latency = latency
+
+    async def _round_trip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
+        await self._round_trip()
+        return await self.bank_repo.get_auth_key_async(card_data=card_data, pin=pin)
+
+    async def get_accounts(self, auth_key: str) -> GetAccountsRes:
+        await self._round_trip()
+        return self.bank_repo.get_accounts(auth_key=auth_key)
+
+    async def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
+        await self._round_trip()
+        return self.bank_repo.get_balance(auth_key=auth_key, account_id=account_id)
+
+    async def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
+        await self._round_trip()
+        return self.bank_repo.deposit(auth_key=auth_key, account_id=account_id, amount=amount)
+
+    async def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
+        await self._round_trip()
+        return self.bank_repo.withdraw(auth_key=auth_key, account_id=account_id, amount=amount)
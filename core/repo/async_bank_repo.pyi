@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+
+from typing import Optional
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import FakeBankRepository
+
+
+class AbstractAsyncBankRepository(object):
+    __metaclass__ = abc.ABCMeta
+    @abc.abstractmethod
+    async def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    @abc.abstractmethod
+    async def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
+    @abc.abstractmethod
+    async def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
+    @abc.abstractmethod
+    async def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
+    @abc.abstractmethod
+    async def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
+
+class AsyncFakeBankRepository(AbstractAsyncBankRepository):
+    bank_repo: FakeBankRepository
+    latency: float
+
+    def __init__(self, bank_repo: FakeBankRepository = None, latency: float = 0.0) -> None: ...
+    async def _round_trip(self) -> None: ...
+    async def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    async def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
+    async def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
+    async def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
+    async def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+from typing import Optional
+
+import logging
+
+from core.domain.entity import Session, CardData
+from core.repo.session_repo import InMemorySessionRepository
+
+logger = logging.getLogger(__name__)
+
+
+class AbstractAsyncSessionRepository(object):
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    async def get(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_if_valid(self, session_id: str) -> Optional[Session]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def save(self, session: Session) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def create(self, card_data: CardData) -> str:
+        raise NotImplementedError
+
+    async def save_if_valid(self, session: Session) -> bool:
+        if await self.get_if_valid(session_id=session.session_id) is None:
+            return False
+        await self.save(session=session)
+        return True
+
+
+# AsyncInMemorySessionRepository exposes InMemorySessionRepository to coroutines. Every operation is an O(1) in-memory
+# dict operation, so it runs inline on the event loop.
+class AsyncInMemorySessionRepository(AbstractAsyncSessionRepository):
+    def __init__(self, session_repo: InMemorySessionRepository = None):
+        self.session_repo = session_repo or InMemorySessionRepository()
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        return self.session_repo.get(session_id=session_id)
+
+    async def get_if_valid(self, session_id: str) -> Optional[Session]:
+        return self.session_repo.get_if_valid(session_id=session_id)
+
+    async def save(self, session: Session) -> None:
+        self.session_repo.save(session=session)
+
+    async def save_if_valid(self, session: Session) -> bool:
+        return self.session_repo.save_if_valid(session=session)
+
+    async def delete(self, session_id: str) -> bool:
+        return self.session_repo.delete(session_id=session_id)
+
+    async def create(self, card_data: CardData) -> str:
+        return self.session_repo.create(card_data=card_data)
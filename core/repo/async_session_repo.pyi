@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import abc
+
+from typing import Optional
+
+from core.domain.entity import CardData, Session
+from core.repo.session_repo import InMemorySessionRepository
+
+
+class AbstractAsyncSessionRepository(object):
+    __metaclass__ = abc.ABCMeta
+    @abc.abstractmethod
+    async def get(self, session_id: str) -> Optional[Session]: ...
+    @abc.abstractmethod
+    async def get_if_valid(self, session_id: str) -> Optional[Session]: ...
+    @abc.abstractmethod
+    async def save(self, session: Session) -> None: ...
+    @abc.abstractmethod
+    async def delete(self, session_id: str) -> bool: ...
+    @abc.abstractmethod
+    async def create(self, card_data: CardData) -> str: ...
+    async def save_if_valid(self, session: Session) -> bool: ...
+
+class AsyncInMemorySessionRepository(AbstractAsyncSessionRepository):
+    session_repo: InMemorySessionRepository
+
+    def __init__(self, session_repo: InMemorySessionRepository = None) -> None: ...
+    async def get(self, session_id: str) -> Optional[Session]: ...
+    async def get_if_valid(self, session_id: str) -> Optional[Session]: ...
+    async def save(self, session: Session) -> None: ...
+    async def save_if_valid(self, session: Session) -> bool: ...
+    async def delete(self, session_id: str) -> bool: ...
+    async def create(self, card_data: CardData) -> str: ...
@@ -2,15 +2,19 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import abc
+import threading
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional, List
+from collections import OrderedDict
+from typing import Optional, List, Dict, Tuple
 
 
 import logging
 
+from core.clock import Clock, SYSTEM
+from core.repo.credentials import CredentialStore
 from core.domain.entity import Session, CardData
 from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.util import StripedLock
 
 logger = logging.getLogger(__name__)
 
@@ -42,100 +46,133 @@ class AbstractBankRepository(object):
 class FakeBankRepository(AbstractBankRepository):
     SESSION_LIFETIME = 3
 
-    def __init__(self):
-        # can replace with redis
-        self.auth_store = {}  # TODO: replace with sqlite
-        self.session_store = {}
-        self.account_store = {}
+    # auth_key_store replaces the in-process AuthKeyStore, e.g. with a RedisAuthKeyStore shared by all workers.
+    # credential_store holds the Argon2 hashes of the card credentials (auth_store[card_number] = "pin#cvc#expiry" hashes
+    # on write), checked in its verifier's worker pool
+    def __init__(self, max_auth_keys: Optional[int] = None, auth_key_store=None, clock: Clock = None,
+                 credential_store: CredentialStore = None):
+        self.auth_store = credential_store if credential_store is not None else CredentialStore()  # TODO: replace with sqlite
+        self.session_store = auth_key_store if auth_key_store is not None else AuthKeyStore(max_keys=max_auth_keys)
+        self.clock = clock or SYSTEM
+        self.account_store = AccountStore()
+        self.account_locks = StripedLock()  # balance check + update must be atomic per account
+
+    def add_account(self, account: 'Account') -> None:
+        self.account_store.add(account)
 
     def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
-        pw = self.auth_store.get(card_data.card_number, "")
         # For sake of simplicity, validation logic simply cross-checks cvc, pin and expiration date
-        if pw != f"{pin}#{card_data.card_verification_code}#{card_data.expiration_date}":
+        if not self.auth_store.verify(card_data.card_number, _credential(card_data, pin)):
             return None
+        return self.issue_auth_key(card_data.card_number)
 
-        auth_key = str(uuid.uuid1())
-        expiration = int((datetime.now() + timedelta(minutes=self.SESSION_LIFETIME)).timestamp())
+    # get_auth_key_async checks the credential without blocking the event loop (the Argon2 verification runs in the
+    # credential store's worker pool)
+    async def get_auth_key_async(self, card_data: CardData, pin: str) -> Optional[str]:
+        if not await self.auth_store.verify_async(card_data.card_number, _credential(card_data, pin)):
+            return None
+        return self.issue_auth_key(card_data.card_number)
 
-        self.session_store[auth_key] = (expiration, card_data.card_number)
+    # issue_auth_key returns None when the auth key store is full of live keys: the card is refused for now rather than
+    # another customer's session being cut short
+    def issue_auth_key(self, card_number: str) -> Optional[str]:
+        auth_key = str(uuid.uuid1())
+        now = int(self.clock.time())
+        if not self.session_store.add(auth_key, card_number, expiration=now + self.SESSION_LIFETIME * 60, now=now):
+            return None
 
         return auth_key
 
+    # _get_card_number resolves an auth key with a single clock read, shared by the expiry check and the lazy purge
+    def _get_card_number(self, auth_key: str) -> Optional[str]:
+        return self.session_store.get_card_number(auth_key, now=int(self.clock.time()))
+
     def get_accounts(self, auth_key: str) -> GetAccountsRes:
-        expiration, card_number = self.session_store.get(auth_key, (0, ""))
-        if expiration < int(datetime.now().timestamp()):
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
             return GetAccountsRes(success=False, message="Auth key expired")
 
-        accounts: List[Account] = self.account_store.get(card_number, [])
-        return GetAccountsRes(success=True, message="Retrieved account ids", account_ids=[a.account_id for a in accounts])
+        return GetAccountsRes(
+            success=True,
+            message="Retrieved account ids",
+            account_ids=self.account_store.get_account_ids(card_number)
+        )
 
     def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
-        expiration, card_number = self.session_store.get(auth_key, (0, ""))
-        if expiration < int(datetime.now().timestamp()):
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
             return GetBankBalanceRes(success=False, account_id=account_id, message="Auth key expired")
 
-        accounts: List[Account] = self.account_store.get(card_number, [])
-        # TODO: use better storage solution as this is O(n) - suboptimal performance
-        for a in accounts:
-            if a.account_id == account_id:
-                return GetBankBalanceRes(
-                    success=True,
-                    message="Retrieved account balance",
-                    account_id=account_id,
-                    balance=a.balance
-                )
+        a = self.account_store.get(card_number, account_id)
+        if a is None:
+            return GetBankBalanceRes(success=False, account_id=account_id, message="Account not found")
 
-        return GetBankBalanceRes(success=False, account_id=account_id, message="Account not found")
+        return GetBankBalanceRes(
+            success=True,
+            message="Retrieved account balance",
+            account_id=account_id,
+            balance=a.balance
+        )
 
     def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
         # TODO: move the session_store logic to middleware / annotation-based (cross-cutting concern)
-        expiration, card_number = self.session_store.get(auth_key, (0, ""))
-        if expiration < int(datetime.now().timestamp()):
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
             return BankDepositRes(success=False, account_id=account_id, message="Auth key expired")
 
-        accounts: List[Account] = self.account_store.get(card_number, [])
-        for a in accounts:
-            if a.account_id == account_id:
-                a.balance += amount
-                # later when in DB, remember to commit
+        a = self.account_store.get(card_number, account_id)
+        if a is None:
+            return BankDepositRes(success=False, account_id=account_id, message="Account not found")
 
-                return BankDepositRes(
-                    success=True,
-                    message="Deposit successful",
-                    account_id=account_id,
-                    balance=a.balance
-                )
-        return BankDepositRes(success=False, account_id=account_id, message="Account not found")
+        with self.account_locks.get(account_id):
+            a.balance += amount
+            balance = a.balance
+        # later when in DB, remember to commit
+
+        return BankDepositRes(
+            success=True,
+            message="Deposit successful",
+            account_id=account_id,
+            balance=balance
+        )
 
     def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
-        expiration, card_number = self.session_store.get(auth_key, (0, ""))
-        if expiration < int(datetime.now().timestamp()):
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
             return BankWithdrawRes(success=False, account_id=account_id, message="Auth key expired")
 
-        accounts: List[Account] = self.account_store.get(card_number, [])
-        for a in accounts:
-            if a.account_id == account_id:
-                if a.balance < amount:
-                    return BankWithdrawRes(
-                        success=False,
-                        message="Insufficient balance",
-                        account_id=account_id,
-                        balance=a.balance
-                    )
-
-                a.balance -= amount
-                # later when in DB, remember to commit
+        a = self.account_store.get(card_number, account_id)
+        if a is None:
+            return BankWithdrawRes(success=False, account_id=account_id, message="Account not found")
 
+        with self.account_locks.get(account_id):
+            if a.balance < amount:
                 return BankWithdrawRes(
-                    success=True,
-                    message="Withdraw successful",
+                    success=False,
+                    message="Insufficient balance",
                     account_id=account_id,
                     balance=a.balance
                 )
-        return BankWithdrawRes(success=False, account_id=account_id, message="Account not found")
+
+            a.balance -= amount
+            balance = a.balance
+        # later when in DB, remember to commit
+
+        return BankWithdrawRes(
+            success=True,
+            message="Withdraw successful",
+            account_id=account_id,
+            balance=balance
+        )
+
+
+def _credential(card_data: CardData, pin: str) -> str:
+    return f"{pin}#{card_data.card_verification_code}#{card_data.expiration_date}"
 
 
 class Account(object):
+    __slots__ = ("account_id", "card_number", "balance")
+
     account_id: str
     card_number: str
     balance: int
@@ -151,3 +188,93 @@ class Account(object):
 
     def to_dict(self):
         return {"account_id": self.account_id, "card_number": self.card_number, "balance": self.balance}
+
+
+# AccountStore keeps accounts keyed both by account id and by card number so that every lookup on the bank side is
+# O(1) regardless of how many accounts are linked to a card.
+class AccountStore(object):
+    def __init__(self) -> None:
+        self._by_id: Dict[str, Account] = {}
+        self._by_card: Dict[str, Dict[str, Account]] = {}  # card_number -> {account_id: Account}, insertion ordered
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, account: Account) -> None:
+        prev = self._by_id.get(account.account_id)
+        if prev is not None and prev.card_number != account.card_number:
+            del self._by_card[prev.card_number][prev.account_id]
+
+        self._by_id[account.account_id] = account
+        self._by_card.setdefault(account.card_number, {})[account.account_id] = account
+
+    def remove(self, account_id: str) -> Optional[Account]:
+        account = self._by_id.pop(account_id, None)
+        if account is not None:
+            del self._by_card[account.card_number][account_id]
+        return account
+
+    def get_by_id(self, account_id: str) -> Optional[Account]:
+        return self._by_id.get(account_id)
+
+    # get only returns the account if it is linked to the given card (i.e. an auth key cannot reach other cards' accounts)
+    def get(self, card_number: str, account_id: str) -> Optional[Account]:
+        return self._by_card.get(card_number, {}).get(account_id)
+
+    def get_accounts(self, card_number: str) -> List[Account]:
+        return list(self._by_card.get(card_number, {}).values())
+
+    def get_account_ids(self, card_number: str) -> List[str]:
+        return list(self._by_card.get(card_number, {}))
+
+
+# AuthKeyStore maps issued auth keys to their card number until they expire. Every key is issued with the same
+# lifetime, so insertion order is also expiry order and expired keys are purged from the front in amortized O(1):
+# lazily when an expired key is looked up, and periodically (at most every `sweep_interval` seconds) on insert.
+# `max_keys` bounds the store even when keys are issued faster than they expire: a full store first purges every expired
+# key, and if it is still full, add refuses the new key (returns False) rather than dropping a live one.
+class AuthKeyStore(object):
+    def __init__(self, max_keys: Optional[int] = None, sweep_interval: int = 1) -> None:
+        self._store: Dict[str, Tuple[int, str]] = OrderedDict()  # auth_key -> (expiration, card_number)
+        self._lock = threading.Lock()
+        self._next_sweep = 0
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def add(self, auth_key: str, card_number: str, expiration: int, now: int) -> bool:
+        with self._lock:
+            full = self.max_keys is not None and len(self._store) >= self.max_keys
+            if full or now >= self._next_sweep:
+                self._sweep(now)
+                self._next_sweep = now + self.sweep_interval
+            if self.max_keys is not None and len(self._store) >= self.max_keys:
+                return False
+            self._store[auth_key] = (expiration, card_number)
+            return True
+
+    def get_card_number(self, auth_key: str, now: int) -> Optional[str]:
+        expiration, card_number = self._store.get(auth_key, (0, ""))
+        if expiration < now:
+            if expiration:
+                with self._lock:
+                    self._store.pop(auth_key, None)
+            return None
+        return card_number
+
+    def sweep(self, now: int) -> int:
+        with self._lock:
+            return self._sweep(now)
+
+    # must be called with self._lock held
+    def _sweep(self, now: int) -> int:
+        purged = 0
+        while self._store:
+            expiration, _ = next(iter(self._store.values()))
+            if expiration >= now:
+                break
+            self._store.popitem(last=False)
+            purged += 1
+        return purged
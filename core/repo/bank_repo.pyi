@@ -2,11 +2,15 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import abc
+import threading
 
 from typing import Dict, Optional, Tuple, List, Any
 
+from core.clock import Clock
 from core.domain.entity import CardData, Session
 from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.credentials import CredentialStore
+from core.util import StripedLock
 
 
 class AbstractBankRepository(object):
@@ -28,19 +32,29 @@ class AbstractBankRepository(object):
     # def create(self, card_data: CardData) -> str: ...
 
 class FakeBankRepository(AbstractBankRepository):
-    auth_store: Dict[str, str]
-    session_store: Dict[str, Tuple[int, str]]
-    account_store: Dict[str, List[Account]]
+    auth_store: CredentialStore
+    session_store: AuthKeyStore
+    account_store: AccountStore
+    account_locks: StripedLock
+    clock: Clock
     SESSION_LIFETIME: int
 
-    def __init__(self) -> None: ...
+    def __init__(self, max_auth_keys: Optional[int] = None, auth_key_store: Optional[AuthKeyStore] = None,
+                 clock: Clock = None, credential_store: CredentialStore = None) -> None: ...
+    def add_account(self, account: Account) -> None: ...
     def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    async def get_auth_key_async(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    def issue_auth_key(self, card_number: str) -> Optional[str]: ...
+    def _get_card_number(self, auth_key: str) -> Optional[str]: ...
     def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
     def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
     def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
     def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
 
 
+def _credential(card_data: CardData, pin: str) -> str: ...
+
+
 class Account(object):
     account_id: str
     card_number: str
@@ -50,4 +64,33 @@ class Account(object):
         ...
     @classmethod
     def from_dict(cls, d: dict) -> Account: ...
-    def to_dict(self) -> Dict[str, Any]: ...
\ No newline at end of file
+    def to_dict(self) -> Dict[str, Any]: ...
+
+
+class AccountStore(object):
+    _by_id: Dict[str, Account]
+    _by_card: Dict[str, Dict[str, Account]]
+
+    def __init__(self) -> None: ...
+    def __len__(self) -> int: ...
+    def add(self, account: Account) -> None: ...
+    def remove(self, account_id: str) -> Optional[Account]: ...
+    def get_by_id(self, account_id: str) -> Optional[Account]: ...
+    def get(self, card_number: str, account_id: str) -> Optional[Account]: ...
+    def get_accounts(self, card_number: str) -> List[Account]: ...
+    def get_account_ids(self, card_number: str) -> List[str]: ...
+
+
+class AuthKeyStore(object):
+    _store: Dict[str, Tuple[int, str]]
+    _lock: threading.Lock
+    _next_sweep: int
+    max_keys: Optional[int]
+    sweep_interval: int
+
+    def __init__(self, max_keys: Optional[int] = None, sweep_interval: int = 1) -> None: ...
+    def __len__(self) -> int: ...
+    def add(self, auth_key: str, card_number: str, expiration: int, now: int) -> bool: ...
+    def get_card_number(self, auth_key: str, now: int) -> Optional[str]: ...
+    def sweep(self, now: int) -> int: ...
+    def _sweep(self, now: int) -> int: ...
\ No newline at end of file
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import logging
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository
+
+logger = logging.getLogger(__name__)
+
+
+# BankHttpServer is a local stand-in for the bank API: it serves a FakeBankRepository over HTTP/1.1 (keep-alive) using
+# the JSON protocol spoken by HttpBankRepository. Used by tests and benchmarks only.
+#
+#     POST /auth_key {"card_data": {...}, "pin": "..."}          -> {"auth_key": "..." | null}
+#     POST /accounts {"auth_key": "..."}                         -> GetAccountsRes
+#     POST /balance  {"auth_key": "...", "account_id": "..."}    -> GetBankBalanceRes
+#     POST /deposit  {"auth_key": "...", "account_id": "...", "amount": 1}  -> BankDepositRes
+#     POST /withdraw {"auth_key": "...", "account_id": "...", "amount": 1}  -> BankWithdrawRes
+class BankHttpServer(object):
+    def __init__(self, bank_repo: FakeBankRepository = None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.bank_repo = bank_repo or FakeBankRepository()
+        self.latency = latency
+        self.fail_next = 0  # answer the next n requests with fail_status (fault injection)
+        self.fail_status = 503
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bank-http-server", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def handle(self, path: str, payload: dict):
+        with self._lock:
+            self.requests += 1
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return self.fail_status, {"message": "Bank unavailable"}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        repo = self.bank_repo
+        if path == "/auth_key":
+            return 200, {"auth_key": repo.get_auth_key(card_data=CardData.from_dict(payload["card_data"]), pin=payload["pin"])}
+        if path == "/accounts":
+            return 200, repo.get_accounts(auth_key=payload["auth_key"]).__dict__
+        if path == "/balance":
+            return 200, repo.get_balance(auth_key=payload["auth_key"], account_id=payload["account_id"]).__dict__
+        if path == "/deposit":
+            return 200, repo.deposit(auth_key=payload["auth_key"], account_id=payload["account_id"], amount=payload["amount"]).__dict__
+        if path == "/withdraw":
+            return 200, repo.withdraw(auth_key=payload["auth_key"], account_id=payload["account_id"], amount=payload["amount"]).__dict__
+        return 404, {"message": f"unknown path: {path}"}
+
+
+def _make_handler(server: BankHttpServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes; avoid the Nagle/delayed-ACK stall
+
+        def setup(self):
+            super().setup()
+            with server._lock:
+                server.connections += 1
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            status, data = server.handle(self.path, payload)
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
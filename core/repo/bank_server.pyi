@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, Type
+
+from core.repo.bank_repo import FakeBankRepository
+
+
+class BankHttpServer(object):
+    bank_repo: FakeBankRepository
+    latency: float
+    fail_next: int
+    fail_status: int
+    connections: int
+    requests: int
+    _lock: threading.Lock
+    _server: ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, bank_repo: FakeBankRepository = None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> None: ...
+    @property
+    def base_url(self) -> str: ...
+    def start(self) -> str: ...
+    def stop(self) -> None: ...
+    def handle(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]: ...
+
+def _make_handler(server: BankHttpServer) -> Type[BaseHTTPRequestHandler]: ...
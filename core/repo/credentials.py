@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import logging
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from argon2.profiles import CHEAPEST
+
+logger = logging.getLogger(__name__)
+
+_verifier = PasswordHasher()  # verify reads the parameters from the hash, so one hasher checks hashes of any strength
+
+
+# verify_credential checks a secret against its Argon2 hash. Module level, so that it can run in a worker process
+def verify_credential(credential_hash: str, secret: str) -> bool:
+    try:
+        return _verifier.verify(credential_hash, secret)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+# CredentialVerifier runs Argon2 verifications in a pool of `workers` threads (or processes), so that a verification,
+# which costs milliseconds of CPU and `memory_cost` KiB of RAM, runs outside the request thread / event loop, and at
+# most `workers` of them run at once however many requests are waiting. argon2-cffi releases the GIL while hashing, so
+# threads verify in parallel; processes add isolation (and pickling) on top.
+class CredentialVerifier(object):
+    def __init__(self, workers: Optional[int] = None, processes: bool = False):
+        self.workers = workers or os.cpu_count() or 1
+        self.processes = processes
+        if processes:
+            self._executor: Executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="credential-verify")
+
+    def verify(self, credential_hash: str, secret: str) -> bool:
+        return self._executor.submit(verify_credential, credential_hash, secret).result()
+
+    async def verify_async(self, credential_hash: str, secret: str) -> bool:
+        return await asyncio.wrap_future(self._executor.submit(verify_credential, credential_hash, secret))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+_default_verifier: Optional[CredentialVerifier] = None
+_default_verifier_lock = threading.Lock()
+
+
+# default_verifier is the thread pool (one worker per CPU) shared by the credential stores that are not given their own
+def default_verifier() -> CredentialVerifier:
+    global _default_verifier
+    if _default_verifier is None:
+        with _default_verifier_lock:
+            if _default_verifier is None:
+                _default_verifier = CredentialVerifier()
+    return _default_verifier
+
+
+# CredentialStore keeps each card's credential ("pin#cvc#expiration_date") as an Argon2id hash, never the credential
+# itself. Writes hash with `hasher` (default: the cheapest Argon2 parameters, for the fake bank in tests and benchmarks;
+# pass PasswordHasher() for RFC 9106 strength), and checks are run by `verifier`. An unknown card is checked against a
+# dummy hash, so it costs as much as a wrong PIN and card numbers cannot be probed by timing.
+class CredentialStore(object):
+    def __init__(self, hasher: PasswordHasher = None, verifier: CredentialVerifier = None):
+        self.hasher = hasher or PasswordHasher.from_parameters(CHEAPEST)
+        self._verifier = verifier
+        self._hashes: Dict[str, str] = {}
+        self._dummy_hash = self.hasher.hash(str(uuid.uuid4()))
+
+    @property
+    def verifier(self) -> CredentialVerifier:
+        return self._verifier or default_verifier()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, card_number: str) -> bool:
+        return card_number in self._hashes
+
+    def __setitem__(self, card_number: str, secret: str) -> None:
+        self._hashes[card_number] = self.hasher.hash(secret)
+
+    def __delitem__(self, card_number: str) -> None:
+        del self._hashes[card_number]
+
+    def get_hash(self, card_number: str) -> Optional[str]:
+        return self._hashes.get(card_number)
+
+    def verify(self, card_number: str, secret: str) -> bool:
+        return self.verify_hash(self._hashes.get(card_number), secret)
+
+    async def verify_async(self, card_number: str, secret: str) -> bool:
+        return await self.verify_hash_async(self._hashes.get(card_number), secret)
+
+    # verify_hash checks a secret against a hash kept elsewhere (e.g. a database row, see DjangoBankRepository); None
+    # stands for an unknown card
+    def verify_hash(self, credential_hash: Optional[str], secret: str) -> bool:
+        ok = self.verifier.verify(credential_hash or self._dummy_hash, secret)
+        return ok and credential_hash is not None
+
+    async def verify_hash_async(self, credential_hash: Optional[str], secret: str) -> bool:
+        ok = await self.verifier.verify_async(credential_hash or self._dummy_hash, secret)
+        return ok and credential_hash is not None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import threading
+from concurrent.futures import Executor
+from typing import Dict, Optional
+
+from argon2 import PasswordHasher
+
+_verifier: PasswordHasher
+
+def verify_credential(credential_hash: str, secret: str) -> bool: ...
+
+
+class CredentialVerifier(object):
+    workers: int
+    processes: bool
+    _executor: Executor
+    def __init__(self, workers: Optional[int] = None, processes: bool = False) -> None: ...
+    def verify(self, credential_hash: str, secret: str) -> bool: ...
+    async def verify_async(self, credential_hash: str, secret: str) -> bool: ...
+    def shutdown(self) -> None: ...
+
+
+_default_verifier: Optional[CredentialVerifier]
+_default_verifier_lock: threading.Lock
+
+def default_verifier() -> CredentialVerifier: ...
+
+
+class CredentialStore(object):
+    hasher: PasswordHasher
+    _verifier: Optional[CredentialVerifier]
+    _hashes: Dict[str, str]
+    _dummy_hash: str
+    def __init__(self, hasher: PasswordHasher = None, verifier: CredentialVerifier = None) -> None: ...
+    @property
+    def verifier(self) -> CredentialVerifier: ...
+    def __len__(self) -> int: ...
+    def __contains__(self, card_number: str) -> bool: ...
+    def __setitem__(self, card_number: str, secret: str) -> None: ...
+    def __delitem__(self, card_number: str) -> None: ...
+    def get_hash(self, card_number: str) -> Optional[str]: ...
+    def verify(self, card_number: str, secret: str) -> bool: ...
+    async def verify_async(self, card_number: str, secret: str) -> bool: ...
+    def verify_hash(self, credential_hash: Optional[str], secret: str) -> bool: ...
+    async def verify_hash_async(self, credential_hash: Optional[str], secret: str) -> bool: ...
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import uuid
+from typing import Optional
+
+import logging
+
+from argon2 import PasswordHasher
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+
+from core.clock import Clock, SYSTEM
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.models import BankAccount, BankAuthKey, BankCredential
+from core.repo.bank_repo import AbstractBankRepository, _credential
+from core.repo.credentials import CredentialStore
+
+logger = logging.getLogger(__name__)
+
+
+# DjangoBankRepository is the persistent counterpart of FakeBankRepository: credentials, auth keys and balances live
+# in the core_bank* tables. Balance mutations are a single conditional UPDATE so concurrent workers (or processes)
+# can never lose an update or overdraw an account. Credentials are stored as Argon2 hashes made with
+# `credential_store`'s hasher (default: RFC 9106 parameters, the strength migration 0002 hashed existing rows with),
+# and checked in its verifier's worker pool (see core/repo/credentials.py).
+class DjangoBankRepository(AbstractBankRepository):
+    SESSION_LIFETIME = 3
+
+    def __init__(self, using: str = "default", clock: Clock = None, credential_store: CredentialStore = None):
+        self.using = using
+        self.clock = clock or SYSTEM
+        if credential_store is None:
+            credential_store = CredentialStore(hasher=PasswordHasher())
+        self.credential_store = credential_store
+
+    def add_account(self, account_id: str, card_number: str, balance: int = 0) -> None:
+        BankAccount.objects.using(self.using).update_or_create(
+            account_id=account_id, defaults=dict(card_number=card_number, balance=balance)
+        )
+
+    def set_credential(self, card_number: str, secret: str) -> None:
+        BankCredential.objects.using(self.using).update_or_create(
+            card_number=card_number, defaults=dict(secret=self.credential_store.hasher.hash(secret))
+        )
+
+    def purge_expired_auth_keys(self) -> int:
+        deleted, _ = BankAuthKey.objects.using(self.using).filter(expiration__lt=int(self.clock.time())).delete()
+        return deleted
+
+    def _get_credential_hash(self, card_number: str) -> Optional[str]:
+        return BankCredential.objects.using(self.using).filter(
+            card_number=card_number
+        ).values_list("secret", flat=True).first()
+
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
+        credential_hash = self._get_credential_hash(card_data.card_number)
+        # For sake of simplicity, validation logic simply cross-checks cvc, pin and expiration date
+        if not self.credential_store.verify_hash(credential_hash, _credential(card_data, pin)):
+            return None
+        return self.issue_auth_key(card_data.card_number)
+
+    # get_auth_key_async checks the credential without blocking the event loop: the queries run in Django's
+    # sync_to_async thread and the Argon2 verification in the credential store's worker pool
+    async def get_auth_key_async(self, card_data: CardData, pin: str) -> Optional[str]:
+        credential_hash = await sync_to_async(self._get_credential_hash)(card_data.card_number)
+        if not await self.credential_store.verify_hash_async(credential_hash, _credential(card_data, pin)):
+            return None
+        return await sync_to_async(self.issue_auth_key)(card_data.card_number)
+
+    def issue_auth_key(self, card_number: str) -> str:
+        auth_key = str(uuid.uuid1())
+        expiration = int(self.clock.time()) + self.SESSION_LIFETIME * 60
+        BankAuthKey.objects.using(self.using).create(
+            auth_key=auth_key, card_number=card_number, expiration=expiration
+        )
+
+        return auth_key
+
+    def _get_card_number(self, auth_key: str) -> Optional[str]:
+        return BankAuthKey.objects.using(self.using).filter(
+            auth_key=auth_key, expiration__gte=int(self.clock.time())
+        ).values_list("card_number", flat=True).first()
+
+    def get_accounts(self, auth_key: str) -> GetAccountsRes:
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
+            return GetAccountsRes(success=False, message="Auth key expired")
+
+        account_ids = list(
+            BankAccount.objects.using(self.using).filter(
+                card_number=card_number
+            ).order_by("account_id").values_list("account_id", flat=True)
+        )
+        return GetAccountsRes(success=True, message="Retrieved account ids", account_ids=account_ids)
+
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
+            return GetBankBalanceRes(success=False, account_id=account_id, message="Auth key expired")
+
+        balance = BankAccount.objects.using(self.using).filter(
+            card_number=card_number, account_id=account_id
+        ).values_list("balance", flat=True).first()
+        if balance is None:
+            return GetBankBalanceRes(success=False, account_id=account_id, message="Account not found")
+
+        return GetBankBalanceRes(
+            success=True,
+            message="Retrieved account balance",
+            account_id=account_id,
+            balance=balance
+        )
+
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
+            return BankDepositRes(success=False, account_id=account_id, message="Auth key expired")
+
+        with transaction.atomic(using=self.using):
+            # the UPDATE comes first so the row (sqlite: database) write lock is held before the balance is read back
+            accounts = BankAccount.objects.using(self.using).filter(card_number=card_number, account_id=account_id)
+            if not accounts.update(balance=F("balance") + amount):
+                return BankDepositRes(success=False, account_id=account_id, message="Account not found")
+            balance = accounts.values_list("balance", flat=True).get()
+
+        return BankDepositRes(
+            success=True,
+            message="Deposit successful",
+            account_id=account_id,
+            balance=balance
+        )
+
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
+        card_number = self._get_card_number(auth_key)
+        if card_number is None:
+            return BankWithdrawRes(success=False, account_id=account_id, message="Auth key expired")
+
+        with transaction.atomic(using=self.using):
+            # balance check and decrement happen in one statement, so there is no window for an overdraft
+            accounts = BankAccount.objects.using(self.using).filter(card_number=card_number, account_id=account_id)
+            updated = accounts.filter(balance__gte=amount).update(balance=F("balance") - amount)
+            balance = accounts.values_list("balance", flat=True).first()
+
+        if balance is None:
+            return BankWithdrawRes(success=False, account_id=account_id, message="Account not found")
+
+        if not updated:
+            return BankWithdrawRes(
+                success=False,
+                message="Insufficient balance",
+                account_id=account_id,
+                balance=balance
+            )
+
+        return BankWithdrawRes(
+            success=True,
+            message="Withdraw successful",
+            account_id=account_id,
+            balance=balance
+        )
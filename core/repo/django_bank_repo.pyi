@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Optional
+
+from core.clock import Clock
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import AbstractBankRepository
+from core.repo.credentials import CredentialStore
+
+
+class DjangoBankRepository(AbstractBankRepository):
+    SESSION_LIFETIME: int
+    using: str
+    clock: Clock
+    credential_store: CredentialStore
+
+    def __init__(self, using: str = "default", clock: Clock = None, credential_store: CredentialStore = None) -> None: ...
+    def add_account(self, account_id: str, card_number: str, balance: int = 0) -> None: ...
+    def set_credential(self, card_number: str, secret: str) -> None: ...
+    def purge_expired_auth_keys(self) -> int: ...
+    def _get_credential_hash(self, card_number: str) -> Optional[str]: ...
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    async def get_auth_key_async(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    def issue_auth_key(self, card_number: str) -> str: ...
+    def _get_card_number(self, auth_key: str) -> Optional[str]: ...
+    def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
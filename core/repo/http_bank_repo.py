@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import dataclasses
+import functools
+import random
+import time
+from typing import Any, FrozenSet, Optional, Tuple
+
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import AbstractBankRepository
+from core.util import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _field_names(res_type: type) -> FrozenSet[str]:
+    return frozenset(f.name for f in dataclasses.fields(res_type))
+
+
+class BankUnavailableError(Exception):
+    pass
+
+
+# HttpBankRepository talks to a bank API over HTTP (see core/repo/bank_server.py for the protocol).
+# - connections are kept alive and pooled (one requests.Session shared by all threads)
+# - every call has a (connect, read) timeout
+# - failed calls are retried up to `max_retries` times with exponential backoff and full jitter. Deposits and withdrawals
+#   are only retried when the request never reached the bank (connect failures), since replaying them is not safe
+# - a circuit breaker fails calls fast while the bank is down instead of tying up a thread per timeout
+class HttpBankRepository(AbstractBankRepository):
+    UNAVAILABLE = "Bank unavailable"
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float] = (0.5, 2.0),
+        max_retries: int = 2,
+        backoff: float = 0.05,
+        pool_size: int = 10,
+        circuit_breaker: CircuitBreaker = None,
+        reuse_connections: bool = True,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.reuse_connections = reuse_connections
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.http.close()
+
+    def _post_once(self, path: str, payload: dict) -> dict:
+        headers = None if self.reuse_connections else {"Connection": "close"}
+        r = self.http.post(self.base_url + path, json=payload, timeout=self.timeout, headers=headers)
+        if r.status_code >= 500:
+            raise BankUnavailableError(f"{path}: HTTP {r.status_code}")
+        r.raise_for_status()
+        return r.json()
+
+    # _post returns the bank's JSON object, or the `res_type` DTO built from it when one is given: fields the DTO does not
+    # know are ignored (the bank may add some), and an object the DTO cannot be built from is a malformed response
+    def _post(self, path: str, payload: dict, idempotent: bool = True, res_type: type = None) -> Optional[Any]:
+        if not self.circuit_breaker.allow():
+            return None
+
+        # every call let through settles the breaker, or a half-open trial call that ends any other way would leave it
+        # half-open for good: a 4xx means the bank is up and answering (success), a 5xx, a timeout or a body that is not
+        # a JSON object means it is not (failure)
+        attempt = 0
+        try:
+            while True:
+                try:
+                    data = self._post_once(path, payload)
+                except (requests.ConnectionError, requests.Timeout, BankUnavailableError) as e:
+                    if attempt >= self.max_retries or (not idempotent and self._maybe_sent(e)):
+                        logger.warning("bank call failed: %s (attempt %d)", e, attempt + 1)
+                        self.circuit_breaker.record_failure()
+                        return None
+                    time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+                    attempt += 1
+                    continue
+                except requests.HTTPError as e:
+                    logger.warning("bank rejected the call: %s", e)
+                    self.circuit_breaker.record_success()
+                    return None
+                except ValueError as e:
+                    logger.warning("bank sent a malformed response: %s: %s", path, e)
+                    self.circuit_breaker.record_failure()
+                    return None
+                try:
+                    if not isinstance(data, dict):
+                        raise TypeError("not a JSON object")
+                    if res_type is not None:
+                        fields = _field_names(res_type)
+                        data = res_type(**{k: v for k, v in data.items() if k in fields})
+                except TypeError as e:
+                    logger.warning("bank sent a malformed response: %s: %s: %r", path, e, data)
+                    self.circuit_breaker.record_failure()
+                    return None
+                self.circuit_breaker.record_success()
+                return data
+        except BaseException:
+            self.circuit_breaker.record_failure()
+            raise
+
+    # only a failure to establish the connection guarantees that the bank never saw the request
+    @staticmethod
+    def _maybe_sent(e: Exception) -> bool:
+        if isinstance(e, requests.ConnectTimeout):
+            return False
+        if isinstance(e, requests.ConnectionError):
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            return not isinstance(reason, NewConnectionError)
+        return True
+
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
+        data = self._post("/auth_key", {"card_data": card_data.to_dict(), "pin": pin})
+        if data is None:
+            return None
+        return data.get("auth_key")
+
+    def get_accounts(self, auth_key: str) -> GetAccountsRes:
+        res = self._post("/accounts", {"auth_key": auth_key}, res_type=GetAccountsRes)
+        if res is None:
+            return GetAccountsRes(success=False, message=self.UNAVAILABLE)
+        return res
+
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
+        res = self._post("/balance", {"auth_key": auth_key, "account_id": account_id}, res_type=GetBankBalanceRes)
+        if res is None:
+            return GetBankBalanceRes(success=False, account_id=account_id, message=self.UNAVAILABLE)
+        return res
+
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
+        payload = {"auth_key": auth_key, "account_id": account_id, "amount": amount}
+        res = self._post("/deposit", payload, idempotent=False, res_type=BankDepositRes)
+        if res is None:
+            return BankDepositRes(success=False, account_id=account_id, message=self.UNAVAILABLE)
+        return res
+
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
+        payload = {"auth_key": auth_key, "account_id": account_id, "amount": amount}
+        res = self._post("/withdraw", payload, idempotent=False, res_type=BankWithdrawRes)
+        if res is None:
+            return BankWithdrawRes(success=False, account_id=account_id, message=self.UNAVAILABLE)
+        return res
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+import requests
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import AbstractBankRepository
+from core.util import CircuitBreaker
+
+
+def _field_names(res_type: type) -> FrozenSet[str]: ...
+
+class BankUnavailableError(Exception): ...
+
+class HttpBankRepository(AbstractBankRepository):
+    UNAVAILABLE: str
+    base_url: str
+    timeout: Tuple[float, float]
+    max_retries: int
+    backoff: float
+    circuit_breaker: CircuitBreaker
+    reuse_connections: bool
+    http: requests.Session
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Tuple[float, float] = (0.5, 2.0),
+        max_retries: int = 2,
+        backoff: float = 0.05,
+        pool_size: int = 10,
+        circuit_breaker: CircuitBreaker = None,
+        reuse_connections: bool = True,
+    ) -> None: ...
+    def close(self) -> None: ...
+    def _post_once(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]: ...
+    def _post(self, path: str, payload: Dict[str, Any], idempotent: bool = True, res_type: type = None) -> Optional[Any]: ...
+    @staticmethod
+    def _maybe_sent(e: Exception) -> bool: ...
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Optional
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.metrics import instrument
+from core.repo.bank_repo import AbstractBankRepository
+
+
+# MeteredBankRepository wraps any bank repository and records the latency and outcome of every bank call
+# (component="bank" in core.metrics), whatever the transport behind it
+class MeteredBankRepository(AbstractBankRepository):
+    def __init__(self, bank_repo: AbstractBankRepository):
+        self.bank_repo = bank_repo
+
+    @instrument("bank")
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]:
+        return self.bank_repo.get_auth_key(card_data=card_data, pin=pin)
+
+    @instrument("bank")
+    def get_accounts(self, auth_key: str) -> GetAccountsRes:
+        return self.bank_repo.get_accounts(auth_key=auth_key)
+
+    @instrument("bank")
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes:
+        return self.bank_repo.get_balance(auth_key=auth_key, account_id=account_id)
+
+    @instrument("bank")
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes:
+        return self.bank_repo.deposit(auth_key=auth_key, account_id=account_id, amount=amount)
+
+    @instrument("bank")
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes:
+        return self.bank_repo.withdraw(auth_key=auth_key, account_id=account_id, amount=amount)
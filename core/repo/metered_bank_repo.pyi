@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Optional
+
+from core.domain.entity import CardData
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.repo.bank_repo import AbstractBankRepository
+
+
+class MeteredBankRepository(AbstractBankRepository):
+    bank_repo: AbstractBankRepository
+
+    def __init__(self, bank_repo: AbstractBankRepository) -> None: ...
+    def get_auth_key(self, card_data: CardData, pin: str) -> Optional[str]: ...
+    def get_accounts(self, auth_key: str) -> GetAccountsRes: ...
+    def get_balance(self, auth_key: str, account_id: str) -> GetBankBalanceRes: ...
+    def deposit(self, auth_key: str, account_id: str, amount: int) -> BankDepositRes: ...
+    def withdraw(self, auth_key: str, account_id: str, amount: int) -> BankWithdrawRes: ...
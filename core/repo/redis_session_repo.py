@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import uuid
+from typing import Optional
+
+import logging
+
+import redis
+
+from core.clock import Clock, SYSTEM
+from core.domain.entity import Session, CardData
+from core.repo.session_repo import AbstractSessionRepository, pack_session, unpack_session
+
+logger = logging.getLogger(__name__)
+
+
+def _client(url: str, max_connections: int) -> redis.Redis:
+    return redis.Redis(connection_pool=redis.ConnectionPool.from_url(url, max_connections=max_connections))
+
+
+# RedisSessionRepository keeps sessions in Redis, shared by every worker process on every host. Expiry is left to the
+# server: a session is written with its lifetime as the key's TTL, so a session that can still be read is valid and
+# nothing is ever swept or compared against the clock here.
+# - create is one SET NX EX, get / get_if_valid one GET, delete one DEL
+# - save and save_if_valid are one SET XX KEEPTTL: the write keeps the remaining lifetime, and a session that expired or
+#   ended in the meantime is not brought back
+# - all workers of a process share one connection pool (at most `max_connections` sockets)
+class RedisSessionRepository(AbstractSessionRepository):
+    SESSION_LIFETIME = 5
+
+    def __init__(self, client: redis.Redis = None, url: str = "redis://127.0.0.1:6379/0", prefix: str = "atm:session:",
+                 max_connections: int = 64, clock: Clock = None):
+        self.client = client or _client(url, max_connections)
+        self.prefix = prefix
+        self.clock = clock or SYSTEM
+
+    def create(self, card_data: CardData) -> str:
+        session_id = str(uuid.uuid1())
+        lifetime = self.SESSION_LIFETIME * 60
+        # the key's TTL is what expires the session; expiry (wall clock) is informational, for any host reading it
+        session = Session(session_id=session_id, card_data=card_data, ttl=0, expiry=int(self.clock.time()) + lifetime)
+        self.client.set(self.prefix + session_id, pack_session(session), ex=lifetime, nx=True)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Session]:
+        data = self.client.get(self.prefix + session_id)
+        return unpack_session(session_id, data) if data is not None else None
+
+    def get_if_valid(self, session_id: str) -> Optional[Session]:
+        return self.get(session_id=session_id)
+
+    def save(self, session: Session) -> None:
+        self.save_if_valid(session=session)
+
+    def save_if_valid(self, session: Session) -> bool:
+        return bool(self.client.set(self.prefix + session.session_id, pack_session(session), xx=True, keepttl=True))
+
+    def delete(self, session_id: str) -> bool:
+        return self.client.delete(self.prefix + session_id) > 0
+
+    def __len__(self) -> int:
+        return len(self.client.keys(self.prefix + "*"))
+
+    def close(self) -> None:
+        self.client.connection_pool.disconnect()
+
+
+# RedisAuthKeyStore is a drop-in for bank_repo.AuthKeyStore (FakeBankRepository(auth_key_store=...)) that keeps issued
+# auth keys in Redis with their remaining lifetime as TTL, so every worker can resolve keys issued by any other. Expired
+# keys are dropped by the server: sweep has nothing to do and `max_keys` is left to the server's maxmemory policy.
+class RedisAuthKeyStore(object):
+    def __init__(self, client: redis.Redis = None, url: str = "redis://127.0.0.1:6379/0", prefix: str = "atm:auth:",
+                 max_connections: int = 64):
+        self.client = client or _client(url, max_connections)
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        return len(self.client.keys(self.prefix + "*"))
+
+    def add(self, auth_key: str, card_number: str, expiration: int, now: int) -> bool:
+        if expiration > now:
+            self.client.set(self.prefix + auth_key, card_number, ex=expiration - now)
+        return True
+
+    def get_card_number(self, auth_key: str, now: int) -> Optional[str]:
+        card_number = self.client.get(self.prefix + auth_key)
+        return card_number.decode() if card_number is not None else None
+
+    def sweep(self, now: int) -> int:
+        return 0
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+from typing import Optional
+
+import redis
+
+from core.clock import Clock
+from core.domain.entity import Session, CardData
+from core.repo.session_repo import AbstractSessionRepository
+
+
+def _client(url: str, max_connections: int) -> redis.Redis: ...
+
+
+class RedisSessionRepository(AbstractSessionRepository):
+    SESSION_LIFETIME: int
+    client: redis.Redis
+    prefix: str
+    clock: Clock
+
+    def __init__(self, client: redis.Redis = None, url: str = "redis://127.0.0.1:6379/0", prefix: str = "atm:session:",
+                 max_connections: int = 64, clock: Clock = None) -> None: ...
+    def create(self, card_data: CardData) -> str: ...
+    def get(self, session_id: str) -> Optional[Session]: ...
+    def get_if_valid(self, session_id: str) -> Optional[Session]: ...
+    def save(self, session: Session) -> None: ...
+    def save_if_valid(self, session: Session) -> bool: ...
+    def delete(self, session_id: str) -> bool: ...
+    def __len__(self) -> int: ...
+    def close(self) -> None: ...
+
+class RedisAuthKeyStore(object):
+    client: redis.Redis
+    prefix: str
+
+    def __init__(self, client: redis.Redis = None, url: str = "redis://127.0.0.1:6379/0", prefix: str = "atm:auth:",
+                 max_connections: int = 64) -> None: ...
+    def __len__(self) -> int: ...
+    def add(self, auth_key: str, card_number: str, expiration: int, now: int) -> bool: ...
+    def get_card_number(self, auth_key: str, now: int) -> Optional[str]: ...
+    def sweep(self, now: int) -> int: ...
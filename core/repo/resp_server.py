@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Error(Exception):
+    pass
+
+
+# _Status is a simple string reply (e.g. +OK), as opposed to a bulk string holding a value
+class _Status(bytes):
+    pass
+
+
+_OK = _Status(b"OK")
+
+
+# RespServer is a local stand-in for Redis: it speaks RESP2 / RESP3 (the Redis wire protocol) over TCP, so redis-py clients and
+# their connection pools / pipelines work against it unchanged. It implements the handful of string commands used by
+# the Redis repositories, with per-key expiry (milliseconds, monotonic clock, purged lazily on access). One database,
+# no persistence. Used by tests and benchmarks only.
+#
+#     PING, GET, SET key value [EX s | PX ms | KEEPTTL] [NX | XX], DEL, EXISTS, TTL, PTTL, KEYS, DBSIZE, FLUSHDB,
+#     SELECT, CLIENT (always OK), HELLO [2 | 3]
+class RespServer(object):
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.connections = 0
+        self.commands = 0
+        self._data: Dict[bytes, Tuple[bytes, Optional[int]]] = {}  # key -> (value, expires at in ms or None)
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="resp-server", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @staticmethod
+    def _now() -> int:
+        return int(time.monotonic() * 1000)
+
+    # must be called with self._lock held
+    def _get(self, key: bytes, now: int) -> Optional[Tuple[bytes, Optional[int]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def execute(self, args: List[bytes]):
+        command = args[0].upper()
+        handler = getattr(self, "_cmd_" + command.decode("ascii", "replace").lower(), None)
+        if handler is None:
+            raise _Error(f"ERR unknown command '{command.decode('ascii', 'replace')}'")
+        with self._lock:
+            self.commands += 1
+            try:
+                return handler(args[1:], self._now())
+            except IndexError:
+                raise _Error(f"ERR wrong number of arguments for '{command.decode('ascii', 'replace').lower()}' command")
+
+    def _cmd_ping(self, args, now):
+        return args[0] if args else _Status(b"PONG")
+
+    def _cmd_client(self, args, now):
+        return _OK
+
+    def _cmd_select(self, args, now):
+        return _OK
+
+    def _cmd_get(self, args, now):
+        entry = self._get(args[0], now)
+        return entry[0] if entry else None
+
+    def _cmd_set(self, args, now):
+        key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+        expires_at, keep_ttl, condition = None, False, None
+        i = 0
+        while i < len(options):
+            option = options[i]
+            if option in (b"EX", b"PX"):
+                try:
+                    n = int(args[2 + i + 1])
+                except (IndexError, ValueError):
+                    raise _Error("ERR syntax error")
+                if n <= 0:
+                    raise _Error("ERR invalid expire time in 'set' command")
+                expires_at = now + (n * 1000 if option == b"EX" else n)
+                i += 1
+            elif option == b"KEEPTTL":
+                keep_ttl = True
+            elif option in (b"NX", b"XX"):
+                condition = option
+            else:
+                raise _Error("ERR syntax error")
+            i += 1
+
+        entry = self._get(key, now)
+        if (condition == b"NX" and entry is not None) or (condition == b"XX" and entry is None):
+            return None
+        if keep_ttl and entry is not None:
+            expires_at = entry[1]
+        self._data[key] = (value, expires_at)
+        return _OK
+
+    def _cmd_del(self, args, now):
+        return sum(self._get(key, now) is not None and self._data.pop(key) is not None for key in args)
+
+    def _cmd_exists(self, args, now):
+        return sum(self._get(key, now) is not None for key in args)
+
+    def _cmd_pttl(self, args, now):
+        entry = self._get(args[0], now)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else entry[1] - now
+
+    def _cmd_ttl(self, args, now):
+        ttl = self._cmd_pttl(args, now)
+        return ttl if ttl < 0 else (ttl + 500) // 1000
+
+    def _cmd_keys(self, args, now):
+        pattern = args[0].decode("latin-1")
+        return [key for key in list(self._data) if self._get(key, now) and fnmatch.fnmatchcase(key.decode("latin-1"), pattern)]
+
+    def _cmd_dbsize(self, args, now):
+        return sum(self._get(key, now) is not None for key in list(self._data))
+
+    def _cmd_flushdb(self, args, now):
+        self._data.clear()
+        return _OK
+
+
+def _encode(reply, protocol: int = 2) -> bytes:
+    if reply is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(r, protocol) for r in reply)
+    if isinstance(reply, dict):
+        if protocol == 3:
+            return b"%%%d\r\n" % len(reply) + b"".join(_encode(k, 3) + _encode(v, 3) for k, v in reply.items())
+        return _encode([x for item in reply.items() for x in item])
+    if isinstance(reply, _Status):
+        return b"+%s\r\n" % reply
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def _make_handler(server: RespServer):
+    class Handler(socketserver.StreamRequestHandler):
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with server._lock:
+                server.connections += 1
+
+        def handle(self):
+            rfile = self.rfile
+            protocol = 2
+            while True:
+                args = self._read_command(rfile)
+                if args is None:
+                    return
+                if not args:
+                    continue
+                try:
+                    if args[0].upper() == b"HELLO":
+                        protocol = self._hello(args[1:], protocol)
+                        reply = _encode({
+                            b"server": b"redis", b"version": b"7.2.0", b"proto": protocol, b"mode": b"standalone",
+                            b"role": b"master", b"modules": [],
+                        }, protocol)
+                    else:
+                        reply = _encode(server.execute(args), protocol)
+                except _Error as e:
+                    reply = b"-%s\r\n" % str(e).encode()
+                self.wfile.write(reply)
+
+        # _hello negotiates the protocol version of the connection (redis-py >= 5 asks for RESP3 by default)
+        @staticmethod
+        def _hello(args: List[bytes], protocol: int) -> int:
+            if not args:
+                return protocol
+            if args[0] not in (b"2", b"3"):
+                raise _Error("NOPROTO unsupported protocol version")
+            return int(args[0])
+
+        # _read_command reads one RESP array of bulk strings (every command a client sends), or None at EOF
+        @staticmethod
+        def _read_command(rfile) -> Optional[List[bytes]]:
+            line = rfile.readline()
+            if not line:
+                return None
+            if not line.startswith(b"*"):
+                return line.split()  # inline command (e.g. typed into telnet)
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(rfile.readline()[1:])
+                args.append(rfile.read(length + 2)[:-2])
+            return args
+
+    return Handler
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+
+class _Error(Exception): ...
+class _Status(bytes): ...
+
+_OK: _Status
+
+
+class RespServer(object):
+    connections: int
+    commands: int
+    _data: Dict[bytes, Tuple[bytes, Optional[int]]]
+    _lock: threading.Lock
+    _server: socketserver.ThreadingTCPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None: ...
+    @property
+    def url(self) -> str: ...
+    def start(self) -> str: ...
+    def stop(self) -> None: ...
+    @staticmethod
+    def _now() -> int: ...
+    def _get(self, key: bytes, now: int) -> Optional[Tuple[bytes, Optional[int]]]: ...
+    def execute(self, args: List[bytes]) -> Any: ...
+
+def _encode(reply: Any, protocol: int = 2) -> bytes: ...
+def _make_handler(server: RespServer) -> Type[socketserver.StreamRequestHandler]: ...
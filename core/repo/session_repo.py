@@ -2,19 +2,53 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import abc
+import threading
 import uuid
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Dict
 
+import msgpack
 from django.db import transaction
 
 
 import logging
 
+from core.clock import Clock, SYSTEM
 from core.domain.entity import Session, CardData
 
 logger = logging.getLogger(__name__)
 
 
+# pack_session / unpack_session serialize a session (minus its id, which stores keep as the key) as one MessagePack
+# array for the out-of-process session stores:
+# [card_number, name, expiration_date, service_code, card_verification_code, auth_key, balances, expiry]
+def pack_session(session: Session) -> bytes:
+    card_data = session.card_data
+    return msgpack.packb([
+        card_data.card_number,
+        card_data.name,
+        card_data.expiration_date,
+        card_data.service_code,
+        card_data.card_verification_code,
+        session.auth_key,
+        session.balances,
+        session.expiry,
+    ])
+
+
+def unpack_session(session_id: str, data: bytes) -> Session:
+    card_number, name, expiration_date, service_code, card_verification_code, auth_key, balances, expiry = \
+        msgpack.unpackb(data)
+    return Session(
+        session_id=session_id,
+        card_data=CardData(card_number, name, expiration_date, service_code, card_verification_code),
+        ttl=0,
+        auth_key=auth_key,
+        balances=balances,
+        expiry=expiry,
+    )
+
+
 class AbstractSessionRepository(object):
     __metaclass__ = abc.ABCMeta
 
@@ -29,27 +63,52 @@ class AbstractSessionRepository(object):
     @abc.abstractmethod
     def save(self, session: Session) -> None:
         raise NotImplementedError
-    #
-    # @abc.abstractmethod
-    # def delete(self, unit_id):
-    #     raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
 
     @abc.abstractmethod
     def create(self, card_data: CardData) -> str:
         raise NotImplementedError
 
+    # save_if_valid saves the session only if it is still stored and has not expired, and tells whether it did. Stores
+    # that can check and write in one step (e.g. a single conditional command) override it.
+    def save_if_valid(self, session: Session) -> bool:
+        if self.get_if_valid(session_id=session.session_id) is None:
+            return False
+        self.save(session=session)
+        return True
+
 
+# InMemorySessionRepository evicts sessions once they expire. Every session is created with the same ttl, so
+# insertion order is also expiry order: expired sessions are always at the front of kv_store and are dropped in
+# amortized O(1) whenever a session is created (or by the optional background sweeper).
 class InMemorySessionRepository(AbstractSessionRepository):
     SESSION_LIFETIME = 5
 
-    def __init__(self):
-        # can replace with redis
-        self.kv_store = {}
+    def __init__(self, max_sessions: Optional[int] = None, clock: Clock = None):
+        self.kv_store = OrderedDict()
+        self.max_sessions = max_sessions
+        self.clock = clock or SYSTEM
+        self.evicted_expired = 0
+        self.evicted_capacity = 0
+        self.deleted = 0
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._sweeper_stop = threading.Event()
 
     def create(self, card_data: CardData) -> str:
         session_id = str(uuid.uuid1())
-        session = Session(session_id=session_id, card_data=card_data, ttl=self.SESSION_LIFETIME)
-        self.kv_store[session_id] = session
+        session = Session(session_id=session_id, card_data=card_data, ttl=self.SESSION_LIFETIME, now=self.clock.monotonic())
+        with self._lock:
+            self._evict_expired()
+            if self.max_sessions is not None:
+                # at capacity, the session closest to expiry makes room for the new one
+                while len(self.kv_store) >= self.max_sessions:
+                    self.kv_store.popitem(last=False)
+                    self.evicted_capacity += 1
+            self.kv_store[session_id] = session
         return session_id
 
     def get(self, session_id: str) -> Optional[Session]:
@@ -57,10 +116,68 @@ class InMemorySessionRepository(AbstractSessionRepository):
 
     def get_if_valid(self, session_id: str) -> Optional[Session]:
         session = self.kv_store.get(session_id, None)
-        if session is None or not session.is_valid():
+        if session is None:
+            return None
+        if not session.is_valid(now=self.clock.monotonic()):
+            with self._lock:
+                if self.kv_store.pop(session_id, None) is not None:
+                    self.evicted_expired += 1
             return None
         return session
 
     def save(self, session: Session) -> None:
-        self.kv_store[session.session_id] = session
+        with self._lock:
+            self.kv_store[session.session_id] = session
         return
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if self.kv_store.pop(session_id, None) is None:
+                return False
+            self.deleted += 1
+            return True
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            return self._evict_expired()
+
+    # must be called with self._lock held
+    def _evict_expired(self) -> int:
+        now = self.clock.monotonic()
+        evicted = 0
+        while self.kv_store:
+            session = next(iter(self.kv_store.values()))
+            if session.expiry > now:
+                break
+            self.kv_store.popitem(last=False)
+            evicted += 1
+        self.evicted_expired += evicted
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            live=len(self.kv_store),
+            evicted_expired=self.evicted_expired,
+            evicted_capacity=self.evicted_capacity,
+            deleted=self.deleted,
+        )
+
+    # start_sweeper evicts expired sessions every `interval` seconds from a daemon thread, so memory is reclaimed even
+    # when no new sessions are being created
+    def start_sweeper(self, interval: float = 1.0) -> None:
+        if self._sweeper is not None:
+            return
+        self._sweeper_stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep, args=(interval,), name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+        self._sweeper_stop.set()
+        self._sweeper.join()
+        self._sweeper = None
+
+    def _sweep(self, interval: float) -> None:
+        while not self._sweeper_stop.wait(interval):
+            self.evict_expired()
@@ -3,11 +3,18 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import abc
 
+import threading
+from collections import OrderedDict
 from typing import Dict, Optional
 
+from core.clock import Clock
 from core.domain.entity import CardData, Session
 
 
+def pack_session(session: Session) -> bytes: ...
+def unpack_session(session_id: str, data: bytes) -> Session: ...
+
+
 class AbstractSessionRepository(object):
     __metaclass__ = abc.ABCMeta
     @abc.abstractmethod
@@ -16,17 +23,33 @@ class AbstractSessionRepository(object):
     def get_if_valid(self, session_id: str) -> Optional[Session]: ...
     @abc.abstractmethod
     def save(self, session: Session) -> None: ...
-    # @abc.abstractmethod
-    # def delete(self, unit_id: int) -> None: ...
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> bool: ...
     @abc.abstractmethod
     def create(self, card_data: CardData) -> str: ...
+    def save_if_valid(self, session: Session) -> bool: ...
 
 class InMemorySessionRepository(AbstractSessionRepository):
     SESSION_LIFETIME: int
-    kv_store: Dict[str, Session]
+    kv_store: OrderedDict[str, Session]
+    max_sessions: Optional[int]
+    clock: Clock
+    evicted_expired: int
+    evicted_capacity: int
+    deleted: int
+    _lock: threading.Lock
+    _sweeper: Optional[threading.Thread]
+    _sweeper_stop: threading.Event
 
-    def __init__(self) -> None: ...
+    def __init__(self, max_sessions: Optional[int] = None, clock: Clock = None) -> None: ...
     def get(self, session_id: str) -> Optional[Session]: ...
     def get_if_valid(self, session_id: str) -> Optional[Session]: ...
     def save(self, session: Session) -> None: ...
+    def delete(self, session_id: str) -> bool: ...
     def create(self, card_data: CardData) -> str: ...
+    def evict_expired(self) -> int: ...
+    def _evict_expired(self) -> int: ...
+    def stats(self) -> Dict[str, int]: ...
+    def start_sweeper(self, interval: float = 1.0) -> None: ...
+    def stop_sweeper(self) -> None: ...
+    def _sweep(self, interval: float) -> None: ...
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import os
+import sqlite3
+import threading
+import uuid
+from typing import Optional
+
+import logging
+
+from core.clock import Clock, SYSTEM
+from core.domain.entity import Session, CardData
+from core.repo.session_repo import AbstractSessionRepository, pack_session, unpack_session
+
+logger = logging.getLogger(__name__)
+
+
+# SqliteSessionRepository keeps sessions in a SQLite database file in WAL mode, so every worker process on the host
+# (e.g. gunicorn workers) sees the same sessions: a card inserted on one worker can be authenticated on another.
+# - readers never block the writer and vice versa (WAL); writes are single autocommit statements
+# - each thread of each process has its own connection (sqlite3 connections must not be shared across threads / fork)
+# - expired sessions are filtered in the query and deleted every `sweep_interval` seconds on create. Expiry is in wall
+#   clock seconds, which (unlike the monotonic clock of Session.is_valid) every process and restart agrees on
+class SqliteSessionRepository(AbstractSessionRepository):
+    SESSION_LIFETIME = 5
+
+    def __init__(self, path: str, sweep_interval: float = 1.0, busy_timeout: float = 5.0, clock: Clock = None):
+        self.path = path
+        self.clock = clock or SYSTEM
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, expiry INTEGER NOT NULL, data BLOB NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS sessions_expiry_idx ON sessions (expiry)")
+
+    def _connect(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():  # first use in this thread, or a forked child
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _now(self) -> int:
+        return int(self.clock.time())
+
+    def create(self, card_data: CardData) -> str:
+        session_id = str(uuid.uuid1())
+        session = Session(
+            session_id=session_id, card_data=card_data, ttl=0, expiry=self._now() + self.SESSION_LIFETIME * 60
+        )
+        self._maybe_sweep()
+        self._connect().execute(
+            "INSERT INTO sessions (session_id, expiry, data) VALUES (?, ?, ?)", (session_id, session.expiry, pack_session(session))
+        )
+        return session_id
+
+    def get(self, session_id: str) -> Optional[Session]:
+        row = self._connect().execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return unpack_session(session_id, row[0]) if row else None
+
+    def get_if_valid(self, session_id: str) -> Optional[Session]:
+        row = self._connect().execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND expiry > ?", (session_id, self._now())
+        ).fetchone()
+        return unpack_session(session_id, row[0]) if row else None
+
+    def save(self, session: Session) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, expiry, data) VALUES (?, ?, ?)",
+            (session.session_id, session.expiry, pack_session(session)),
+        )
+
+    def save_if_valid(self, session: Session) -> bool:
+        return self._connect().execute(
+            "UPDATE sessions SET data = ? WHERE session_id = ? AND expiry > ?",
+            (pack_session(session), session.session_id, self._now()),
+        ).rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        return self._connect().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def evict_expired(self) -> int:
+        return self._connect().execute("DELETE FROM sessions WHERE expiry <= ?", (self._now(),)).rowcount
+
+    def _maybe_sweep(self) -> None:
+        now = self.clock.monotonic()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.evict_expired()
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
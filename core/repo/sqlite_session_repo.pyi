@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+import sqlite3
+import threading
+from typing import Optional
+
+from core.clock import Clock
+from core.domain.entity import Session, CardData
+from core.repo.session_repo import AbstractSessionRepository
+
+
+class SqliteSessionRepository(AbstractSessionRepository):
+    SESSION_LIFETIME: int
+    path: str
+    sweep_interval: float
+    busy_timeout: float
+    clock: Clock
+    _local: threading.local
+    _next_sweep: float
+
+    def __init__(self, path: str, sweep_interval: float = 1.0, busy_timeout: float = 5.0, clock: Clock = None) -> None: ...
+    def _connect(self) -> sqlite3.Connection: ...
+    def _now(self) -> int: ...
+    def create(self, card_data: CardData) -> str: ...
+    def get(self, session_id: str) -> Optional[Session]: ...
+    def get_if_valid(self, session_id: str) -> Optional[Session]: ...
+    def save(self, session: Session) -> None: ...
+    def save_if_valid(self, session: Session) -> bool: ...
+    def delete(self, session_id: str) -> bool: ...
+    def evict_expired(self) -> int: ...
+    def _maybe_sweep(self) -> None: ...
+    def __len__(self) -> int: ...
+    def close(self) -> None: ...
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import msgpack
+
+from core.application.admission import TokenBucketLimiter
+from core.application.async_use_case import AsyncATMUseCase
+from core.asgi import ATMAsgiApplication
+from core.codec import MSGPACK, pack_card_data
+from core.domain.entity import CardData
+
+
+def _call(app, method, path, body=b"", headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({"type": "http", "method": method, "path": path, "headers": list(headers)}, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def _post(app, operation, payload, headers=()):
+    return _call(app, "POST", f"/atm/{operation}", json.dumps(payload).encode(), headers)
+
+
+def test_asgi_routes_terminal_requests_to_async_use_case():
+    app = ATMAsgiApplication(fallback_app=None, use_case=AsyncATMUseCase())
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+    status, res = _post(app, "validate_card", {"encrypted_card_info": json.dumps(card_data.to_dict())})
+    assert status == 200
+    assert res["success"]
+    assert res["message"] == "card is valid"
+
+    status, res = _post(app, "get_balance", {"account_id": "101010", "session_id": res["session_id"]})
+    assert status == 200
+    assert res == {"success": False, "balance": None, "account_id": "101010", "message": "session is invalid"}
+
+
+def test_asgi_rejects_malformed_card_data():
+    app = ATMAsgiApplication(fallback_app=None, use_case=AsyncATMUseCase())
+
+    for encrypted_card_info in ["not json", "{}", json.dumps({"card_number": 1234567890123456})]:
+        status, res = _post(app, "validate_card", {"encrypted_card_info": encrypted_card_info})
+        assert status == 200
+        assert not res["success"]
+        assert res["message"] == "card data is malformed"
+
+
+def test_asgi_rate_limits_pin_attempts_per_terminal_header():
+    use_case = AsyncATMUseCase()
+    use_case.terminal_limiter = TokenBucketLimiter(rate=0, burst=1)
+    app = ATMAsgiApplication(fallback_app=None, use_case=use_case)
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+    messages = []
+    for terminal_id in [b"atm-1", b"atm-1", b"atm-2"]:
+        _, res = _post(app, "validate_card", {"encrypted_card_info": json.dumps(card_data.to_dict())})
+        _, res = _post(app, "auth", {"pin": "9999", "session_id": res["session_id"]}, [(b"x-terminal-id", terminal_id)])
+        messages.append(res["message"])
+
+    assert messages == [
+        "invalid pin and auth data", "too many attempts from this terminal, try again later", "invalid pin and auth data",
+    ]
+
+
+def test_asgi_rejects_bad_requests():
+    app = ATMAsgiApplication(fallback_app=None, use_case=AsyncATMUseCase())
+
+    assert _call(app, "POST", "/atm/unknown")[0] == 404
+    assert _call(app, "GET", "/atm/auth")[0] == 405
+    assert _call(app, "POST", "/atm/auth", b"not json")[0] == 400
+
+    status, res = _post(app, "auth", {"pin": "0000"})
+    assert status == 400
+    assert res["message"] == "missing field: session_id"
+
+    status, res = _post(app, "withdraw", {"account_id": "1", "session_id": "1", "amount": -5})
+    assert status == 400
+    assert res["message"] == "amount must be a positive integer"
+
+
+def test_asgi_passes_other_requests_to_fallback_app():
+    calls = []
+
+    async def fallback_app(scope, receive, send):
+        calls.append(scope["type"])
+
+    app = ATMAsgiApplication(fallback_app=fallback_app)
+    asyncio.run(app({"type": "http", "method": "GET", "path": "/admin/"}, None, None))
+    asyncio.run(app({"type": "lifespan"}, None, None))
+
+    assert calls == ["http", "lifespan"]
+
+
+def test_asgi_speaks_msgpack():
+    app = ATMAsgiApplication(fallback_app=None, use_case=AsyncATMUseCase())
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": msgpack.packb([pack_card_data(card_data)]), "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/atm/validate_card", "headers": [(b"content-type", MSGPACK.encode())]}
+    asyncio.run(app(scope, receive, send))
+
+    assert sent[0]["status"] == 200
+    assert (b"content-type", MSGPACK.encode()) in sent[0]["headers"]
+    success, message, session_id = msgpack.unpackb(sent[1]["body"])
+    assert (success, message) == (True, "card is valid")
+
+    sent.clear()
+    scope["headers"] = [(b"content-type", b"text/xml")]
+    asyncio.run(app(scope, receive, send))
+    assert sent[0]["status"] == 415
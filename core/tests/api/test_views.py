@@ -0,0 +1,169 @@
+import json
+
+import msgpack
+from django.conf import settings
+from django.test import Client, override_settings
+
+from core.application.admission import TokenBucketLimiter
+from core.application.use_case import ATMUseCase
+from core.codec import MSGPACK, get_codec, pack_card_data
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.session_repo import InMemorySessionRepository
+
+
+def test_metrics_endpoint_exposes_use_case_and_bank_metrics():
+    uc = ATMUseCase(session_repo=InMemorySessionRepository())
+    session_id = uc.session_repo.create(card_data=None)
+    uc.get_balance(account_id="101010", session_id=session_id)  # no auth key yet: rejected without a bank call
+    uc.bank_repo.get_accounts(auth_key="unknown")
+
+    res = Client().get("/metrics")
+
+    assert res.status_code == 200
+    assert res["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = res.content.decode()
+    assert 'atm_operation_total{component="atm",operation="get_balance",reason="session is invalid",success="false"}' in text
+    assert 'atm_operation_total{component="bank",operation="get_accounts",reason="Auth key expired",success="false"}' in text
+    assert 'atm_operation_latency_seconds_count{component="bank",operation="get_accounts"}' in text
+
+
+def test_metrics_endpoint_is_read_only():
+    assert Client().post("/metrics").status_code == 405
+
+
+def _post(client, operation, payload):
+    res = client.post(f"/atm/{operation}", data=json.dumps(payload), content_type="application/json")
+    return res.status_code, res.json()
+
+
+def _use_case(mocker):
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store["1234567890123456"] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number="1234567890123456", balance=100))
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo)
+    mocker.patch.object(ATMUseCase, "_instance", uc)
+    return uc
+
+
+def test_terminal_api_runs_customer_journey(mocker):
+    _use_case(mocker)
+    client = Client(enforce_csrf_checks=True)
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+    status, res = _post(client, "validate_card", {"encrypted_card_info": json.dumps(card_data.to_dict())})
+    assert status == 200
+    assert res["success"]
+    session_id = res["session_id"]
+
+    status, res = _post(client, "auth", {"pin": "0000", "session_id": session_id})
+    assert (status, res["account_ids"]) == (200, ["101010"])
+
+    status, res = _post(client, "deposit", {"account_id": "101010", "session_id": session_id, "amount": 50})
+    assert status == 200
+    assert res == {"success": True, "message": "Deposit successful", "account_id": "101010", "balance": 150}
+
+    status, res = _post(client, "end_session", {"session_id": session_id})
+    assert (status, res["success"]) == (200, True)
+
+
+def test_terminal_api_rejects_bad_requests(mocker):
+    _use_case(mocker)
+    client = Client()
+
+    assert client.post("/atm/unknown").status_code == 404
+    assert client.get("/atm/auth").status_code == 405
+    assert client.post("/atm/auth", data="not json", content_type="application/json").status_code == 400
+
+    status, res = _post(client, "withdraw", {"account_id": "1", "session_id": "1", "amount": -5})
+    assert status == 400
+    assert res["message"] == "amount must be a positive integer"
+
+
+def test_terminal_api_rejects_malformed_card_data(mocker):
+    _use_case(mocker)
+    client = Client()
+    card = {"card_number": 1234567890123456, "name": "John Doe", "expiration_date": "20300101",
+            "card_verification_code": "123", "service_code": "123"}
+
+    for encrypted_card_info in ["not json", "{}", "[]", json.dumps(card)]:
+        status, res = _post(client, "validate_card", {"encrypted_card_info": encrypted_card_info})
+        assert status == 200
+        assert not res["success"]
+        assert res["message"].startswith("card data is malformed")
+
+
+def test_terminal_api_rate_limits_pin_attempts_per_terminal_header(mocker):
+    uc = _use_case(mocker)
+    uc.terminal_limiter = TokenBucketLimiter(rate=0, burst=1)
+    client = Client()
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+    messages = []
+    for terminal_id in ["atm-1", "atm-1", "atm-2"]:  # all from the same client address
+        _, res = _post(client, "validate_card", {"encrypted_card_info": json.dumps(card_data.to_dict())})
+        res = client.post("/atm/auth", data=json.dumps({"pin": "9999", "session_id": res["session_id"]}),
+                          content_type="application/json", HTTP_X_TERMINAL_ID=terminal_id)
+        messages.append(res.json()["message"])
+
+    assert messages == [
+        "invalid pin and auth data", "too many attempts from this terminal, try again later", "invalid pin and auth data",
+    ]
+
+
+def test_terminal_api_skips_browser_middleware(mocker):
+    _use_case(mocker)
+    client = Client()
+
+    # XFrameOptionsMiddleware (last in settings.MIDDLEWARE) never sees terminal requests
+    res = client.post("/atm/end_session", data=json.dumps({"session_id": "1"}), content_type="application/json")
+    assert res.status_code == 200
+    assert "X-Frame-Options" not in res
+    assert "X-Frame-Options" in client.get("/metrics")
+
+    # without TerminalApiMiddleware the view is still reachable through the URLconf
+    with override_settings(MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != "core.middleware.TerminalApiMiddleware"]):
+        res = Client(enforce_csrf_checks=True).post(
+            "/atm/end_session", data=json.dumps({"session_id": "1"}), content_type="application/json"
+        )
+    assert res.status_code == 200
+    assert res["X-Frame-Options"] == "DENY"
+
+
+def test_terminal_api_speaks_msgpack(mocker):
+    _use_case(mocker)
+    client = Client()
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+    res = client.post("/atm/validate_card", data=msgpack.packb([pack_card_data(card_data)]), content_type=MSGPACK)
+    assert res["Content-Type"] == MSGPACK
+    res = get_codec(MSGPACK).decode_response("validate_card", res.content)
+    assert res.success
+
+    body = msgpack.packb(["101010", res.session_id])
+    res = client.post("/atm/get_balance", data=body, content_type=MSGPACK)
+    assert msgpack.unpackb(res.content) == [False, None, "101010", "session is invalid"]  # not authenticated yet
+
+    res = client.post("/atm/get_balance", data=msgpack.packb(["101010"]), content_type=MSGPACK)
+    assert res.status_code == 400
+    assert msgpack.unpackb(res.content)["message"] == "request must have 2 fields: account_id, session_id"
+
+    assert client.post("/atm/get_balance", data="<xml/>", content_type="text/xml").status_code == 415
@@ -0,0 +1,57 @@
+import threading
+
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter
+from core.clock import ManualClock
+
+
+def test_token_bucket_allows_a_burst_then_the_rate():
+    clock = ManualClock()
+    limiter = TokenBucketLimiter(rate=0.5, burst=3, clock=clock)
+
+    assert [limiter.allow("card") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("other card")  # buckets are per key
+
+    clock.advance(1)
+    assert not limiter.allow("card")  # half a token
+    clock.advance(1)
+    assert limiter.allow("card")
+    assert not limiter.allow("card")
+
+    clock.advance(60)
+    assert [limiter.allow("card") for _ in range(4)] == [True, True, True, False]  # refilled up to the burst only
+
+
+def test_token_bucket_is_bounded():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2, clock=ManualClock())
+    for key in ("a", "b", "c"):
+        assert limiter.allow(key)
+
+    assert len(limiter) == 2
+    assert not limiter.allow("c")
+    assert limiter.allow("a")  # evicted, so back with a full bucket
+
+
+def test_token_bucket_concurrent_allow():
+    limiter = TokenBucketLimiter(rate=0, burst=1000, clock=ManualClock())
+    allowed = []
+
+    def worker():
+        allowed.append(sum(limiter.allow("card") for _ in range(500)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(allowed) == 1000
+
+
+def test_concurrency_limiter_sheds_instead_of_queueing():
+    limiter = ConcurrencyLimiter(2)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    limiter.release()
+    assert limiter.try_acquire()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import time
+
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter
+from core.application.async_use_case import AsyncATMUseCase
+from core.clock import ManualClock
+from core.domain.entity import CardData
+from core.repo.async_bank_repo import AsyncFakeBankRepository
+from core.repo.bank_repo import FakeBankRepository, Account
+
+
+def _card_data(card_number="1234567890123456"):
+    return CardData(
+        card_number=card_number,
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _use_case(latency=0.0, card_numbers=("1234567890123456",)):
+    bank_repo = FakeBankRepository()
+    for card_number in card_numbers:
+        bank_repo.auth_store[card_number] = "0000#123#20300101"
+        bank_repo.add_account(Account(account_id=f"{card_number}-1", card_number=card_number, balance=1000))
+    return AsyncATMUseCase(bank_repo=AsyncFakeBankRepository(bank_repo=bank_repo, latency=latency))
+
+
+def test_async_usecase_customer_journey():
+    async def journey():
+        uc = _use_case()
+        res = await uc.validate_card(json.dumps(_card_data().to_dict()))
+        assert res.success
+        session_id = res.session_id
+
+        res = await uc.auth(pin="9999", session_id=session_id)
+        assert not res.success
+        assert res.message == "invalid pin and auth data"
+
+        res = await uc.auth(pin="0000", session_id=session_id)
+        assert res.success
+        assert res.account_ids == ["1234567890123456-1"]
+
+        res = await uc.get_balance(account_id="1234567890123456-1", session_id=session_id)
+        assert res.balance == 1000
+
+        res = await uc.deposit(account_id="1234567890123456-1", session_id=session_id, amount=500)
+        assert res.success
+        assert res.balance == 1500
+        assert uc.cash_bin.get_total() == 1000500
+
+        res = await uc.withdraw(account_id="1234567890123456-1", session_id=session_id, amount=2000)
+        assert not res.success
+        assert res.message == "Insufficient balance"
+
+        res = await uc.withdraw(account_id="1234567890123456-1", session_id=session_id, amount=1500)
+        assert res.success
+        assert res.balance == 0
+        assert uc.cash_bin.get_total() == 999000
+
+        res = await uc.end_session(session_id=session_id)
+        assert res.success
+        res = await uc.get_balance(account_id="1234567890123456-1", session_id=session_id)
+        assert not res.success
+        assert res.message == "session is invalid"
+
+    asyncio.run(journey())
+
+
+def test_async_usecase_serves_terminals_concurrently():
+    n_terminals, latency = 500, 0.05
+    card_numbers = [f"{i:016d}" for i in range(n_terminals)]
+
+    async def terminal(uc, card_number):
+        res = await uc.validate_card(json.dumps(_card_data(card_number).to_dict()))
+        res = await uc.auth(pin="0000", session_id=res.session_id)
+        assert res.success
+        return res
+
+    async def run():
+        uc = _use_case(latency=latency, card_numbers=card_numbers)
+        return await asyncio.gather(*[terminal(uc, card_number) for card_number in card_numbers])
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == n_terminals
+    # two bank round trips per terminal: sequential would take n_terminals * 2 * latency
+    assert elapsed < n_terminals * 2 * latency / 10
+
+
+def test_async_usecase_prefetches_balances_at_auth():
+    latency = 0.05
+
+    async def run():
+        bank_repo = FakeBankRepository()
+        bank_repo.auth_store["1234567890123456"] = "0000#123#20300101"
+        for i in range(8):
+            bank_repo.add_account(Account(account_id=f"acc-{i}", card_number="1234567890123456", balance=i))
+        uc = AsyncATMUseCase(
+            bank_repo=AsyncFakeBankRepository(bank_repo=bank_repo, latency=latency), prefetch_balances=True
+        )
+        session_id = (await uc.validate_card(json.dumps(_card_data().to_dict()))).session_id
+
+        start = time.perf_counter()
+        await uc.auth(pin="0000", session_id=session_id)
+        # auth key + accounts + one concurrent round of balance lookups
+        assert time.perf_counter() - start < 6 * latency
+
+        start = time.perf_counter()
+        for i in range(8):
+            assert (await uc.get_balance(account_id=f"acc-{i}", session_id=session_id)).balance == i
+        assert time.perf_counter() - start < latency  # served from the session
+        assert uc.bank_calls_saved == 8
+
+    asyncio.run(run())
+
+
+def test_async_usecase_auth_rate_limited_per_card_and_terminal():
+    async def run():
+        uc = _use_case()
+        clock = ManualClock()
+        uc.card_limiter = TokenBucketLimiter(rate=1 / 60, burst=2, clock=clock)
+        uc.terminal_limiter = TokenBucketLimiter(rate=1, burst=1, clock=clock)
+        session_id = (await uc.validate_card(json.dumps(_card_data().to_dict()))).session_id
+
+        results = [
+            await uc.auth(pin="1111", session_id=session_id, terminal_id="atm-1"),
+            await uc.auth(pin="0000", session_id=session_id, terminal_id="atm-1"),
+            await uc.auth(pin="1111", session_id=session_id, terminal_id="atm-2"),
+            await uc.auth(pin="0000", session_id=session_id, terminal_id="atm-3"),
+        ]
+        assert [res.message for res in results] == [
+            "invalid pin and auth data",
+            "too many attempts from this terminal, try again later",
+            "invalid pin and auth data",
+            "too many PIN attempts for this card, try again later",
+        ]
+        assert uc.bank_calls_saved == 2
+
+        clock.advance(60)
+        assert (await uc.auth(pin="0000", session_id=session_id, terminal_id="atm-3")).success
+
+    asyncio.run(run())
+
+
+def test_async_usecase_auth_sheds_load_when_the_bank_is_busy():
+    async def run():
+        uc = _use_case(latency=0.02)
+        uc.bank_limiter = ConcurrencyLimiter(1)
+        session_ids = [(await uc.validate_card(json.dumps(_card_data().to_dict()))).session_id for _ in range(2)]
+
+        results = await asyncio.gather(*[uc.auth(pin="0000", session_id=session_id) for session_id in session_ids])
+        assert [res.message for res in results] == ["Retrieved account ids", "bank is busy, try again later"]
+        assert uc.bank_limiter.try_acquire()  # the slot was given back
+
+    asyncio.run(run())
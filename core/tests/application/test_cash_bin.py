@@ -0,0 +1,139 @@
+import itertools
+import threading
+
+import pytest
+
+from core.application import cash_bin as cash_bin_module
+from core.application.cash_bin import CassetteCashBinUseCase, FakeCashBinUseCase, build_dispense_table
+
+
+def test_build_dispense_table_uses_the_fewest_notes():
+    denominations, caps, max_notes = (50, 20, 10), (3, 4, 2), 6
+    fewest = {}
+    for plan in itertools.product(*(range(cap + 1) for cap in caps)):
+        if sum(plan) <= max_notes:
+            amount = sum(d * n for d, n in zip(denominations, plan))
+            fewest[amount] = min(fewest.get(amount, max_notes + 1), sum(plan))
+
+    table = build_dispense_table(denominations, caps, max_notes)
+
+    for i, plan in enumerate(table):
+        amount = i * 10
+        if amount not in fewest:
+            assert plan is None, amount
+        else:
+            assert sum(d * n for d, n in zip(denominations, plan)) == amount
+            assert all(n <= cap for n, cap in zip(plan, caps))
+            assert sum(plan) == fewest[amount], amount
+
+
+def test_cassette_cash_bin_can_dispense():
+    cash_bin = CassetteCashBinUseCase({50: 2, 20: 3})
+
+    assert cash_bin.get_total() == 160
+    assert cash_bin.get_plan(60) == {20: 3}  # greedy (50 first) would get stuck at 10
+    assert cash_bin.get_plan(110) == {50: 1, 20: 3}
+    assert not cash_bin.can_dispense(30)
+    assert not cash_bin.can_dispense(25)
+    assert not cash_bin.can_dispense(180)  # more than the bin holds
+    assert not cash_bin.can_dispense(0)
+
+
+def test_cassette_cash_bin_max_notes():
+    cash_bin = CassetteCashBinUseCase({10: 100}, max_notes=5)
+    assert cash_bin.can_dispense(50)
+    assert not cash_bin.can_dispense(60)
+
+
+def test_cassette_cash_bin_remove_and_load():
+    cash_bin = CassetteCashBinUseCase({50: 50, 20: 50}, max_notes=10)
+
+    assert cash_bin.remove(110) == 3500 - 110
+    assert cash_bin.get_counts() == {50: 49, 20: 47}
+    assert cash_bin.rebuilds == 0  # every cassette still holds more than one withdrawal's worth of notes
+
+    for _ in range(4):
+        cash_bin.remove(200)  # 4 x 50
+    assert cash_bin.get_counts() == {50: 33, 20: 47}
+    for _ in range(3):
+        cash_bin.remove(500)  # 10 x 50
+    assert cash_bin.get_counts() == {50: 3, 20: 47}
+    assert cash_bin.wait_for_table(timeout=5)  # rebuilt in the background
+    assert cash_bin.rebuilds == 1
+    assert cash_bin.get_plan(200) == {50: 2, 20: 5}  # falls back on the 20s
+    with pytest.raises(ValueError):
+        cash_bin.remove(30)
+
+    cash_bin.load(50, 100)
+    assert cash_bin.wait_for_table(timeout=5)
+    assert cash_bin.get_plan(200) == {50: 4}
+    assert cash_bin.rebuilds == 2
+
+    assert cash_bin.add(500) == cash_bin.get_total()  # deposits are not paid out again
+    assert cash_bin.get_max_deposit() == 1000000 - 500
+
+
+def test_cash_bin_reserve_commit_release():
+    cash_bin = FakeCashBinUseCase(init_amount=100)
+
+    first = cash_bin.reserve(60)
+    assert cash_bin.get_total() == 40
+    assert cash_bin.reserve(50) is None  # the first reservation's cash is not promised again
+    second = cash_bin.reserve(40)
+
+    cash_bin.release(first)
+    cash_bin.commit(second)
+    assert cash_bin.get_total() == 60
+
+
+def test_cassette_cash_bin_reserve_commit_release():
+    cash_bin = CassetteCashBinUseCase({50: 2, 20: 3})
+
+    reservation = cash_bin.reserve(60)
+    assert cash_bin.get_counts() == {50: 2, 20: 0}
+    assert not cash_bin.can_dispense(60)
+    assert cash_bin.reserve(110) is None
+
+    cash_bin.release(reservation)
+    assert cash_bin.get_counts() == {50: 2, 20: 3}
+    reservation = cash_bin.reserve(110)
+    cash_bin.commit(reservation)
+    assert cash_bin.get_counts() == {50: 1, 20: 0}
+    assert cash_bin.get_total() == 50
+
+
+def test_cassette_cash_bin_rebuilds_the_table_off_the_lock(mocker):
+    cash_bin = CassetteCashBinUseCase({50: 20, 20: 20}, max_notes=10)
+    build_may_finish = threading.Event()
+
+    def slow_build(*args):
+        build_may_finish.wait(5)
+        return build_dispense_table(*args)
+
+    mocker.patch.object(cash_bin_module, "build_dispense_table", slow_build)
+
+    first = cash_bin.reserve(500)  # 10 x 50
+    second = cash_bin.reserve(500)  # the 50s run low: a rebuild starts
+    assert cash_bin.get_counts() == {50: 0, 20: 20}
+
+    # while the new table is being built, reservations the previous table can serve go through without waiting
+    third = cash_bin.reserve(60)  # 3 x 20
+    assert cash_bin.rebuilds == 0
+
+    # one it cannot (it would pay 200 with 4 x 50) waits for the new table
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(cash_bin.reserve(200)))
+    waiting.start()
+    waiting.join(0.05)
+    assert waiting.is_alive()
+    build_may_finish.set()
+    waiting.join(5)
+    assert results[0].notes == (0, 10)
+
+    cash_bin.release(first)
+    cash_bin.release(second)
+    cash_bin.release(third)
+    cash_bin.release(results[0])
+    assert cash_bin.wait_for_table(timeout=5)
+    assert cash_bin.get_counts() == {50: 20, 20: 20}
+    assert cash_bin.get_plan(200) == {50: 4}
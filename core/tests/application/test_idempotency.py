@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from core.application.errors import IdempotencyKeyReusedError
+from core.application.idempotency import IdempotencyCache
+from core.clock import ManualClock
+
+
+def test_idempotency_cache_replays_the_first_result():
+    cache = IdempotencyCache()
+    calls = []
+
+    assert cache.run("key", "request", lambda: calls.append(1) or "first") == "first"
+    assert cache.run("key", "request", lambda: calls.append(1) or "second") == "first"
+    assert calls == [1]
+    assert cache.replays == 1
+
+
+def test_idempotency_cache_rejects_a_key_reused_for_another_request():
+    cache = IdempotencyCache()
+    cache.run("key", "request", lambda: "first")
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        cache.run("key", "other request", lambda: "second")
+
+
+def test_idempotency_cache_expires_entries():
+    clock = ManualClock()
+    cache = IdempotencyCache(ttl=60, clock=clock)
+    cache.run("key", "request", lambda: "first")
+
+    clock.advance(59)
+    assert cache.run("key", "request", lambda: "second") == "first"
+    clock.advance(1)
+    assert cache.run("key", "request", lambda: "second") == "second"
+
+
+def test_idempotency_cache_evicts_the_least_recently_used():
+    cache = IdempotencyCache(max_entries=2)
+    cache.run("a", "request", lambda: "a")
+    cache.run("b", "request", lambda: "b")
+    cache.run("a", "request", lambda: "a again")  # a is now the most recently used
+    cache.run("c", "request", lambda: "c")
+
+    assert len(cache) == 2
+    assert cache.run("a", "request", lambda: "a again") == "a"
+    assert cache.run("b", "request", lambda: "b again") == "b again"
+
+
+def test_idempotency_cache_does_not_remember_failures():
+    cache = IdempotencyCache()
+
+    def fail():
+        raise ConnectionError("bank is down")
+
+    with pytest.raises(ConnectionError):
+        cache.run("key", "request", fail)
+    assert len(cache) == 0
+    assert cache.run("key", "request", lambda: "retried") == "retried"
+
+
+def test_idempotency_cache_coalesces_concurrent_duplicates():
+    cache = IdempotencyCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.run("key", "request", slow)))
+    first.start()
+    assert started.wait(5)
+    duplicates = [threading.Thread(target=lambda: results.append(cache.run("key", "request", slow))) for _ in range(8)]
+    for t in duplicates:
+        t.start()
+    release.set()
+    for t in [first] + duplicates:
+        t.join()
+
+    assert calls == [1]
+    assert results == ["done"] * 9
+    assert cache.replays == 8
@@ -1,15 +1,31 @@
 import json
+import sys
+import threading
+import time
+
 import pytest
 
-from core.application.use_case import ATMUseCase
+from core.application.admission import ConcurrencyLimiter, TokenBucketLimiter
+from core.application.cash_bin import CassetteCashBinUseCase
+from core.application.errors import InvalidRequestError
+from core.application.use_case import ATMUseCase, FakeCashBinUseCase
+from core.clock import ManualClock
 from core.domain.entity import CardData, Session
-from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes
+from core.dto import GetAccountsRes, GetBankBalanceRes, BankDepositRes, BankWithdrawRes, AuthRes, WithdrawRes
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.session_repo import InMemorySessionRepository
 
 
 # TODO: add assert_called_with checks for each test
 
+@pytest.fixture(autouse=True)
+def fresh_instance(mocker):
+    # every test gets its own ATMUseCase.get_instance(), with fresh sessions and auth rate limiters
+    mocker.patch.object(ATMUseCase, "_instance", None)
+
+
 def test_usecase_validate_card_success():
-    uc = ATMUseCase.get_instance()
+    uc = ATMUseCase(clock=ManualClock.at("20230601"))
     valid_card_datas = [
         CardData(
             card_number="1234567890123456",
@@ -36,7 +52,7 @@ def test_usecase_validate_card_success():
 
 
 def test_usecase_validate_card_failure():
-    uc = ATMUseCase.get_instance()
+    uc = ATMUseCase(clock=ManualClock.at("20230601"))
     invalid_card_datas = [
         (CardData(
             card_number="123456789012345678",
@@ -348,7 +364,7 @@ def test_usecase_deposit_failure_due_to_session(mocker):
         )
 
         mock_bank_res = GetBankBalanceRes(success=True, message="Retrieved balance", account_id="101010", balance=123)
-        mocker.patch(
+        mock_get_balance = mocker.patch(
             "core.repo.bank_repo.FakeBankRepository.get_balance",
             return_value=mock_bank_res
         )
@@ -359,7 +375,8 @@ def test_usecase_deposit_failure_due_to_session(mocker):
         assert not res.success
         assert res.message == "session is invalid"
         assert res.account_id == "101010"
-        assert res.balance == 123  # Unchanged
+        assert res.balance is None  # no session, no balance lookup
+        mock_get_balance.assert_not_called()
 
 
 def test_usecase_withdraw_success(mocker):
@@ -458,7 +475,7 @@ def test_usecase_withdraw_failure_due_to_session(mocker):
         )
 
         mock_bank_res = GetBankBalanceRes(success=True, message="Retrieved balance", account_id="101010", balance=123)
-        mocker.patch(
+        mock_get_balance = mocker.patch(
             "core.repo.bank_repo.FakeBankRepository.get_balance",
             return_value=mock_bank_res
         )
@@ -469,8 +486,464 @@ def test_usecase_withdraw_failure_due_to_session(mocker):
         assert not res.success
         assert res.message == "session is invalid"
         assert res.account_id == "101010"
-        assert res.balance == 123  # Unchanged
+        assert res.balance is None  # no session, no balance lookup
+        mock_get_balance.assert_not_called()
+
+
+def test_usecase_end_session(mocker):
+    mock_delete = mocker.patch(
+        "core.repo.session_repo.InMemorySessionRepository.delete",
+        side_effect=[True, False]
+    )
+
+    uc = ATMUseCase.get_instance()
+    res = uc.end_session(session_id="1234")
+    assert res.success
+    assert res.message == "session ended"
+
+    res = uc.end_session(session_id="1234")
+    assert not res.success
+    assert res.message == "session is invalid"
+    mock_delete.assert_called_with(session_id="1234")
+
+
+# _YieldingCashBin gives up the GIL between reading and writing its total, widening every read-modify-write window
+class _YieldingCashBin(FakeCashBinUseCase):
+    @property
+    def _total(self):
+        value = self._yielding_total
+        time.sleep(0)
+        return value
+
+    @_total.setter
+    def _total(self, value):
+        self._yielding_total = value
+
+
+def test_cash_bin_concurrent_add_remove():
+    cash_bin = _YieldingCashBin(init_amount=1000)
+    n_threads, n_ops = 8, 200
+
+    def worker():
+        for _ in range(n_ops):
+            cash_bin.add(amount=3)
+            cash_bin.remove(amount=2)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force frequent thread switches to surface races
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert cash_bin.get_total() == 1000 + n_threads * n_ops
+
+
+def test_usecase_rejections_use_cached_balance(mocker):
+    # Given
+    mock_session = Session(
+            session_id="1234",
+            card_data=CardData(
+                card_number="1234567890123456",
+                name="John Doe",
+                expiration_date="20240101",
+                card_verification_code="123",
+                service_code="123"
+            ),
+            ttl=10,
+            auth_key="11111"
+        )
 
+    mocker.patch(
+        "core.repo.session_repo.InMemorySessionRepository.get_if_valid",
+        return_value=mock_session
+    )
+    mock_get_balance = mocker.patch(
+        "core.repo.bank_repo.FakeBankRepository.get_balance",
+        return_value=GetBankBalanceRes(success=True, message="Retrieved balance", account_id="101010", balance=123)
+    )
+    mocker.patch(
+        "core.repo.bank_repo.FakeBankRepository.withdraw",
+        return_value=BankWithdrawRes(success=True, message="Withdraw successful", account_id="101010", balance=23)
+    )
 
+    uc = ATMUseCase.get_instance()
+    saved = uc.bank_calls_saved
 
+    # first rejection has to ask the bank, the following ones are answered from the session
+    res = uc.withdraw(account_id="101010", session_id="1234", amount=1000000000000)
+    assert res.balance == 123
+    res = uc.deposit(account_id="101010", session_id="1234", amount=1000000000000)
+    assert res.message == "not enough capacity in ATM"
+    assert res.balance == 123
+    assert mock_get_balance.call_count == 1
+    assert uc.bank_calls_saved == saved + 1
+
+    # successful withdrawals write through to the cache
+    uc.withdraw(account_id="101010", session_id="1234", amount=100)
+    res = uc.withdraw(account_id="101010", session_id="1234", amount=1000000000000)
+    assert res.message == "not enough cash in ATM"
+    assert res.balance == 23
+    assert mock_get_balance.call_count == 1
+    assert uc.bank_calls_saved == saved + 2
+
+
+def test_usecase_prefetches_balances_at_auth():
+    class SlowBankRepository(FakeBankRepository):
+        def __init__(self):
+            super().__init__()
+            self.get_balance_calls = 0
+
+        def get_balance(self, auth_key, account_id):
+            self.get_balance_calls += 1
+            time.sleep(0.05)
+            return super().get_balance(auth_key=auth_key, account_id=account_id)
+
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    bank_repo = SlowBankRepository()
+    bank_repo.auth_store[card_data.card_number] = "0000#123#20300101"
+    account_ids = [f"acc-{i}" for i in range(8)]
+    for i, account_id in enumerate(account_ids):
+        bank_repo.add_account(Account(account_id=account_id, card_number=card_data.card_number, balance=i * 100))
+
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo, prefetch_balances=True)
+    session_id = uc.validate_card(json.dumps(card_data.to_dict())).session_id
+
+    start = time.perf_counter()
+    res = uc.auth(pin="0000", session_id=session_id)
+    elapsed = time.perf_counter() - start
+    assert res.account_ids == account_ids
+    assert bank_repo.get_balance_calls == 8
+    assert elapsed < 8 * 0.05 / 2  # fetched concurrently, not one after another
+
+    for i, account_id in enumerate(account_ids):
+        res = uc.get_balance(account_id=account_id, session_id=session_id)
+        assert res.success
+        assert res.balance == i * 100
+    assert bank_repo.get_balance_calls == 8  # served from the session
+
+    uc.deposit(account_id="acc-1", session_id=session_id, amount=50)
+    assert uc.get_balance(account_id="acc-1", session_id=session_id).balance == 150
+    assert bank_repo.get_balance_calls == 8
+
+
+def _script_use_case():
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store[card_data.card_number] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number=card_data.card_number, balance=100))
+    uc = ATMUseCase(session_repo=InMemorySessionRepository(), bank_repo=bank_repo)
+    return uc, uc.validate_card(json.dumps(card_data.to_dict())).session_id
+
+
+def test_usecase_run_script_loads_the_session_once(mocker):
+    uc, session_id = _script_use_case()
+    results = uc.run_script(session_id, [("auth", dict(pin="0000")), ("get_balance", dict(account_id="101010"))])
+    assert [res.success for res in results] == [True, True]
+    assert results[0].account_ids == ["101010"]
+    assert results[1].balance == 100
+
+    get_if_valid = mocker.spy(uc.session_repo, "get_if_valid")
+    results = uc.run_script(session_id, [
+        ("get_balance", dict(account_id="101010")),
+        ("withdraw", dict(account_id="101010", amount=30)),
+        ("deposit", dict(account_id="101010", amount=10)),
+        ("end_session", dict()),
+    ])
+
+    assert [res.success for res in results] == [True] * 4
+    assert [res.balance for res in results[:3]] == [100, 70, 80]
+    assert get_if_valid.call_count == 1
+    assert uc.session_repo.get(session_id=session_id) is None
+
+
+def test_usecase_run_script_stops_at_the_first_failure():
+    uc, session_id = _script_use_case()
+
+    results = uc.run_script(session_id, [
+        ("auth", dict(pin="0000")),
+        ("withdraw", dict(account_id="101010", amount=500)),
+        ("end_session", dict()),
+    ])
+
+    assert len(results) == 2
+    assert not results[1].success
+    assert results[1].message == "Insufficient balance"
+    assert uc.session_repo.get(session_id=session_id) is not None  # end_session did not run
+
+    results = uc.run_script(session_id, [("end_session", dict()), ("get_balance", dict(account_id="101010"))])
+    assert results[0].success
+    assert not results[1].success and results[1].message == "session is invalid"
+
+
+def test_usecase_run_script_with_invalid_session():
+    uc, _ = _script_use_case()
+
+    results = uc.run_script("unknown", [("auth", dict(pin="0000")), ("get_balance", dict(account_id="101010"))])
+    assert results == [AuthRes(success=False, message="session is invalid")]
+
+    results = uc.run_script("unknown", [("withdraw", dict(account_id="101010", amount=10))])
+    assert results == [WithdrawRes(success=False, account_id="101010", message="session is invalid")]
+
+    with pytest.raises(InvalidRequestError):
+        uc.run_script("unknown", [("validate_card", dict(encrypted_card_info="{}"))])
+
+
+def test_usecase_withdraw_retried_with_idempotency_key_runs_once(mocker):
+    uc, session_id = _script_use_case()
+    uc.auth(pin="0000", session_id=session_id)
+    bank_withdraw = mocker.spy(uc.bank_repo.bank_repo, "withdraw")
+    init_cash_bin = uc.cash_bin.get_total()
+
+    first = uc.withdraw(account_id="101010", session_id=session_id, amount=30, idempotency_key="tx-1")
+    retry = uc.withdraw(account_id="101010", session_id=session_id, amount=30, idempotency_key="tx-1")
+
+    assert first.success and first.balance == 70
+    assert retry == first
+    assert bank_withdraw.call_count == 1
+    assert uc.cash_bin.get_total() == init_cash_bin - 30
+
+    other = uc.withdraw(account_id="101010", session_id=session_id, amount=30, idempotency_key="tx-2")
+    assert other.success and other.balance == 40
+
+    reused = uc.deposit(account_id="101010", session_id=session_id, amount=30, idempotency_key="tx-2")
+    assert not reused.success
+    assert reused.message == "idempotency key was used for another request"
+
+
+def test_usecase_concurrent_retries_with_idempotency_key_are_coalesced(mocker):
+    uc, session_id = _script_use_case()
+    uc.auth(pin="0000", session_id=session_id)
+    bank_deposit = uc.bank_repo.bank_repo.deposit
+
+    def slow_deposit(**kwargs):
+        time.sleep(0.05)
+        return bank_deposit(**kwargs)
+
+    mocker.patch.object(uc.bank_repo.bank_repo, "deposit", side_effect=slow_deposit)
+    results = []
+
+    def worker():
+        results.append(uc.deposit(account_id="101010", session_id=session_id, amount=10, idempotency_key="tx-1"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert uc.bank_repo.bank_repo.deposit.call_count == 1
+    assert [res.balance for res in results] == [110] * 8
+
+
+def test_usecase_auth_rate_limited_per_card_and_terminal(mocker):
+    uc, session_id = _script_use_case()
+    clock = ManualClock()
+    uc.card_limiter = TokenBucketLimiter(rate=1 / 60, burst=3, clock=clock)
+    uc.terminal_limiter = TokenBucketLimiter(rate=1, burst=2, clock=clock)
+    get_auth_key = mocker.spy(uc.bank_repo.bank_repo, "get_auth_key")
+
+    results = [uc.auth(pin="1111", session_id=session_id, terminal_id="10.0.0.1") for _ in range(3)]
+    assert [res.message for res in results] == [
+        "invalid pin and auth data",
+        "invalid pin and auth data",
+        "too many attempts from this terminal, try again later",
+    ]
+
+    res = uc.auth(pin="1111", session_id=session_id, terminal_id="10.0.0.2")
+    assert res.message == "invalid pin and auth data"
+    res = uc.auth(pin="0000", session_id=session_id, terminal_id="10.0.0.3")
+    assert not res.success
+    assert res.message == "too many PIN attempts for this card, try again later"
+    assert get_auth_key.call_count == 3
+
+    clock.advance(60)
+    assert uc.auth(pin="0000", session_id=session_id, terminal_id="10.0.0.3").success
+
+
+def test_usecase_auth_sheds_load_when_the_bank_is_busy(mocker):
+    uc, session_id = _script_use_case()
+    uc.bank_limiter = ConcurrencyLimiter(1)
+    get_auth_key = mocker.spy(uc.bank_repo.bank_repo, "get_auth_key")
+
+    assert uc.bank_limiter.try_acquire()  # an auth already waiting on the bank
+    res = uc.auth(pin="0000", session_id=session_id)
+    assert not res.success
+    assert res.message == "bank is busy, try again later"
+    assert get_auth_key.call_count == 0
+
+    uc.bank_limiter.release()
+    assert uc.auth(pin="0000", session_id=session_id).success
+    assert uc.bank_limiter.try_acquire()  # the slot was given back
+
+
+def test_usecase_withdraw_failure_due_to_notes(mocker):
+    uc, session_id = _script_use_case()
+    uc.cash_bin = CassetteCashBinUseCase({50: 10, 20: 10})
+    uc.auth(pin="0000", session_id=session_id)
+    bank_withdraw = mocker.spy(uc.bank_repo.bank_repo, "withdraw")
+
+    res = uc.withdraw(account_id="101010", session_id=session_id, amount=30)
+    assert not res.success
+    assert res.message == "amount cannot be dispensed with the notes in ATM"
+    assert res.balance == 100
+    assert bank_withdraw.call_count == 0
+
+    res = uc.withdraw(account_id="101010", session_id=session_id, amount=60)
+    assert res.success and res.balance == 40
+    assert uc.cash_bin.get_counts() == {50: 10, 20: 7}
+
+
+@pytest.mark.parametrize("cash_bin", [
+    FakeCashBinUseCase(init_amount=1000),
+    CassetteCashBinUseCase({50: 12, 20: 25}, max_notes=10),  # 1100
+], ids=["total", "cassettes"])
+def test_usecase_concurrent_withdrawals_never_oversell(mocker, cash_bin):
+    uc, _ = _script_use_case()
+    uc.cash_bin = cash_bin
+    bank_repo = uc.bank_repo.bank_repo
+    bank_repo.account_store.get_by_id("101010").balance = 10**9
+    initial_cash = cash_bin.get_total()
+    card_info = json.dumps(CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    ).to_dict())
+    n_threads, n_ops, amounts = 16, 20, [30, 50, 70, 100, 120]
+
+    bank_withdraw = bank_repo.withdraw
+
+    def slow_withdraw(**kwargs):  # every withdrawal is in flight at the bank for a while, overlapping the others
+        time.sleep(0.001)
+        return bank_withdraw(**kwargs)
+
+    mocker.patch.object(bank_repo, "withdraw", side_effect=slow_withdraw)
+    dispensed, lows = [], []
+
+    def worker(t):
+        session_id = uc.validate_card(card_info).session_id
+        assert uc.auth(pin="0000", session_id=session_id).success
+        for i in range(n_ops):
+            amount = amounts[(t + i) % len(amounts)]
+            res = uc.withdraw(account_id="101010", session_id=session_id, amount=amount)
+            if res.success:
+                dispensed.append(amount)
+            lows.append(cash_bin.get_total())
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert min(lows) >= 0
+    assert sum(dispensed) <= initial_cash
+    assert cash_bin.get_total() == initial_cash - sum(dispensed)
+    assert bank_repo.account_store.get_by_id("101010").balance == 10**9 - sum(dispensed)
+    assert sum(dispensed) > initial_cash - max(amounts)  # every withdrawal that could be paid was
+
+
+@pytest.mark.parametrize("cash_bin", [
+    FakeCashBinUseCase(init_amount=1000),  # room for 1000 more
+    CassetteCashBinUseCase({50: 12, 20: 25}, max_notes=10, deposit_capacity=1000),
+], ids=["total", "cassettes"])
+def test_usecase_concurrent_deposits_never_overfill(mocker, cash_bin):
+    uc, _ = _script_use_case()
+    uc.cash_bin = cash_bin
+    bank_repo = uc.bank_repo.bank_repo
+    initial_balance = bank_repo.account_store.get_by_id("101010").balance
+    initial_capacity = cash_bin.get_max_deposit()
+    card_info = json.dumps(CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    ).to_dict())
+    n_threads, n_ops, amounts = 16, 20, [30, 50, 70, 100, 120]
+
+    bank_deposit = bank_repo.deposit
+
+    def slow_deposit(**kwargs):  # every deposit is in flight at the bank for a while, overlapping the others
+        time.sleep(0.001)
+        return bank_deposit(**kwargs)
+
+    mocker.patch.object(bank_repo, "deposit", side_effect=slow_deposit)
+    deposited, rooms = [], []
+
+    def worker(t):
+        session_id = uc.validate_card(card_info).session_id
+        assert uc.auth(pin="0000", session_id=session_id).success
+        for i in range(n_ops):
+            amount = amounts[(t + i) % len(amounts)]
+            res = uc.deposit(account_id="101010", session_id=session_id, amount=amount)
+            if res.success:
+                deposited.append(amount)
+            rooms.append(cash_bin.get_max_deposit())
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert min(rooms) >= 0
+    assert sum(deposited) <= initial_capacity
+    assert cash_bin.get_max_deposit() == initial_capacity - sum(deposited)
+    assert bank_repo.account_store.get_by_id("101010").balance == initial_balance + sum(deposited)
+    assert sum(deposited) > initial_capacity - max(amounts)  # every deposit that fitted was taken
+
+
+def test_usecase_deposit_releases_the_capacity_when_the_bank_fails(mocker):
+    uc, session_id = _script_use_case()
+    uc.auth(pin="0000", session_id=session_id)
+    init_max_deposit = uc.cash_bin.get_max_deposit()
+
+    mocker.patch.object(uc.bank_repo.bank_repo, "deposit", side_effect=ConnectionError("bank is down"))
+    with pytest.raises(ConnectionError):
+        uc.deposit(account_id="101010", session_id=session_id, amount=30)
+    assert uc.cash_bin.get_max_deposit() == init_max_deposit
+
+
+def test_usecase_withdraw_releases_the_cash_when_the_bank_refuses_or_fails(mocker):
+    uc, session_id = _script_use_case()
+    uc.auth(pin="0000", session_id=session_id)
+    init_cash_bin = uc.cash_bin.get_total()
+
+    res = uc.withdraw(account_id="101010", session_id=session_id, amount=1000)
+    assert not res.success
+    assert res.message == "Insufficient balance"
+    assert uc.cash_bin.get_total() == init_cash_bin
 
+    mocker.patch.object(uc.bank_repo.bank_repo, "withdraw", side_effect=ConnectionError("bank is down"))
+    with pytest.raises(ConnectionError):
+        uc.withdraw(account_id="101010", session_id=session_id, amount=30)
+    assert uc.cash_bin.get_total() == init_cash_bin
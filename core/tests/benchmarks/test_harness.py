@@ -0,0 +1,28 @@
+from core.benchmarks.harness import BenchResult, measure, find_regressions, save_results, load_results
+
+
+def _result(name, ops_per_sec, p50_us):
+    return BenchResult(name=name, ops=1, ops_per_sec=ops_per_sec, p50_us=p50_us, p90_us=0, p99_us=0, max_us=0)
+
+
+def test_measure():
+    calls = []
+    r = measure("noop", calls.append, n=100, warmup=10)
+
+    assert calls == list(range(10)) + list(range(100))
+    assert r.name == "noop"
+    assert r.ops == 100
+    assert r.ops_per_sec > 0
+    assert r.p50_us <= r.p90_us <= r.p99_us <= r.max_us
+
+
+def test_find_regressions(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_results([_result("a", 1000, 10), _result("b", 1000, 10)], path)
+    baseline = load_results(path)
+
+    assert find_regressions([_result("a", 850, 11), _result("c", 1, 1000)], baseline, threshold=0.2) == []
+    assert find_regressions([_result("a", 700, 10), _result("b", 1000, 13)], baseline, threshold=0.2) == [
+        "a: ops/sec 700 < baseline 1000",
+        "b: p50 13.0us > baseline 10.0us",
+    ]
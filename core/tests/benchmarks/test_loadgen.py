@@ -0,0 +1,20 @@
+from core.benchmarks.loadgen import LoadConfig, run_threads, run_asyncio
+
+
+def _check(report, journeys):
+    assert report.journeys == journeys
+    assert not report.errors
+    assert len(report.latencies["validate_card"]) == journeys
+    assert len(report.latencies["end_session"]) == journeys
+    assert len(report.latencies["withdraw"]) + len(report.latencies["deposit"]) == journeys
+    assert report.percentile("auth", 0.5) <= report.percentile("auth", 0.99)
+    assert sum(report.histogram("auth").values()) == journeys
+    assert report.journeys_per_sec > 0
+
+
+def test_loadgen_thread_driver():
+    _check(run_threads(LoadConfig(concurrency=4, journeys=40, bank_latency=0.0005, n_cards=10)), 40)
+
+
+def test_loadgen_asyncio_driver():
+    _check(run_asyncio(LoadConfig(concurrency=16, journeys=40, think_time=0.0005, bank_latency=0.0005, n_cards=10)), 40)
@@ -0,0 +1,234 @@
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from core.clock import ManualClock
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account, AccountStore
+
+
+def _card_data(card_number="1234567890123456"):
+    return CardData(
+        card_number=card_number,
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _bank_repo_with_accounts(card_data, n_accounts):
+    repo = FakeBankRepository()
+    repo.auth_store[card_data.card_number] = f"0000#{card_data.card_verification_code}#{card_data.expiration_date}"
+    for i in range(n_accounts):
+        repo.add_account(Account(account_id=f"acc-{i}", card_number=card_data.card_number, balance=i))
+    return repo
+
+
+def test_account_store_lookup_by_id_and_card():
+    store = AccountStore()
+    store.add(Account(account_id="1", card_number="A", balance=10))
+    store.add(Account(account_id="2", card_number="A", balance=20))
+    store.add(Account(account_id="3", card_number="B", balance=30))
+
+    assert len(store) == 3
+    assert store.get_by_id("3").balance == 30
+    assert store.get("A", "2").balance == 20
+    assert store.get("B", "2") is None  # account belongs to another card
+    assert store.get("C", "1") is None
+    assert store.get_account_ids("A") == ["1", "2"]  # insertion ordered
+    assert [a.account_id for a in store.get_accounts("B")] == ["3"]
+
+
+def test_account_store_readd_moves_account_between_cards():
+    store = AccountStore()
+    store.add(Account(account_id="1", card_number="A", balance=10))
+    store.add(Account(account_id="1", card_number="B", balance=15))
+
+    assert store.get("A", "1") is None
+    assert store.get("B", "1").balance == 15
+    assert store.get_account_ids("A") == []
+
+    assert store.remove("1").balance == 15
+    assert store.remove("1") is None
+    assert len(store) == 0
+
+
+def test_bank_repo_account_operations_use_index():
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 500)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    res = repo.get_accounts(auth_key=auth_key)
+    assert res.success
+    assert len(res.account_ids) == 500
+    assert res.account_ids[0] == "acc-0"
+
+    res = repo.get_balance(auth_key=auth_key, account_id="acc-499")
+    assert res.success
+    assert res.balance == 499
+
+    res = repo.deposit(auth_key=auth_key, account_id="acc-499", amount=1)
+    assert res.success
+    assert res.balance == 500
+
+    res = repo.withdraw(auth_key=auth_key, account_id="acc-499", amount=501)
+    assert not res.success
+    assert res.message == "Insufficient balance"
+    assert res.balance == 500
+
+    res = repo.withdraw(auth_key=auth_key, account_id="acc-499", amount=100)
+    assert res.success
+    assert res.balance == 400
+
+
+def test_bank_repo_cannot_reach_accounts_of_other_cards():
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 3)
+    repo.add_account(Account(account_id="other", card_number="9999999999999999", balance=1000))
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    for res in [
+        repo.get_balance(auth_key=auth_key, account_id="other"),
+        repo.deposit(auth_key=auth_key, account_id="other", amount=1),
+        repo.withdraw(auth_key=auth_key, account_id="other", amount=1),
+    ]:
+        assert not res.success
+        assert res.message == "Account not found"
+        assert res.account_id == "other"
+
+    assert repo.account_store.get_by_id("other").balance == 1000  # Unchanged
+
+
+def test_bank_repo_purges_expired_auth_keys():
+    clock = ManualClock(time=1_000_000.0)
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 1)
+    repo.clock = clock
+
+    expired_auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    clock.advance(FakeBankRepository.SESSION_LIFETIME * 60 + 1)
+
+    # lazy purge on lookup
+    res = repo.get_balance(auth_key=expired_auth_key, account_id="acc-0")
+    assert not res.success
+    assert res.message == "Auth key expired"
+    assert len(repo.session_store) == 0
+
+    # periodic purge on insert
+    repo.get_auth_key(card_data=card_data, pin="0000")
+    clock.advance(FakeBankRepository.SESSION_LIFETIME * 60 + 1)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    assert len(repo.session_store) == 1
+    assert repo.get_balance(auth_key=auth_key, account_id="acc-0").success
+
+
+def test_bank_repo_max_auth_keys():
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 1)
+    repo.session_store.max_keys = 3
+
+    repo.session_store.sweep_interval = 3600  # only a full store sweeps
+    clock = ManualClock(time=1_000_000.0)
+    repo.clock = clock
+
+    auth_keys = [repo.get_auth_key(card_data=card_data, pin="0000") for _ in range(3)]
+    assert repo.get_auth_key(card_data=card_data, pin="0000") is None  # full of live keys: refused
+    assert len(repo.session_store) == 3
+    assert all(repo.get_accounts(auth_key=auth_key).success for auth_key in auth_keys)  # no live key was dropped
+
+    clock.advance(FakeBankRepository.SESSION_LIFETIME * 60 + 1)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")  # the expired keys make room
+    assert auth_key is not None
+    assert len(repo.session_store) == 1
+    assert repo.get_accounts(auth_key=auth_key).success
+
+
+# Soak test: auth keys keep being issued while the clock moves forward; the auth key store must plateau at the number
+# of keys alive within one SESSION_LIFETIME and memory must stay flat. Set ATM_SOAK_AUTHS=5000000 to soak millions of auths.
+def test_bank_repo_auth_key_soak():
+    n_auths = int(os.environ.get("ATM_SOAK_AUTHS", 20_000))
+    clock = ManualClock(time=1_000_000.0)
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 1)
+    repo.clock = clock
+    lifetime = FakeBankRepository.SESSION_LIFETIME * 60
+    auths_per_second = 10
+
+    def run(n):
+        for i in range(n):
+            repo.get_auth_key(card_data=card_data, pin="0000")
+            if i % auths_per_second == 0:
+                clock.advance(1)
+
+    tracemalloc.start()
+    try:
+        run(lifetime * auths_per_second * 2)  # warm up: reach steady state
+        baseline, _ = tracemalloc.get_traced_memory()
+        run(n_auths)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(repo.session_store) <= (lifetime + 2) * auths_per_second
+    assert current - baseline < 256 * 1024
+
+
+# _YieldingAccount gives up the GIL between reading and writing its balance, widening every read-modify-write window
+class _YieldingAccount(Account):
+    @property
+    def balance(self):
+        value = self._balance
+        time.sleep(0)
+        return value
+
+    @balance.setter
+    def balance(self, value):
+        self._balance = value
+
+
+# Stress test: threads hammer a handful of shared accounts; no update may be lost and no account may be overdrawn
+def test_bank_repo_concurrent_balance_updates():
+    card_data = _card_data()
+    repo = _bank_repo_with_accounts(card_data, 0)
+    account_ids = [f"acc-{i}" for i in range(4)]
+    for account_id in account_ids:
+        repo.add_account(_YieldingAccount(account_id=account_id, card_number=card_data.card_number, balance=100))
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    n_threads, n_ops = 8, 500
+    net = [{account_id: 0 for account_id in account_ids} for _ in range(n_threads)]
+    overdrafts = []
+
+    def worker(t):
+        rnd = random.Random(t)
+        for _ in range(n_ops):
+            account_id = rnd.choice(account_ids)
+            amount = rnd.randint(1, 10)
+            if rnd.random() < 0.5:
+                res = repo.deposit(auth_key=auth_key, account_id=account_id, amount=amount)
+                net[t][account_id] += amount
+            else:
+                res = repo.withdraw(auth_key=auth_key, account_id=account_id, amount=amount)
+                if res.success:
+                    net[t][account_id] -= amount
+            if res.balance < 0:
+                overdrafts.append(res)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force frequent thread switches to surface races
+    try:
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert not overdrafts
+    for account_id in account_ids:
+        expected = 100 + sum(n[account_id] for n in net)
+        assert repo.account_store.get_by_id(account_id).balance == expected
@@ -0,0 +1,54 @@
+import asyncio
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository
+from core.repo.credentials import CredentialStore, CredentialVerifier
+
+
+def test_credential_store_keeps_only_hashes():
+    store = CredentialStore()
+    store["1234567890123456"] = "0000#123#20300101"
+
+    credential_hash = store.get_hash("1234567890123456")
+    assert credential_hash.startswith("$argon2id$")
+    assert "0000#123#20300101" not in credential_hash
+    assert "1234567890123456" in store and len(store) == 1
+
+
+def test_credential_store_verify():
+    store = CredentialStore()
+    store["1234567890123456"] = "0000#123#20300101"
+
+    assert store.verify("1234567890123456", "0000#123#20300101")
+    assert not store.verify("1234567890123456", "1111#123#20300101")
+    assert not store.verify("6543210987654321", "0000#123#20300101")  # unknown card
+    assert asyncio.run(store.verify_async("1234567890123456", "0000#123#20300101"))
+    assert not asyncio.run(store.verify_async("1234567890123456", "1111#123#20300101"))
+
+
+def test_credential_verifier_process_pool():
+    verifier = CredentialVerifier(workers=2, processes=True)
+    try:
+        store = CredentialStore(verifier=verifier)
+        store["1234567890123456"] = "0000#123#20300101"
+
+        assert store.verify("1234567890123456", "0000#123#20300101")
+        assert not store.verify("1234567890123456", "1111#123#20300101")
+    finally:
+        verifier.shutdown()
+
+
+def test_bank_repo_get_auth_key_async():
+    card_data = CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+    repo = FakeBankRepository()
+    repo.auth_store[card_data.card_number] = "0000#123#20300101"
+
+    auth_key = asyncio.run(repo.get_auth_key_async(card_data=card_data, pin="0000"))
+    assert repo.get_accounts(auth_key=auth_key).success
+    assert asyncio.run(repo.get_auth_key_async(card_data=card_data, pin="1111")) is None
@@ -0,0 +1,128 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from argon2 import PasswordHasher
+from django.apps import apps
+from django.db import connection
+
+from core.domain.entity import CardData
+from core.models import BankAuthKey, BankCredential
+from core.repo.credentials import CredentialStore
+from core.repo.django_bank_repo import DjangoBankRepository
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+@pytest.fixture
+def repo(card_data):
+    repo = DjangoBankRepository(credential_store=CredentialStore())  # cheapest Argon2 parameters, for speed
+    repo.set_credential(card_data.card_number, f"0000#{card_data.card_verification_code}#{card_data.expiration_date}")
+    repo.add_account(account_id="101010", card_number=card_data.card_number, balance=100)
+    repo.add_account(account_id="202020", card_number=card_data.card_number, balance=0)
+    repo.add_account(account_id="other", card_number="9999999999999999", balance=1000)
+    return repo
+
+
+def test_django_bank_repo_auth(repo, card_data):
+    assert repo.get_auth_key(card_data=card_data, pin="9999") is None
+
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    res = repo.get_accounts(auth_key=auth_key)
+    assert res.success
+    assert res.account_ids == ["101010", "202020"]
+
+    res = repo.get_accounts(auth_key="unknown")
+    assert not res.success
+    assert res.message == "Auth key expired"
+
+
+def test_django_bank_repo_hashes_with_rfc_9106_parameters_by_default():
+    hasher = DjangoBankRepository().credential_store.hasher
+    assert (hasher.time_cost, hasher.memory_cost) == (PasswordHasher().time_cost, PasswordHasher().memory_cost)
+
+
+def test_django_bank_repo_stores_credential_hashes(repo, card_data):
+    secret = BankCredential.objects.get(card_number=card_data.card_number).secret
+    assert secret.startswith("$argon2id$")
+    assert "0000#123#20300101" not in secret
+
+
+@pytest.mark.django_db(transaction=True)
+def test_django_bank_repo_get_auth_key_async(repo, card_data):
+    auth_key = asyncio.run(repo.get_auth_key_async(card_data=card_data, pin="0000"))
+    assert repo.get_accounts(auth_key=auth_key).success
+    assert asyncio.run(repo.get_auth_key_async(card_data=card_data, pin="9999")) is None
+
+
+def test_hash_bank_credentials_migration(repo, card_data):
+    BankCredential.objects.create(card_number="9999999999999999", secret="1111#456#20300101")
+    hashed = BankCredential.objects.get(card_number=card_data.card_number).secret
+
+    migration = importlib.import_module("core.migrations.0002_hash_bank_credentials")
+    migration.hash_plain_credentials(apps, SimpleNamespace(connection=connection))
+
+    assert BankCredential.objects.get(card_number=card_data.card_number).secret == hashed  # already hashed: unchanged
+    card_data.card_number = "9999999999999999"
+    card_data.card_verification_code = "456"
+    assert repo.get_auth_key(card_data=card_data, pin="1111") is not None
+
+
+def test_django_bank_repo_expired_auth_key(repo, card_data):
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    BankAuthKey.objects.filter(auth_key=auth_key).update(expiration=0)
+
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")
+    assert not res.success
+    assert res.message == "Auth key expired"
+
+    assert repo.purge_expired_auth_keys() == 1
+    assert not BankAuthKey.objects.exists()
+
+
+def test_django_bank_repo_balance_operations(repo, card_data):
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")
+    assert res.success
+    assert res.balance == 100
+
+    res = repo.deposit(auth_key=auth_key, account_id="101010", amount=50)
+    assert res.success
+    assert res.message == "Deposit successful"
+    assert res.balance == 150
+
+    res = repo.withdraw(auth_key=auth_key, account_id="101010", amount=151)
+    assert not res.success
+    assert res.message == "Insufficient balance"
+    assert res.balance == 150  # Unchanged
+
+    res = repo.withdraw(auth_key=auth_key, account_id="101010", amount=150)
+    assert res.success
+    assert res.message == "Withdraw successful"
+    assert res.balance == 0
+
+
+def test_django_bank_repo_cannot_reach_accounts_of_other_cards(repo, card_data):
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    for res in [
+        repo.get_balance(auth_key=auth_key, account_id="other"),
+        repo.deposit(auth_key=auth_key, account_id="other", amount=1),
+        repo.withdraw(auth_key=auth_key, account_id="other", amount=1),
+    ]:
+        assert not res.success
+        assert res.message == "Account not found"
+        assert res.account_id == "other"
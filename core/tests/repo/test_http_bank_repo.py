@@ -0,0 +1,158 @@
+import socket
+
+import pytest
+
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.bank_server import BankHttpServer
+from core.repo.http_bank_repo import HttpBankRepository
+from core.util import CircuitBreaker
+
+
+@pytest.fixture
+def card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+@pytest.fixture
+def bank_server(card_data):
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store[card_data.card_number] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number=card_data.card_number, balance=100))
+    server = BankHttpServer(bank_repo=bank_repo)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _unused_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_http_bank_repo_operations(bank_server, card_data):
+    repo = HttpBankRepository(bank_server.base_url)
+
+    assert repo.get_auth_key(card_data=card_data, pin="9999") is None
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    assert repo.get_accounts(auth_key=auth_key).account_ids == ["101010"]
+    assert repo.get_balance(auth_key=auth_key, account_id="101010").balance == 100
+
+    res = repo.deposit(auth_key=auth_key, account_id="101010", amount=50)
+    assert res.success
+    assert res.balance == 150
+
+    res = repo.withdraw(auth_key=auth_key, account_id="101010", amount=500)
+    assert not res.success
+    assert res.message == "Insufficient balance"
+
+    res = repo.get_balance(auth_key="unknown", account_id="101010")
+    assert not res.success
+    assert res.message == "Auth key expired"
+
+    assert bank_server.connections == 1  # keep-alive: every call reused the same pooled connection
+    repo.close()
+
+
+def test_http_bank_repo_retries_reads_but_not_mutations(bank_server, card_data):
+    repo = HttpBankRepository(bank_server.base_url, max_retries=2, backoff=0.001)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    bank_server.fail_next = 2
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")
+    assert res.success  # third attempt succeeds
+
+    bank_server.fail_next = 1
+    res = repo.deposit(auth_key=auth_key, account_id="101010", amount=50)
+    assert not res.success
+    assert res.message == "Bank unavailable"
+    assert repo.get_balance(auth_key=auth_key, account_id="101010").balance == 100  # deposit was not replayed
+
+
+def test_http_bank_repo_circuit_breaker_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    repo = HttpBankRepository(f"http://127.0.0.1:{_unused_port()}", max_retries=1, backoff=0.001, circuit_breaker=breaker)
+
+    for _ in range(2):
+        res = repo.get_balance(auth_key="1", account_id="101010")
+        assert not res.success
+        assert res.message == "Bank unavailable"
+    assert breaker.state == CircuitBreaker.OPEN
+
+    repo.http = None  # an open circuit must not even try to connect
+    assert repo.get_balance(auth_key="1", account_id="101010").message == "Bank unavailable"
+
+
+def test_circuit_breaker_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow()  # reset timeout elapsed: one trial call
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_http_bank_repo_half_open_trial_settles_on_4xx_and_bad_bodies(bank_server, card_data):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    repo = HttpBankRepository(bank_server.base_url, max_retries=0, circuit_breaker=breaker)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+
+    breaker.record_failure()
+    bank_server.fail_next, bank_server.fail_status = 1, 429
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")  # the half-open trial call gets a 4xx
+    assert not res.success
+    assert breaker.state == CircuitBreaker.CLOSED  # the bank answered: it is up
+    assert repo.get_balance(auth_key=auth_key, account_id="101010").balance == 100
+
+    breaker.record_failure()
+    post_once = repo._post_once
+
+    def bad_body(path, payload):
+        raise ValueError("not JSON")
+
+    repo._post_once = bad_body
+    assert repo.get_balance(auth_key=auth_key, account_id="101010").message == "Bank unavailable"
+    assert breaker.state == CircuitBreaker.OPEN  # not stuck half-open
+
+    repo._post_once = post_once
+    assert repo.get_balance(auth_key=auth_key, account_id="101010").balance == 100
+    assert breaker.state == CircuitBreaker.CLOSED
+    repo.close()
+
+
+def test_http_bank_repo_ignores_unknown_fields_and_rejects_unusable_bodies(bank_server, card_data):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    repo = HttpBankRepository(bank_server.base_url, max_retries=0, circuit_breaker=breaker)
+    auth_key = repo.get_auth_key(card_data=card_data, pin="0000")
+    post_once = repo._post_once
+
+    def extra_field(path, payload):
+        return dict(post_once(path, payload), currency="USD")
+
+    repo._post_once = extra_field
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")
+    assert res.success
+    assert res.balance == 100
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    def missing_field(path, payload):
+        return {"balance": 100}
+
+    repo._post_once = missing_field
+    res = repo.get_balance(auth_key=auth_key, account_id="101010")
+    assert not res.success
+    assert res.message == "Bank unavailable"
+    assert breaker.state == CircuitBreaker.OPEN  # a body the DTO cannot be built from is a malformed response
+    repo.close()
@@ -0,0 +1,136 @@
+import json
+import time
+
+import pytest
+import redis
+
+from core.application.use_case import ATMUseCase
+from core.domain.entity import CardData
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.redis_session_repo import RedisSessionRepository, RedisAuthKeyStore
+from core.repo.resp_server import RespServer
+
+
+@pytest.fixture(scope="module")
+def resp_server():
+    server = RespServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(resp_server):
+    client = redis.Redis.from_url(resp_server.url)
+    client.flushdb()
+    yield client
+    client.connection_pool.disconnect()
+
+
+def _card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def test_redis_session_repo_create_get_save_delete(client):
+    repo = RedisSessionRepository(client=client)
+    session_id = repo.create(card_data=_card_data())
+    assert client.ttl(repo.prefix + session_id) == RedisSessionRepository.SESSION_LIFETIME * 60
+
+    session = repo.get_if_valid(session_id=session_id)
+    assert session.card_data.to_dict() == _card_data().to_dict()
+    assert session.auth_key is None
+
+    session.auth_key = "key"
+    session.balances["101010"] = 100
+    repo.save(session=session)
+    assert repo.get(session_id=session_id).to_dict() == session.to_dict()
+    assert client.ttl(repo.prefix + session_id) > 0  # save keeps the lifetime
+    assert len(repo) == 1
+
+    assert repo.delete(session_id=session_id)
+    assert not repo.delete(session_id=session_id)
+    assert repo.get(session_id=session_id) is None
+
+
+def test_redis_session_repo_expiry_is_left_to_the_server(client):
+    repo = RedisSessionRepository(client=client)
+    session_id = repo.create(card_data=_card_data())
+    session = repo.get(session_id=session_id)
+    client.set(repo.prefix + session_id, client.get(repo.prefix + session_id), px=1)
+    time.sleep(0.01)
+
+    assert repo.get_if_valid(session_id=session_id) is None
+    assert not repo.save_if_valid(session=session)
+    repo.save(session=session)  # an expired session is not brought back
+    assert repo.get(session_id=session_id) is None
+
+
+def test_redis_auth_key_store(client):
+    store = RedisAuthKeyStore(client=client)
+    store.add("key", "1234567890123456", expiration=1060, now=1000)
+    assert client.ttl(store.prefix + "key") == 60
+    assert store.get_card_number("key", now=1000) == "1234567890123456"
+    assert store.get_card_number("other", now=1000) is None
+
+    store.add("expired", "1234567890123456", expiration=1000, now=1000)
+    assert store.get_card_number("expired", now=1000) is None
+    assert len(store) == 1
+
+
+def _use_case(url):
+    bank_repo = FakeBankRepository(auth_key_store=RedisAuthKeyStore(url=url))
+    bank_repo.auth_store["1234567890123456"] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number="1234567890123456", balance=100))
+    return ATMUseCase(session_repo=RedisSessionRepository(url=url), bank_repo=bank_repo)
+
+
+def test_redis_session_repo_auth_round_trips(resp_server, client):
+    uc = _use_case(resp_server.url)
+    uc.auth(pin="0000", session_id=uc.validate_card(json.dumps(_card_data().to_dict())).session_id)  # opens the pools
+    session_id = uc.validate_card(json.dumps(_card_data().to_dict())).session_id
+
+    commands = resp_server.commands
+    res = uc.auth(pin="0000", session_id=session_id)
+    assert res.success and res.account_ids == ["101010"]
+    # session: GET, then SET XX KEEPTTL (validate + save); bank: SET EX the auth key, GET it back for the accounts
+    assert resp_server.commands - commands == 4
+
+    assert uc.withdraw(account_id="101010", session_id=session_id, amount=30).balance == 70
+    assert uc.end_session(session_id=session_id).success
+
+
+def test_redis_session_repo_auth_rejects_session_ended_during_pin_check(resp_server, client, mocker):
+    uc = _use_case(resp_server.url)
+    session_id = uc.validate_card(json.dumps(_card_data().to_dict())).session_id
+
+    def eject_then_check(card_data, pin):
+        uc.session_repo.delete(session_id=session_id)
+        return "11111"
+    mocker.patch.object(uc.bank_repo.bank_repo, "get_auth_key", side_effect=eject_then_check)
+
+    res = uc.auth(pin="0000", session_id=session_id)
+    assert not res.success
+    assert res.message == "session is invalid"
+    assert uc.session_repo.get(session_id=session_id) is None
+
+
+def test_resp_server_pipeline(client):
+    pipe = client.pipeline(transaction=False)
+    pipe.set("a", "1", ex=10)
+    pipe.set("a", "2", nx=True)
+    pipe.get("a")
+    pipe.pttl("a")
+    pipe.delete("a", "b")
+    pipe.exists("a")
+    ok, not_set, value, pttl, deleted, exists = pipe.execute()
+
+    assert ok and not not_set
+    assert value == b"1"
+    assert 0 < pttl <= 10000
+    assert deleted == 1 and exists == 0
@@ -0,0 +1,91 @@
+import time
+
+from core.clock import ManualClock
+from core.domain.entity import CardData
+from core.repo.session_repo import InMemorySessionRepository
+
+
+def _card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _expire(repo, session_id):
+    repo.kv_store[session_id].expiry = 0
+
+
+def test_session_repo_create_get_delete():
+    repo = InMemorySessionRepository()
+    session_id = repo.create(card_data=_card_data())
+
+    session = repo.get_if_valid(session_id=session_id)
+    assert session.session_id == session_id
+    assert session.card_data.card_number == "1234567890123456"
+
+    assert repo.delete(session_id=session_id)
+    assert not repo.delete(session_id=session_id)
+    assert repo.get_if_valid(session_id=session_id) is None
+    assert repo.stats() == dict(live=0, evicted_expired=0, evicted_capacity=0, deleted=1)
+
+
+def test_session_repo_evicts_expired_sessions_on_create():
+    repo = InMemorySessionRepository()
+    session_ids = [repo.create(card_data=_card_data()) for _ in range(3)]
+    _expire(repo, session_ids[0])
+    _expire(repo, session_ids[1])
+
+    new_session_id = repo.create(card_data=_card_data())
+
+    assert list(repo.kv_store) == [session_ids[2], new_session_id]
+    assert repo.stats() == dict(live=2, evicted_expired=2, evicted_capacity=0, deleted=0)
+
+
+def test_session_repo_get_if_valid_drops_expired_session():
+    repo = InMemorySessionRepository()
+    session_id = repo.create(card_data=_card_data())
+    _expire(repo, session_id)
+
+    assert repo.get_if_valid(session_id=session_id) is None
+    assert session_id not in repo.kv_store
+    assert repo.stats()["evicted_expired"] == 1
+
+
+def test_session_repo_sessions_expire_after_their_lifetime():
+    clock = ManualClock()
+    repo = InMemorySessionRepository(clock=clock)
+    session_id = repo.create(card_data=_card_data())
+
+    clock.advance(InMemorySessionRepository.SESSION_LIFETIME * 60 - 1)
+    assert repo.get_if_valid(session_id=session_id) is not None
+    clock.advance(1)
+    assert repo.get_if_valid(session_id=session_id) is None
+
+
+def test_session_repo_max_sessions():
+    repo = InMemorySessionRepository(max_sessions=2)
+    session_ids = [repo.create(card_data=_card_data()) for _ in range(5)]
+
+    assert list(repo.kv_store) == session_ids[-2:]
+    assert repo.stats() == dict(live=2, evicted_expired=0, evicted_capacity=3, deleted=0)
+
+
+def test_session_repo_background_sweeper():
+    repo = InMemorySessionRepository()
+    session_ids = [repo.create(card_data=_card_data()) for _ in range(3)]
+    for session_id in session_ids:
+        _expire(repo, session_id)
+
+    repo.start_sweeper(interval=0.01)
+    try:
+        deadline = time.time() + 5
+        while repo.kv_store and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        repo.stop_sweeper()
+
+    assert repo.stats() == dict(live=0, evicted_expired=3, evicted_capacity=0, deleted=0)
@@ -0,0 +1,87 @@
+import json
+import multiprocessing
+
+from core.application.use_case import ATMUseCase
+from core.domain.entity import CardData, Session
+from core.repo.bank_repo import FakeBankRepository, Account
+from core.repo.sqlite_session_repo import SqliteSessionRepository
+
+
+def _card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def test_sqlite_session_repo_create_get_save_delete(tmp_path):
+    repo = SqliteSessionRepository(str(tmp_path / "sessions.db"))
+    session_id = repo.create(card_data=_card_data())
+
+    session = repo.get_if_valid(session_id=session_id)
+    assert session.card_data.to_dict() == _card_data().to_dict()
+    assert session.auth_key is None
+
+    session.auth_key = "key"
+    session.balances["101010"] = 100
+    repo.save(session=session)
+    assert repo.get(session_id=session_id).to_dict() == session.to_dict()
+
+    assert repo.delete(session_id=session_id)
+    assert not repo.delete(session_id=session_id)
+    assert repo.get(session_id=session_id) is None
+
+
+def test_sqlite_session_repo_expiry(tmp_path):
+    repo = SqliteSessionRepository(str(tmp_path / "sessions.db"), sweep_interval=0)
+    session_id = repo.create(card_data=_card_data())
+    session = repo.get(session_id=session_id)
+    session.expiry = 0
+    repo.save(session=session)
+
+    assert repo.get_if_valid(session_id=session_id) is None
+    assert not repo.save_if_valid(session=session)
+    repo.create(card_data=_card_data())  # sweeps expired sessions
+    assert repo.get(session_id=session_id) is None
+    assert len(repo) == 1
+
+
+def test_session_round_trips_through_dict():
+    session = Session(session_id="1", card_data=_card_data(), ttl=5, auth_key="key", balances={"101010": 5})
+    assert Session.from_dict(session.to_dict()).to_dict() == session.to_dict()
+
+
+def _worker(path, operation, session_id, queue):
+    bank_repo = FakeBankRepository()
+    bank_repo.auth_store["1234567890123456"] = "0000#123#20300101"
+    bank_repo.add_account(Account(account_id="101010", card_number="1234567890123456", balance=100))
+    uc = ATMUseCase(session_repo=SqliteSessionRepository(path), bank_repo=bank_repo)
+    if operation == "validate_card":
+        queue.put(uc.validate_card(json.dumps(_card_data().to_dict())).session_id)
+    elif operation == "auth":
+        queue.put(uc.auth(pin="0000", session_id=session_id).account_ids)
+    else:
+        queue.put(uc.end_session(session_id=session_id).success)
+
+
+# Each step of the journey runs in another process (e.g. another gunicorn worker)
+def test_sqlite_session_repo_shares_sessions_across_processes(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+
+    def run(operation, session_id=None):
+        process = ctx.Process(target=_worker, args=(path, operation, session_id, queue))
+        process.start()
+        result = queue.get(timeout=30)
+        process.join()
+        return result
+
+    session_id = run("validate_card")
+    assert run("auth", session_id) == ["101010"]
+    assert SqliteSessionRepository(path).get_if_valid(session_id=session_id).auth_key is not None
+    assert run("end_session", session_id) is True
+    assert SqliteSessionRepository(path).get(session_id=session_id) is None
@@ -0,0 +1,47 @@
+import os
+import time
+from datetime import datetime
+
+from core.clock import SYSTEM, CoarseClock, ManualClock
+
+
+def test_manual_clock():
+    clock = ManualClock.at("20230601")
+    assert clock.today() == "20230601"
+    assert clock.monotonic() == 0
+
+    clock.advance(24 * 60 * 60)
+    assert clock.today() == "20230602"
+    assert clock.monotonic() == 24 * 60 * 60
+    assert clock.time() == datetime(2023, 6, 2).timestamp()
+
+
+def test_coarse_clock_follows_the_system_clock():
+    clock = CoarseClock(resolution=0.001)
+    try:
+        first = clock.monotonic()
+        assert abs(first - SYSTEM.monotonic()) < 0.5
+        assert abs(clock.time() - SYSTEM.time()) < 0.5
+        assert clock.today() == SYSTEM.today()
+
+        deadline = time.monotonic() + 5
+        while clock.monotonic() == first and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert clock.monotonic() > first
+    finally:
+        clock.stop()
+
+
+def test_coarse_clock_restarts_its_ticker_after_fork():
+    clock = CoarseClock(resolution=0.001)
+    clock.start()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            first = clock.monotonic()
+            time.sleep(0.05)
+            os._exit(0 if clock.monotonic() > first else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+    finally:
+        clock.stop()
@@ -0,0 +1,78 @@
+import json
+
+import msgpack
+import pytest
+
+from core.api import RESPONSES
+from core.application.errors import InvalidRequestError
+from core.codec import JsonCodec, MsgpackCodec, get_codec, pack_card_data, JSON, MSGPACK
+from core.domain.entity import CardData
+from core.dto import GetBalanceRes, AuthRes
+from core.util import ChipDecryptor
+
+
+def _card_data():
+    return CardData(
+        card_number="1234567890123456",
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="101"
+    )
+
+
+def test_get_codec_by_content_type():
+    assert isinstance(get_codec(None), JsonCodec)
+    assert isinstance(get_codec("application/json; charset=utf-8"), JsonCodec)
+    assert isinstance(get_codec("application/msgpack"), MsgpackCodec)
+    assert isinstance(get_codec("Application/X-MsgPack"), MsgpackCodec)
+    assert get_codec("text/xml") is None
+
+
+def test_msgpack_responses_are_schema_ordered_arrays():
+    codec = MsgpackCodec()
+    res = GetBalanceRes(success=True, balance=100, account_id="101010", message="Retrieved account balance")
+
+    assert msgpack.unpackb(codec.encode_response(res)) == [True, 100, "101010", "Retrieved account balance"]
+    assert codec.decode_response("get_balance", codec.encode_response(res)) == res
+
+    res = AuthRes(success=True, message="ok", account_ids=["1", "2"])
+    assert codec.decode_response("auth", codec.encode_response(res)) == res
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_codecs_round_trip_every_response_type(codec):
+    for operation, response_type in RESPONSES.items():
+        res = response_type(success=False, message="session is invalid")
+        assert codec.decode_response(operation, codec.encode_response(res)) == res
+
+
+@pytest.mark.parametrize("codec", [JsonCodec(), MsgpackCodec()])
+def test_codecs_round_trip_requests(codec):
+    kwargs = dict(account_id="101010", session_id="abc", amount=100)
+    assert codec.decode_request("deposit", codec.encode_request("deposit", kwargs)) == kwargs
+
+
+def test_msgpack_requests_accept_arrays_and_maps():
+    codec = MsgpackCodec()
+    assert codec.decode_request("auth", msgpack.packb(["0000", "abc"])) == {"pin": "0000", "session_id": "abc"}
+    assert codec.decode_request("auth", msgpack.packb({"pin": "0000", "session_id": "abc"})) == {
+        "pin": "0000", "session_id": "abc"
+    }
+    with pytest.raises(InvalidRequestError, match="request must have 2 fields: pin, session_id"):
+        codec.decode_request("auth", msgpack.packb(["0000"]))
+    with pytest.raises(InvalidRequestError):
+        codec.decode_request("auth", b"\xc1")
+
+
+def test_chip_decryptor_reads_json_and_msgpack_card_data():
+    card_data = _card_data()
+    for encrypted in [json.dumps(card_data.to_dict()), pack_card_data(card_data)]:
+        assert ChipDecryptor().decrypt(encrypted).to_dict() == card_data.to_dict()
+
+
+def test_chip_decryptor_rejects_malformed_msgpack_card_data():
+    for encrypted in [b"\x93\x01\x02\x03", msgpack.packb(7), msgpack.packb(["1234567890123456"] * 4),
+                      msgpack.packb(["1234567890123456", "John Doe", "20300101", "123", 123])]:
+        with pytest.raises(ValueError):
+            ChipDecryptor().decrypt(encrypted)
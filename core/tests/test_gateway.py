@@ -0,0 +1,201 @@
+import asyncio
+import struct
+
+from core.application.admission import TokenBucketLimiter
+from core.application.async_use_case import AsyncATMUseCase
+from core.codec import pack_card_data
+from core.domain.entity import CardData
+from core.gateway import TerminalGateway, GatewayClient
+from core.repo.async_bank_repo import AsyncFakeBankRepository
+from core.repo.bank_repo import FakeBankRepository, Account
+
+
+def _card_data(card_number):
+    return CardData(
+        card_number=card_number,
+        name="John Doe",
+        expiration_date="20300101",
+        card_verification_code="123",
+        service_code="123"
+    )
+
+
+def _use_case(card_numbers, latency=0.0):
+    bank_repo = FakeBankRepository()
+    for card_number in card_numbers:
+        bank_repo.auth_store[card_number] = "0000#123#20300101"
+        bank_repo.add_account(Account(account_id=f"{card_number}-1", card_number=card_number, balance=1000))
+    return AsyncATMUseCase(bank_repo=AsyncFakeBankRepository(bank_repo=bank_repo, latency=latency))
+
+
+async def _start(gateway):
+    host, port = await gateway.start()
+    client = GatewayClient()
+    await client.connect(host, port)
+    return client
+
+
+def test_gateway_multiplexes_terminal_journeys_over_one_connection():
+    card_numbers = [f"{i:016d}" for i in range(20)]
+
+    async def journey(client, terminal_id, card_number):
+        res = await client.request(terminal_id, "validate_card", encrypted_card_info=pack_card_data(_card_data(card_number)))
+        assert res.success
+        session_id = res.session_id
+        res = await client.request(terminal_id, "auth", pin="0000", session_id=session_id)
+        assert res.account_ids == [f"{card_number}-1"]
+        res = await client.request(terminal_id, "withdraw", account_id=f"{card_number}-1", session_id=session_id, amount=100)
+        assert (res.success, res.balance) == (True, 900)
+        assert (await client.request(terminal_id, "end_session", session_id=session_id)).success
+
+    async def run():
+        gateway = TerminalGateway(use_case=_use_case(card_numbers, latency=0.01))
+        client = await _start(gateway)
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*[journey(client, f"atm-{i}", card_number) for i, card_number in enumerate(card_numbers)])
+        elapsed = asyncio.get_running_loop().time() - start
+        assert (gateway.total_connections, gateway.requests) == (1, 80)
+        await client.close()
+        await gateway.stop()
+        return elapsed
+
+    assert asyncio.run(run()) < 0.5  # 20 terminals x 3 sequential 10ms bank calls, pipelined
+
+
+def test_gateway_runs_requests_of_one_terminal_in_order():
+    card_number = "1234567890123456"
+
+    async def run():
+        gateway = TerminalGateway(use_case=_use_case([card_number], latency=0.005))
+        client = await _start(gateway)
+        res = await client.request("atm-1", "validate_card", encrypted_card_info=pack_card_data(_card_data(card_number)))
+        session_id = res.session_id
+        # sent back to back without waiting: the balance must only be read after auth and both deposits
+        results = await asyncio.gather(
+            client.request("atm-1", "auth", pin="0000", session_id=session_id),
+            client.request("atm-1", "deposit", account_id=f"{card_number}-1", session_id=session_id, amount=10),
+            client.request("atm-1", "deposit", account_id=f"{card_number}-1", session_id=session_id, amount=20),
+            client.request("atm-1", "get_balance", account_id=f"{card_number}-1", session_id=session_id),
+        )
+        await client.close()
+        await gateway.stop()
+        return results
+
+    auth, deposit1, deposit2, balance = asyncio.run(run())
+    assert auth.success
+    assert (deposit1.balance, deposit2.balance, balance.balance) == (1010, 1030, 1030)
+
+
+def test_gateway_bounds_in_flight_requests_per_connection():
+    card_numbers = [f"{i:016d}" for i in range(10)]
+
+    class _CountingUseCase(AsyncATMUseCase):
+        running = peak = 0
+
+        async def end_session(self, session_id):
+            _CountingUseCase.running += 1
+            _CountingUseCase.peak = max(_CountingUseCase.peak, _CountingUseCase.running)
+            await asyncio.sleep(0.005)
+            _CountingUseCase.running -= 1
+            return await super().end_session(session_id=session_id)
+
+    async def run():
+        gateway = TerminalGateway(use_case=_CountingUseCase(), max_in_flight=3)
+        client = await _start(gateway)
+        results = await asyncio.gather(*[client.request(f"atm-{i}", "end_session", session_id="x") for i in range(30)])
+        await client.close()
+        await gateway.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert [r.message for r in results] == ["session is invalid"] * 30
+    assert _CountingUseCase.peak == 3
+
+
+def test_gateway_rate_limits_pin_attempts_per_terminal_id():
+    card_numbers = [f"{i:016d}" for i in range(3)]
+
+    async def run():
+        use_case = _use_case(card_numbers)
+        use_case.terminal_limiter = TokenBucketLimiter(rate=0, burst=1)
+        gateway = TerminalGateway(use_case=use_case)
+        client = await _start(gateway)
+        results = []
+        for terminal_id, card_number in zip(["atm-1", "atm-1", "atm-2"], card_numbers):
+            res = await client.request(terminal_id, "validate_card", encrypted_card_info=pack_card_data(_card_data(card_number)))
+            results.append(await client.request(terminal_id, "auth", pin="0000", session_id=res.session_id))
+        await client.close()
+        await gateway.stop()
+        return results
+
+    # all three terminals share the connection, but each has its own budget
+    assert [res.message for res in asyncio.run(run())] == [
+        "Retrieved account ids", "too many attempts from this terminal, try again later", "Retrieved account ids",
+    ]
+
+
+def test_gateway_rejects_bad_requests():
+    async def run():
+        gateway = TerminalGateway(use_case=AsyncATMUseCase())
+        client = await _start(gateway)
+        results = [
+            await client.call("atm-1", "validate_card", [b"\x93\x01\x02\x03"]),
+            await client.call("atm-1", "unknown", []),
+            await client.call("atm-1", ["auth"], []),
+            await client.call("atm-1", "auth", ["0000"]),
+            await client.call("atm-1", "withdraw", ["1", "x", -5]),
+        ]
+        await client.close()
+        await gateway.stop()
+        return results
+
+    assert asyncio.run(run()) == [
+        (200, [False, "card data is malformed", None]),
+        (404, "unknown operation: unknown"),
+        (400, "operation must be a string"),
+        (400, "request must have 2 fields: pin, session_id"),
+        (400, "amount must be a positive integer"),
+    ]
+
+
+def test_gateway_answers_every_request():
+    class _BrokenUseCase(AsyncATMUseCase):
+        async def end_session(self, session_id):
+            return None  # not a response DTO: cannot be encoded
+
+    async def run():
+        gateway = TerminalGateway(use_case=_BrokenUseCase())
+        client = await _start(gateway)
+        results = [
+            await asyncio.wait_for(client.call("atm-1", "end_session", ["x"]), 1),
+            await asyncio.wait_for(client.call("atm-1", "get_balance", ["1", "x"]), 1),
+        ]
+        await client.close()
+        await gateway.stop()
+        return results
+
+    assert asyncio.run(run()) == [(500, "internal error"), (200, [False, None, "1", "session is invalid"])]
+
+
+def test_gateway_closes_idle_and_broken_connections():
+    async def run():
+        gateway = TerminalGateway(use_case=AsyncATMUseCase(), idle_timeout=0.05, max_frame_size=1024)
+        idle = await _start(gateway)
+        assert (await idle.request("atm-1", "end_session", session_id="x")).message == "session is invalid"
+        await asyncio.sleep(0.2)
+        assert idle.closed
+
+        host, port = gateway._server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(struct.pack(">I", 1 << 20))  # oversized frame
+        assert await reader.read() == b""
+
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(struct.pack(">I", 3) + b"\x93\x01\x02")  # not [request_id, terminal_id, operation, fields]
+        assert await reader.read() == b""
+
+        await asyncio.sleep(0.01)
+        assert gateway.connections == 0
+        await gateway.stop()
+
+    asyncio.run(run())
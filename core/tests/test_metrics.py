@@ -0,0 +1,119 @@
+import threading
+
+from core.dto import DepositRes
+from core.metrics import Counter, Histogram, MetricsRegistry, instrument
+
+
+def test_histogram_buckets_are_contiguous_and_bounded():
+    prev = -1
+    for value in range(100_000):
+        index = Histogram.bucket_index(value)
+        assert index in (prev, prev + 1)
+        assert value <= Histogram.bucket_upper_bound(index) <= value * (1 + 1 / Histogram.SUB_BUCKETS) + 1
+        prev = index
+
+
+def test_histogram_record_uses_bucket_index():
+    for value in [0, 1, 15, 16, 17, 1000, 123456, Histogram.MAX_VALUE]:
+        h = Histogram()
+        h.record(value)
+        counts, total = h.snapshot()
+        assert counts[Histogram.bucket_index(value)] == 1
+        assert total == value
+
+
+def test_histogram_percentiles_and_clamping():
+    h = Histogram()
+    for value in range(1, 1001):
+        h.record(value)
+    h.record(10 ** 15)  # clamped into the last bucket
+
+    assert h.count == 1001
+    assert 500 <= h.percentile(0.5) <= 500 * 1.125
+    assert 990 <= h.percentile(0.99) <= 990 * 1.125
+    assert h.percentile(1.0) == Histogram.MAX_VALUE
+
+
+def test_histogram_and_counter_shards_merge_across_threads():
+    registry = MetricsRegistry()
+    h = registry.histogram("latency", "test")
+    c = registry.counter("calls", "test")
+
+    def worker():
+        for i in range(10_000):
+            h.record(i % 100)
+            c.inc()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert h.count == 80_000
+    assert c.value == 80_000
+    assert registry.histogram("latency", "test") is h
+
+
+def test_histogram_and_counter_retire_the_shards_of_finished_threads():
+    h = Histogram()
+    c = Counter()
+    h.record(5)
+
+    def worker():
+        h.record(100)
+        c.inc(2)
+
+    for _ in range(50):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert len(h._shards) == 1  # only the main thread's shard is still live
+    assert len(c._shards) == 0
+    assert h.count == 51
+    assert h.snapshot()[1] == 5 + 50 * 100
+    assert c.value == 100
+
+
+def test_instrument_counts_outcomes_and_renders_prometheus_text():
+    registry = MetricsRegistry()
+
+    class Teller(object):
+        @instrument("teller", registry=registry)
+        def deposit(self, amount):
+            if amount < 0:
+                raise ValueError(amount)
+            if amount > 100:
+                return DepositRes(success=False, message=f"over limit: {amount}")
+            return DepositRes(success=True, message="ok")
+
+    teller = Teller()
+    teller.deposit(1)
+    teller.deposit(1)
+    teller.deposit(101)
+    teller.deposit(102)
+    try:
+        teller.deposit(-1)
+    except ValueError:
+        pass
+
+    text = registry.render()
+    assert "# TYPE atm_operation_latency_seconds histogram" in text
+    assert 'atm_operation_latency_seconds_count{component="teller",operation="deposit"} 5' in text
+    assert 'atm_operation_latency_seconds_bucket{component="teller",operation="deposit",le="+Inf"} 5' in text
+    assert 'atm_operation_total{component="teller",operation="deposit",reason="ok",success="true"} 2' in text
+    # details after ":" are dropped so that each reason is a single series
+    assert 'atm_operation_total{component="teller",operation="deposit",reason="over limit",success="false"} 2' in text
+    assert 'atm_operation_total{component="teller",operation="deposit",reason="exception",success="false"} 1' in text
+
+
+def test_registry_caps_series_per_metric():
+    registry = MetricsRegistry(max_series=2)
+    registry.counter("errors", "test", reason="a").inc()
+    registry.counter("errors", "test", reason="b").inc()
+    registry.counter("errors", "test", reason="c").inc()
+    registry.counter("errors", "test", reason="d").inc()
+
+    assert registry.counter("errors", "test", reason="a").value == 1
+    assert registry.counter("errors", "test", reason=MetricsRegistry.OVERFLOW).value == 2
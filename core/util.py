@@ -1,4 +1,9 @@
 import json
+import threading
+import time
+from typing import Union
+
+import msgpack
 
 from core.domain.entity import CardData
 
@@ -7,7 +12,60 @@ class ChipDecryptor:
     def __init__(self):
         pass
 
-    def decrypt(self, encrypted_info: str) -> CardData:
-        # For sake of simplicity: encrypted info is just json string
+    def decrypt(self, encrypted_info: Union[str, bytes]) -> CardData:
+        # For sake of simplicity: encrypted info is just json string, or MessagePack bytes of the CardData constructor
+        # arguments in order (see core.codec.pack_card_data), which skips the JSON parse and the dict
+        if isinstance(encrypted_info, bytes):
+            fields = msgpack.unpackb(encrypted_info)
+            if not isinstance(fields, list) or len(fields) != 5 or not all(isinstance(f, str) for f in fields):
+                raise ValueError("card data must be an array of 5 strings")
+            return CardData(*fields)
         data = json.loads(encrypted_info)
         return CardData.from_dict(data)
+
+
+# StripedLock hands out one of a fixed set of locks per key, so operations on the same key are serialized while
+# operations on different keys (most of the time) proceed in parallel, without keeping a lock per key around
+class StripedLock:
+    def __init__(self, n_stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(n_stripes)]
+
+    def get(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+# CircuitBreaker stops calling a failing dependency for `reset_timeout` seconds once `failure_threshold` calls in a row
+# have failed, then lets a single trial call through (half-open) to decide whether to close again
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False  # open, or half-open with the trial call still in flight
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
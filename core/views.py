@@ -1,3 +1,44 @@
-from django.shortcuts import render
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from core.api import OPERATIONS, parse_request
+from core.application.errors import InvalidRequestError
+from core.application.use_case import ATMUseCase
+from core.codec import JSON, get_codec
+from core.metrics import REGISTRY
+
+
+# terminal_api serves terminal requests (POST /atm/<operation> with a JSON or MessagePack body, see core/codec.py) with ATMUseCase, for WSGI deployments
+# (under ASGI, core/asgi.py answers /atm/ before Django). Terminals authenticate with the card and PIN, not with a
+# browser session, so the view is CSRF exempt; core.middleware.TerminalApiMiddleware also routes /atm/ around the
+# session, CSRF, auth and messages middleware. Responses are the use case DTOs' __dict__, serialized as they are.
+@csrf_exempt
+def terminal_api(request, operation: str):
+    codec = get_codec(request.content_type) or get_codec(JSON)
+    if operation not in OPERATIONS:
+        return HttpResponse(codec.encode_error(f"unknown operation: {operation}"), status=404,
+                            content_type=codec.content_type)
+    if request.method != "POST":
+        return HttpResponse(codec.encode_error("method not allowed"), status=405, content_type=codec.content_type)
+    if get_codec(request.content_type) is None:
+        return HttpResponse(codec.encode_error(f"unsupported content type: {request.content_type}"), status=415,
+                            content_type=codec.content_type)
+
+    try:
+        kwargs = parse_request(operation, codec.decode_request(operation, request.body))
+    except InvalidRequestError as e:
+        return HttpResponse(codec.encode_error(str(e)), status=400, content_type=codec.content_type)
+
+    if operation == "auth":
+        # PIN attempts are rate limited per terminal, as identified by the terminal itself: the client address is shared
+        # by every terminal behind a proxy or concentrator
+        kwargs["terminal_id"] = request.headers.get("X-Terminal-Id") or None
+    res = getattr(ATMUseCase.get_instance(), operation)(**kwargs)
+    return HttpResponse(codec.encode_response(res), content_type=codec.content_type)
+
+
+# metrics exposes the ATM operation metrics (core.metrics) for Prometheus to scrape
+@require_GET
+def metrics(request):
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")